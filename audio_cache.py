@@ -0,0 +1,280 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+# Ennyi ideig nem játszott, nem tárolt számok lejátszásszámlálója törlődik
+PLAY_COUNT_TTL = 30 * 86400
+
+# Fájlnévként csak YouTube videó azonosítót fogadunk el
+VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+
+class AudioCache:
+    """Gyakran játszott számok helyi Ogg/Opus másolata, méretkorlátos LRU kiürítéssel
+
+    Egy szám N lejátszás után kerül a lemezre (videó azonosító szerint); onnantól a lejátszás
+    a helyi fájlból indul, YouTube stream és hálózati várakozás nélkül.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, min_plays: int, bitrate: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_plays = max(1, min_plays)
+        self.bitrate = bitrate
+
+        # Statisztika
+        self.hits = 0
+        self.stored = 0
+
+        # Folyamatban lévő mentések: video_id -> task
+        self.tasks: Dict[str, asyncio.Task] = {}
+        # Lejátszás közben rögzített számok (a lejátszó FFmpeg kimenetéből)
+        self.recording = set()
+        self.closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(directory, 'index.db'), check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS tracks (
+                video_id TEXT PRIMARY KEY,
+                plays INTEGER NOT NULL DEFAULT 0,
+                size INTEGER NOT NULL DEFAULT 0,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS tracks_last_access ON tracks (last_access);
+        """)
+        self.db.commit()
+
+        # Tárolt számok a memóriában is - a lejátszás / előre feloldás döntései adatbázis nélkül
+        self.available = {
+            row[0] for row in self.db.execute("SELECT video_id FROM tracks WHERE size > 0")
+        }
+
+    def _path(self, video_id: str) -> str:
+        return os.path.join(self.directory, f"{video_id}.ogg")
+
+    def path_for(self, video_id: Optional[str]) -> Optional[str]:
+        """Helyi fájl útvonala, ha a szám tárolva van (blokkoló - fájlrendszer ellenőrzés)"""
+        if not video_id or video_id not in self.available:
+            return None
+
+        path = self._path(video_id)
+        if not os.path.exists(path):
+            # Kézzel törölték - újra a számlálótól kezdjük
+            self.invalidate(video_id)
+            return None
+        return path
+
+    def contains(self, video_id: Optional[str]) -> bool:
+        """Tárolva van-e a szám (csak memória, az event loopról is hívható)"""
+        return bool(video_id) and video_id in self.available
+
+    def record_play(self, video_id: Optional[str]) -> bool:
+        """Elindult lejátszás számolása (blokkoló) - True, ha a számot most érdemes elmenteni
+
+        A találat itt számít, nem a forrás megnyitásakor: tekerés / hangerő váltás újranyitása nem lejátszás.
+        """
+        if (not video_id or not VIDEO_ID_PATTERN.match(video_id) or video_id in self.tasks
+                or video_id in self.recording):
+            return False
+
+        with self.lock:
+            self.db.execute(
+                """INSERT INTO tracks (video_id, plays, last_access) VALUES (?, 1, ?)
+                   ON CONFLICT (video_id) DO UPDATE SET plays = plays + 1, last_access = excluded.last_access""",
+                (video_id, time.time())
+            )
+            self.db.commit()
+            plays, size = self.db.execute(
+                "SELECT plays, size FROM tracks WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        if size:
+            self.hits += 1
+        return not size and plays >= self.min_plays
+
+    def wants(self, video_id: Optional[str]) -> bool:
+        """Ezzel a lejátszással eléri-e a szám a mentési küszöböt (blokkoló) - ha igen, a lejátszás rögzíthető"""
+        if (not video_id or not VIDEO_ID_PATTERN.match(video_id) or video_id in self.available
+                or video_id in self.tasks or video_id in self.recording):
+            return False
+        with self.lock:
+            row = self.db.execute("SELECT plays, size FROM tracks WHERE video_id = ?", (video_id,)).fetchone()
+        plays, size = row or (0, 0)
+        return not size and plays + 1 >= self.min_plays
+
+    def begin_recording(self, video_id: str) -> Optional[str]:
+        """Rögzítés lefoglalása (egy számot egyszerre csak egy forrás ír) - a félkész fájl útvonala vagy None"""
+        with self.lock:
+            if video_id in self.recording or video_id in self.tasks or video_id in self.available:
+                return None
+            self.recording.add(video_id)
+        return self._path(video_id) + '.part'
+
+    def schedule_finish(self, video_id: str, complete: bool):
+        """Rögzítés lezárása a háttérben (az event loopról hívandó)"""
+        task = asyncio.create_task(asyncio.to_thread(self.finish_recording, video_id, complete))
+        self.tasks[video_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(video_id, None))
+
+    def finish_recording(self, video_id: str, complete: bool) -> bool:
+        """Teljes felvétel a helyére kerül, a csonka (kihagyott szám) törlődik (blokkoló)"""
+        try:
+            return self._commit(video_id, complete)
+        finally:
+            self.recording.discard(video_id)
+
+    def invalidate(self, video_id: Optional[str]):
+        """Hibás (pl. csonka) helyi fájl törlése"""
+        if not video_id or not VIDEO_ID_PATTERN.match(video_id):
+            return
+        self.available.discard(video_id)
+        with self.lock:
+            self.db.execute("UPDATE tracks SET size = 0, plays = 0 WHERE video_id = ?", (video_id,))
+            self.db.commit()
+        self._remove(self._path(video_id))
+
+    def schedule_store(self, video_id: str, stream_url: str, ffmpeg_path: str, copy: bool, delay: float = 0):
+        """Mentés indítása a háttérben (egy számot egyszerre csak egyszer)
+
+        Tartalék arra az esetre, ha a lejátszást nem lehetett rögzíteni: a `delay` (a szám hossza) letelte
+        után tölt le, hogy a második letöltés ne a lejátszással egy időben fusson.
+        """
+        if video_id in self.tasks or video_id in self.recording:
+            return
+        task = asyncio.create_task(self.store(video_id, stream_url, ffmpeg_path, copy, delay))
+        self.tasks[video_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(video_id, None))
+
+    async def store(self, video_id: str, stream_url: str, ffmpeg_path: str, copy: bool, delay: float = 0) -> bool:
+        """Szám letöltése és Ogg/Opus fájlba mentése (Opus forrásnál átkódolás nélkül)"""
+        if delay > 0:
+            await asyncio.sleep(delay)
+        partial = self._path(video_id) + '.part'
+
+        args = [ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-y']
+        if stream_url.startswith(('http://', 'https://')):
+            args += ['-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5']
+        args += ['-i', stream_url, '-vn', '-map_metadata', '-1']
+        if copy:
+            args += ['-c:a', 'copy']
+        else:
+            args += ['-c:a', 'libopus', '-b:a', f'{self.bitrate}k', '-ar', '48000', '-ac', '2']
+        args += ['-f', 'ogg', partial]
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *args, stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError as e:
+            print(f"Nem sikerült elindítani az FFmpeget a mentéshez ({video_id}): {e}")
+            return False
+        try:
+            returncode = await process.wait()
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            self._remove(partial)
+            raise
+
+        if returncode != 0 or not os.path.exists(partial):
+            print(f"Nem sikerült menteni a számot a helyi gyorsítótárba: {video_id}")
+            self._remove(partial)
+            return False
+        return await asyncio.to_thread(self._commit, video_id, True)
+
+    def _commit(self, video_id: str, complete: bool) -> bool:
+        """Elkészült .part fájl a helyére tétele és bejegyzése, csonka törlése (blokkoló)"""
+        path = self._path(video_id)
+        partial = path + '.part'
+        if not complete:
+            self._remove(partial)
+            return False
+
+        # Csak kész fájl kerülhet a helyére - egy félbeszakadt mentést nem játszunk le
+        try:
+            os.replace(partial, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            # Pl. Windowson épp lejátszott (megnyitott) fájl nem írható felül
+            print(f"Nem sikerült a helyére tenni a mentett számot ({video_id}): {e}")
+            self._remove(partial)
+            return False
+        self._index(video_id, size)
+        self.stored += 1
+        return True
+
+    def _index(self, video_id: str, size: int):
+        """Elkészült fájl bejegyzése, a méretkorlát feletti régiek törlése (blokkoló)"""
+        # A kiürítés akár ezt az új fájlt is törölheti (ha egymagában nagyobb a korlátnál)
+        with self.lock:
+            if self.closed:
+                return
+            self.available.add(video_id)
+            self.db.execute(
+                "UPDATE tracks SET size = ?, last_access = ? WHERE video_id = ?", (size, time.time(), video_id)
+            )
+            self._evict()
+            self.db.commit()
+
+    def _remove(self, path: str) -> bool:
+        """Fájl törlése - True, ha már nincs meg"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Nem sikerült törölni a fájlt ({path}): {e}")
+            return False
+        return True
+
+    def _evict(self):
+        """Legrégebben játszott fájlok törlése a méretkorlát felett"""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM tracks").fetchone()[0]
+        if total > self.max_bytes:
+            rows = self.db.execute(
+                "SELECT video_id, size FROM tracks WHERE size > 0 ORDER BY last_access"
+            ).fetchall()
+            for video_id, size in rows:
+                if total <= self.max_bytes:
+                    break
+                # Használatban lévő (pl. Windowson épp lejátszott) fájl marad, a következő kiürítés újrapróbálja
+                if not self._remove(self._path(video_id)):
+                    continue
+                self.available.discard(video_id)
+                self.db.execute("UPDATE tracks SET size = 0, plays = 0 WHERE video_id = ?", (video_id,))
+                total -= size
+
+        # Régóta nem játszott, nem tárolt számok számlálói
+        self.db.execute(
+            "DELETE FROM tracks WHERE size = 0 AND last_access < ?", (time.time() - PLAY_COUNT_TTL,)
+        )
+
+    def stats(self) -> Dict:
+        """Tárolt fájlok száma, mérete és a találatok"""
+        with self.lock:
+            files, size = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tracks WHERE size > 0"
+            ).fetchone()
+        return {
+            'files': files,
+            'size_mb': size / (1024 * 1024),
+            'hits': self.hits,
+            'stored': self.stored,
+            'pending': len(self.tasks)
+        }
+
+    async def close(self):
+        """Folyamatban lévő mentések leállítása és bevárása, utána az adatbázis lezárása"""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        with self.lock:
+            self.closed = True
+            self.db.close()
@@ -0,0 +1,629 @@
+import audioop
+import mmap
+import queue
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+import discord
+from discord.oggparse import OggStream
+from discord.utils import MISSING
+from discord.opus import Decoder as OpusDecoder, Encoder as OpusEncoder
+
+# Egy Discord hangkeret hossza (20 ms) és mérete PCM-ben
+FRAME_LENGTH = OpusEncoder.FRAME_LENGTH / 1000.0
+FRAMES_PER_SECOND = int(1 / FRAME_LENGTH)
+
+
+class OggOpusFileSource(discord.AudioSource):
+    """Helyi Ogg/Opus fájl csomagjai közvetlenül, FFmpeg folyamat nélkül (memóriába képezve olvasva)"""
+
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            self.file.close()
+            raise
+        self.packets = OggStream(self.map).iter_packets()
+
+    def read(self) -> bytes:
+        for packet in self.packets:
+            # Az Opus fejléc csomagok nem hangkeretek
+            if not packet.startswith((b'OpusHead', b'OpusTags')):
+                return packet
+        return b''
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self):
+        # Az előreolvasó szál épp olvashat - utána már csak hibát kap, amit vége jelnek vesz
+        try:
+            self.map.close()
+        except (ValueError, BufferError):
+            pass
+        self.file.close()
+
+
+class _TeeReader:
+    """Olvasott bájtok másolása egy fájlba - az FFmpeg Ogg kimenete így változatlanul menthető"""
+
+    def __init__(self, stream, file):
+        self.stream = stream
+        self.file = file
+        self.failed = False
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        if data and not self.failed:
+            try:
+                self.file.write(data)
+            except (OSError, ValueError):
+                self.failed = True
+        return data
+
+
+class RecordingOpusAudio(discord.FFmpegOpusAudio):
+    """FFmpeg Opus forrás, ami a lejátszott Ogg folyamot egy fájlba is kiírja (második letöltés nélkül)
+
+    Az `on_finished(teljes)` a forrás lezárásakor egyszer hívódik, bármelyik szálból: teljes, ha az FFmpeg
+    a stream végéig eljutott és hiba nélkül lépett ki - félbeszakított (kihagyott) számnál nem az.
+    """
+
+    def __init__(self, source: str, partial: str, on_finished: Callable[[bool], None], **kwargs):
+        self.on_finished = on_finished
+        self.ended = False
+        self.recording = None
+        try:
+            self.recording = open(partial, 'wb')
+            super().__init__(source, **kwargs)
+        except Exception:
+            self._finish(False)
+            raise
+        self.tee = _TeeReader(self._stdout, self.recording)
+        self._packet_iter = OggStream(self.tee).iter_packets()
+
+    def read(self) -> bytes:
+        data = super().read()
+        if not data:
+            self.ended = True
+        return data
+
+    def _finish(self, complete: bool):
+        recording, self.recording = self.recording, None
+        if recording is not None:
+            recording.close()
+        on_finished, self.on_finished = self.on_finished, None
+        if on_finished is not None:
+            on_finished(complete)
+
+    def cleanup(self):
+        # A stream végén az FFmpeg magától kilép - megvárjuk, különben a leállítás csonkának látszana
+        process = self._process
+        returncode = None
+        if self.ended and process is not MISSING:
+            try:
+                returncode = process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+        super().cleanup()
+        self._finish(returncode == 0 and not self.tee.failed)
+
+
+class ReadAheadSource(discord.AudioSource):
+    """Forrás korlátos előreolvasó pufferrel - az FFmpeg már a váltás előtt elindulhat és bemelegedhet"""
+
+    def __init__(self, original: discord.AudioSource, max_frames: int):
+        self.original = original
+        self.frames = queue.Queue(maxsize=max(1, max_frames))
+        self.closed = threading.Event()
+        self.claimed = False
+        self.claim_lock = threading.Lock()
+
+        # Az első keret (vagy az azonnali vége) megérkezett-e
+        self.started = threading.Event()
+        self.produced_audio = False
+
+        self.thread = threading.Thread(target=self._fill, daemon=True, name='readahead')
+        self.thread.start()
+
+    def _fill(self):
+        """Keretek olvasása az eredeti forrásból a pufferbe (saját szálon)"""
+        while not self.closed.is_set():
+            try:
+                data = self.original.read()
+            except Exception:
+                data = b''
+
+            if data:
+                self.produced_audio = True
+            self.started.set()
+
+            # Ha tele a puffer, várunk - így az FFmpeg sem olvas feleslegesen előre
+            while not self.closed.is_set():
+                try:
+                    self.frames.put(data, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+            if not data:
+                return
+
+    def claim(self) -> bool:
+        """Forrás lefoglalása lejátszásra - csak egyszer sikerülhet"""
+        with self.claim_lock:
+            if self.claimed:
+                return False
+            self.claimed = True
+            return True
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Várakozás az első keretre (blokkoló) - False, ha a forrás hang nélkül ért véget
+
+        Ez tipikusan lejárt / 403-at adó stream URL-re utal.
+        """
+        if not self.started.wait(timeout):
+            return True  # Lassú indulás, nem feltétlenül hiba
+        return self.produced_audio
+
+    def buffered(self) -> int:
+        """Pufferelt keretek száma"""
+        return self.frames.qsize()
+
+    def read(self) -> bytes:
+        while not self.closed.is_set():
+            try:
+                data = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if not data:
+                # Vége: a további olvasások is üreset adnak
+                self.closed.set()
+            return data
+        return b''
+
+    def is_opus(self) -> bool:
+        return self.original.is_opus()
+
+    def cleanup(self):
+        self.closed.set()
+        # A töltő szál felszabadítása, ha épp a teli pufferre vár
+        try:
+            while True:
+                self.frames.get_nowait()
+        except queue.Empty:
+            pass
+        self.original.cleanup()
+
+
+class SharedStream:
+    """Egy FFmpeg forrás kereteinek megosztása több hangkliens között gyűrűpufferrel
+
+    Ugyanazt a számot egyszerre játszó szerverek egyetlen letöltésen / dekódoláson osztoznak.
+    A termelő szál legfeljebb `readahead` kerettel jár a leggyorsabb olvasó előtt; a puffer
+    `capacity` keretet tart, így a később indult (vagy szüneteltetett) olvasók ennyivel maradhatnak
+    le. Aki ennél jobban lemarad, saját forrásra vált a `fallback(pozíció mp)` segítségével.
+    """
+
+    def __init__(self, original: discord.AudioSource, capacity: int, readahead: int,
+                 fallback: Optional[Callable[[float], discord.AudioSource]] = None):
+        self.original = original
+        self.opus = original.is_opus()
+        self.readahead = max(1, readahead)
+        self.capacity = max(self.readahead + 1, capacity)
+        self.fallback = fallback
+
+        self.cond = threading.Condition()
+        self.buffer = deque()  # keretek a `base` abszolút sorszámtól
+        self.base = 0
+        self.produced = 0
+        self.ended = False
+        self.closed = False
+        self.readers = set()
+
+        self.started = threading.Event()
+        self.produced_audio = False
+        self.released = False
+
+        self.thread = threading.Thread(target=self._fill, daemon=True, name='shared-stream')
+        self.thread.start()
+
+    def _release(self):
+        """Az FFmpeg folyamat leállítása (egyszer, bármelyik szálból)"""
+        with self.cond:
+            if self.released:
+                return
+            self.released = True
+        self.original.cleanup()
+
+    def _fastest(self) -> int:
+        return max((reader.position for reader in self.readers), default=0)
+
+    def _fill(self):
+        """Keretek olvasása az eredeti forrásból a gyűrűpufferbe (saját szálon)"""
+        while True:
+            with self.cond:
+                while not self.closed and self.produced - self._fastest() >= self.readahead:
+                    self.cond.wait(0.1)
+                if self.closed:
+                    break
+
+            try:
+                data = self.original.read()
+            except Exception:
+                data = b''
+
+            if data:
+                self.produced_audio = True
+            self.started.set()
+
+            lost = []
+            with self.cond:
+                if self.closed:
+                    break
+                if not data:
+                    self.ended = True
+                    self.cond.notify_all()
+                    break
+
+                self.buffer.append(data)
+                self.produced += 1
+                if self._fastest() > self.capacity - self.readahead:
+                    # Új olvasó már nem csatlakozhat: a mindenki által elolvasott keretek felszabadíthatók
+                    slowest = min(reader.position for reader in self.readers)
+                    while self.base < slowest:
+                        self.buffer.popleft()
+                        self.base += 1
+                if len(self.buffer) > self.capacity:
+                    # A legrégebbi keret kiesik: aki még erre vár, az lemaradt
+                    lost = [reader for reader in self.readers if reader.position <= self.base]
+                    for reader in lost:
+                        self.readers.discard(reader)
+                    self.buffer.popleft()
+                    self.base += 1
+                self.cond.notify_all()
+
+            for reader in lost:
+                reader.detach(self.fallback)
+
+        self._release()
+
+    def subscribe(self, tolerance: int) -> Optional['SharedStreamReader']:
+        """Új olvasó a szám elejétől - ha még elérhető és a többiek legfeljebb `tolerance` kerettel járnak előrébb"""
+        with self.cond:
+            if self.closed or self.base > 0 or self._fastest() > tolerance:
+                return None
+            if self.ended and not self.produced_audio:
+                return None
+            reader = SharedStreamReader(self)
+            self.readers.add(reader)
+            return reader
+
+    def unsubscribe(self, reader: 'SharedStreamReader'):
+        """Olvasó eltávolítása; az utolsó után az FFmpeg leáll"""
+        with self.cond:
+            self.readers.discard(reader)
+            if self.readers or self.closed:
+                return
+            self.closed = True
+            self.cond.notify_all()
+        # Ha a termelő épp az FFmpegre vár, a leállítás azonnal felszabadítja
+        self._release()
+
+    @property
+    def listeners(self) -> int:
+        return len(self.readers)
+
+
+class SharedStreamReader(discord.AudioSource):
+    """Egy hangkliens olvasási pozíciója egy megosztott streamben (ReadAheadSource-szal azonos felület)"""
+
+    def __init__(self, stream: SharedStream):
+        self.stream = stream
+        self.position = 0
+        self.private: Optional[ReadAheadSource] = None
+        self.detached = threading.Event()
+        self.closed = False
+        self.claimed = False
+        self.claim_lock = threading.Lock()
+
+    def detach(self, fallback: Optional[Callable[[float], discord.AudioSource]]):
+        """Lemaradt olvasó átállítása saját forrásra a jelenlegi pozíciójától (a termelő szálból)"""
+        if fallback is not None and not self.closed:
+            try:
+                self.private = ReadAheadSource(fallback(self.position * FRAME_LENGTH), self.stream.readahead)
+            except Exception as e:
+                print(f"Nem sikerült saját forrásra váltani: {e}")
+        self.detached.set()
+
+    def claim(self) -> bool:
+        with self.claim_lock:
+            if self.claimed:
+                return False
+            self.claimed = True
+            return True
+
+    def wait_ready(self, timeout: float) -> bool:
+        stream = self.stream
+        if not stream.started.wait(timeout):
+            return True
+        return stream.produced_audio
+
+    def buffered(self) -> int:
+        if self.detached.is_set():
+            return self.private.buffered() if self.private else 0
+        return max(0, self.stream.produced - self.position)
+
+    def read(self) -> bytes:
+        stream = self.stream
+        if not self.detached.is_set():
+            with stream.cond:
+                while (self in stream.readers and self.position >= stream.produced
+                       and not stream.ended and not self.closed):
+                    stream.cond.wait(0.1)
+                if self in stream.readers:
+                    if self.position < stream.produced:
+                        frame = stream.buffer[self.position - stream.base]
+                        self.position += 1
+                        # A termelő a leggyorsabb olvasóhoz igazodik
+                        stream.cond.notify_all()
+                        return frame
+                    return b''
+            if self.closed:
+                return b''
+
+        # Lemaradtunk: saját forrásra váltunk (a termelő szál indítja el)
+        if not self.detached.wait(5) or self.private is None:
+            return b''
+        frame = self.private.read()
+        if frame:
+            self.position += 1
+        return frame
+
+    def is_opus(self) -> bool:
+        return self.stream.opus
+
+    def cleanup(self):
+        self.closed = True
+        if self.private is not None:
+            self.private.cleanup()
+        self.stream.unsubscribe(self)
+
+
+class GaplessSource(discord.AudioSource):
+    """Egymást követő számokat egyetlen folyamatos forrásként ad a hangkliensnek, keret határon váltva"""
+
+    def __init__(
+        self,
+        source: ReadAheadSource,
+        track: Any,
+        duration: int,
+        prespawn_seconds: float,
+        crossfade_seconds: float = 0,
+        on_near_end: Optional[Callable[[Any], None]] = None,
+        on_advance: Optional[Callable[[Any], None]] = None,
+        on_transition: Optional[Callable[[float, bool], None]] = None,
+        previous_end: Optional[float] = None,
+        volume: float = 1.0
+    ):
+        self.current = source
+        self.opus = source.is_opus()
+        self.track = track
+        self.prespawn_frames = int(prespawn_seconds * FRAMES_PER_SECOND)
+        # Opus csomagokat nem lehet keverni, ott nincs átúsztatás
+        self.crossfade_frames = 0 if self.opus else int(crossfade_seconds * FRAMES_PER_SECOND)
+        # Az erősítés itt történik: egységnyi hangerőn kihagyva, Opus csomagokat csak ilyenkor dekódolunk
+        self.volume = volume
+        self.decoder: Optional[OpusDecoder] = None
+        # Az utoljára kiadott keret Opus csomag volt-e (a hangkliens keretenként kérdezi)
+        self.emitting_opus = self.opus and volume == 1.0
+
+        self.on_near_end = on_near_end
+        self.on_advance = on_advance
+        self.on_transition = on_transition
+
+        self.lock = threading.Lock()
+        self.next: Optional[ReadAheadSource] = None
+        self.next_track: Any = None
+        self.next_duration = 0
+
+        self.lookahead = deque()  # az aktuális szám utolsó keretei az átúsztatáshoz
+        self.pending = deque()    # már kész, kiadásra váró keretek
+
+        # Az aktuális szám forrásának cseréje (új hangerő / tekerés): (forrás, pozíció, felzárkózás)
+        self.replacement: Optional[tuple] = None
+
+        self._start_track(track, duration, previous_end)
+
+    def _start_track(self, track: Any, duration: int, started_after: Optional[float]):
+        """Számláló nullázása új szám kezdetekor"""
+        self.track = track
+        self.track_frames = int((duration or 0) * FRAMES_PER_SECOND)
+        self.frames_played = 0
+        self.near_end_sent = False
+        self.started_after = started_after
+
+    @property
+    def position(self) -> float:
+        """Aktuális szám lejátszási pozíciója másodpercben"""
+        return self.frames_played * FRAME_LENGTH
+
+    def queue_next(self, source: ReadAheadSource, track: Any, duration: int):
+        """Előre elindított következő forrás beállítása"""
+        with self.lock:
+            self.next = source
+            self.next_track = track
+            self.next_duration = duration
+
+    def clear_next(self) -> Optional[ReadAheadSource]:
+        """Előkészített következő forrás eltávolítása (ha még nem váltottunk rá)"""
+        with self.lock:
+            source = self.next
+            self.next = None
+            self.next_track = None
+            return source
+
+    def replace_current(self, source: ReadAheadSource, track: Any, position: float, catch_up: bool = False):
+        """Az aktuális szám forrásának cseréje a következő keret határon
+
+        A `position` az új forrás kezdőpontja a számban. `catch_up` esetén az azóta lejátszott
+        keretek az új forrás pufferéből kimaradnak, így a csere nem ismétel meg semmit.
+        """
+        with self.lock:
+            old, self.replacement = self.replacement, (source, track, position, catch_up)
+        if old is not None and old[0].claim():
+            old[0].cleanup()
+
+    def _swap_replacement(self):
+        """Előkészített csereforrás átvétele (a hang szálból)"""
+        with self.lock:
+            replacement, self.replacement = self.replacement, None
+        if replacement is None:
+            return
+        source, track, position, catch_up = replacement
+        if not source.claim():
+            return
+        if track is not self.track:
+            # Közben a következő számra váltottunk
+            source.cleanup()
+            return
+
+        start_frame = int(position * FRAMES_PER_SECOND)
+        behind = self.frames_played - start_frame if catch_up else 0
+
+        old = self.current
+        self.current = source
+        self.opus = source.is_opus()
+        self.decoder = None
+        old.cleanup()
+        self.lookahead.clear()
+        self.pending.clear()
+
+        self.frames_played = start_frame
+        for _ in range(max(0, min(behind, source.buffered()))):
+            source.read()
+            self.frames_played += 1
+        # Ha a szám vége közelében vagyunk, a következő szám előkészítése újra indulhat
+        self.near_end_sent = False
+
+    def _emit(self, frame: bytes) -> bytes:
+        """Keret kiadása, pozíció és váltási idő nyilvántartása"""
+        self.frames_played += 1
+
+        if self.started_after is not None:
+            gap_ms = (time.perf_counter() - self.started_after) * 1000
+            self.started_after = None
+            if self.on_transition:
+                self.on_transition(gap_ms, False)
+
+        if (not self.near_end_sent and self.track_frames
+                and self.frames_played >= self.track_frames - self.prespawn_frames):
+            self.near_end_sent = True
+            if self.on_near_end:
+                self.on_near_end(self.track)
+
+        volume = self.volume
+        if volume == 1.0:
+            self.decoder = None
+            self.emitting_opus = self.opus
+            return frame
+
+        if self.opus:
+            # Opus csomag: PCM-re bontjuk, a hangkliens kódolja újra
+            if self.decoder is None:
+                self.decoder = OpusDecoder()
+            frame = self.decoder.decode(frame)
+        self.emitting_opus = False
+        return audioop.mul(frame, 2, min(volume, 2.0))
+
+    def read(self) -> bytes:
+        if self.replacement is not None:
+            self._swap_replacement()
+
+        if self.pending:
+            return self._emit(self.pending.popleft())
+
+        if self.crossfade_frames:
+            # Késleltető sor: mindig crossfade_frames kerettel előre olvasunk
+            while len(self.lookahead) <= self.crossfade_frames:
+                frame = self.current.read()
+                if not frame:
+                    break
+                self.lookahead.append(frame)
+
+            if len(self.lookahead) > self.crossfade_frames:
+                return self._emit(self.lookahead.popleft())
+
+            tail = list(self.lookahead)
+            self.lookahead.clear()
+        else:
+            frame = self.current.read()
+            if frame:
+                return self._emit(frame)
+            tail = []
+
+        return self._advance(tail)
+
+    def _advance(self, tail: list) -> bytes:
+        """Az aktuális szám véget ért: váltás az előkészített forrásra keret határon"""
+        ended_at = time.perf_counter()
+
+        with self.lock:
+            nxt, track, duration = self.next, self.next_track, self.next_duration
+            self.next = None
+            self.next_track = None
+
+        if nxt is None or not nxt.claim():
+            # Nincs kész következő szám - a maradékot még kiadjuk, utána vége
+            if tail:
+                self.pending.extend(tail)
+                return self._emit(self.pending.popleft())
+            return b''
+
+        old = self.current
+        self.current = nxt
+        self.opus = nxt.is_opus()
+        self.decoder = None
+        old.cleanup()
+        self._start_track(track, duration, None)
+
+        # Átúsztatás: a régi szám vége és az új eleje lineárisan keverve
+        for i, frame in enumerate(tail):
+            incoming = nxt.read()
+            if len(incoming) != len(frame):
+                self.pending.append(frame)
+                continue
+            gain = (i + 1) / (len(tail) + 1)
+            self.pending.append(audioop.add(
+                audioop.mul(frame, 2, 1.0 - gain),
+                audioop.mul(incoming, 2, gain),
+                2
+            ))
+
+        if not self.pending:
+            frame = nxt.read()
+            if not frame:
+                return b''
+            self.pending.append(frame)
+
+        if self.on_transition:
+            self.on_transition((time.perf_counter() - ended_at) * 1000, True)
+        if self.on_advance:
+            self.on_advance(track)
+
+        return self._emit(self.pending.popleft())
+
+    def is_opus(self) -> bool:
+        return self.emitting_opus
+
+    def cleanup(self):
+        # Az előkészített következő forrás a lejátszóé, azt az takarítja el
+        self.current.cleanup()
+        with self.lock:
+            replacement, self.replacement = self.replacement, None
+        if replacement is not None and replacement[0].claim():
+            replacement[0].cleanup()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+📊 Discord Zene Bot - Hang kimenet benchmark
+
+A két lejátszási utat hasonlítja össze streamenként mért CPU idővel:
+  - PCM:  FFmpegPCMAudio -> PCMVolumeTransformer -> libopus kódolás a bot folyamatában
+  - Opus: FFmpegOpusAudio, hangerő FFmpeg szűrővel, a bot csak továbbküldi a csomagokat
+
+Használat:
+    python benchmark_audio.py                  # FFmpeg által generált tesztjel
+    python benchmark_audio.py zene.webm        # saját fájl vagy stream URL
+    python benchmark_audio.py zene.webm --copy # Opus forrás átcsomagolása (újrakódolás nélkül) is
+
+A keretek olvasása nem valós idejű, így az eredmény egy másodpercnyi hangra vetített CPU idő.
+"""
+
+import argparse
+import sys
+import time
+
+try:
+    import resource  # Csak Unix - az FFmpeg (gyerek folyamat) CPU idejéhez
+except ImportError:
+    resource = None
+
+import discord
+from discord.opus import Encoder as OpusEncoder
+
+from config import FFMPEG_EXECUTABLE, OPUS_BITRATE
+from ffmpeg_caps import probe_ffmpeg
+
+FRAME_SECONDS = OpusEncoder.FRAME_LENGTH / 1000.0
+
+
+def children_cpu() -> float:
+    """Befejezett gyerek folyamatok összesített CPU ideje (mp)"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def input_options(source: str, seconds: int):
+    """Bemenet és FFmpeg kapcsolók (bemenet nélkül rózsaszín zaj - a szinusznál valószerűbb terhelés)"""
+    if source:
+        return source, '', f'-vn -t {seconds}'
+    return f'anoisesrc=color=pink:sample_rate=48000:duration={seconds}', '-f lavfi', '-vn'
+
+
+def run_pcm(source: str, seconds: int, volume: float):
+    """PCM út: dekódolás az FFmpegben, hangerő és Opus kódolás Pythonban"""
+    url, before, options = input_options(source, seconds)
+    audio = discord.PCMVolumeTransformer(
+        discord.FFmpegPCMAudio(url, executable=FFMPEG_EXECUTABLE, before_options=before, options=options),
+        volume=volume
+    )
+    encoder = OpusEncoder() if discord.opus.is_loaded() else None
+
+    frames = 0
+    started = time.process_time()
+    while True:
+        data = audio.read()
+        if not data:
+            break
+        if encoder is not None:
+            # Ugyanez történik a hangkliensben minden nem Opus keretnél
+            encoder.encode(data, OpusEncoder.SAMPLES_PER_FRAME)
+        frames += 1
+    elapsed = time.process_time() - started
+    audio.cleanup()
+    return frames, elapsed
+
+
+def run_opus(source: str, seconds: int, volume: float, copy: bool = False):
+    """Opus út: az FFmpeg kódol (vagy átcsomagol), a bot csak a csomagokat olvassa"""
+    url, before, options = input_options(source, seconds)
+    codec = 'opus' if copy else None
+    if not copy:
+        options += f' -filter:a volume={volume:.2f}'
+    audio = discord.FFmpegOpusAudio(
+        url, bitrate=OPUS_BITRATE, codec=codec, executable=FFMPEG_EXECUTABLE,
+        before_options=before, options=options
+    )
+
+    frames = 0
+    started = time.process_time()
+    while audio.read():
+        frames += 1
+    elapsed = time.process_time() - started
+    audio.cleanup()
+    return frames, elapsed
+
+
+def measure(name: str, func, *args):
+    """Egy út lefuttatása, a bot és az FFmpeg CPU idejének kiírása hang-másodpercenként"""
+    ffmpeg_before = children_cpu()
+    frames, bot_cpu = func(*args)
+    ffmpeg_cpu = children_cpu() - ffmpeg_before
+
+    audio_seconds = frames * FRAME_SECONDS
+    if not audio_seconds:
+        print(f"❌ {name}: nem érkezett hang (FFmpeg hiba?)")
+        return None
+
+    bot_ms = bot_cpu * 1000 / audio_seconds
+    ffmpeg_ms = ffmpeg_cpu * 1000 / audio_seconds
+    ffmpeg_text = f"{ffmpeg_ms:7.2f} ms" if resource is not None else "    n/a"
+    # Egy CPU mag ennyi valós idejű streamet bírna el a bot folyamatában
+    capacity = f"{1000 / bot_ms:8.0f}" if bot_ms else "       ∞"
+    print(f"{name:<12} {bot_ms:7.2f} ms   {ffmpeg_text}   {capacity}   ({audio_seconds:.0f} mp hang)")
+    return bot_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PCM és Opus lejátszási út CPU igényének összehasonlítása")
+    parser.add_argument('source', nargs='?', default='', help="Hangfájl vagy stream URL (alapértelmezés: tesztjel)")
+    parser.add_argument('--seconds', type=int, default=60, help="Mért hang hossza másodpercben")
+    parser.add_argument('--volume', type=float, default=0.5, help="Hangerő (mindkét úton alkalmazva)")
+    parser.add_argument('--copy', action='store_true', help="Opus forrás átcsomagolása is (csak Opus bemenettel)")
+    args = parser.parse_args()
+
+    ffmpeg = probe_ffmpeg(FFMPEG_EXECUTABLE)
+    if not ffmpeg.available:
+        print("❌ FFmpeg nem található! Telepítsd, vagy állítsd be az FFMPEG_EXECUTABLE értékét.")
+        return 1
+    if not ffmpeg.has_encoder('libopus'):
+        print("❌ Az FFmpeg libopus nélkül készült - az Opus út nem használható.")
+        return 1
+
+    if not discord.opus.is_loaded() and not discord.opus._load_default():
+        print("⚠️  libopus nem tölthető be - a PCM út kódolási költsége nem mérhető, az eredmény alulbecsült")
+
+    print("📊 CPU idő egy másodpercnyi hangra (streamenként)\n")
+    print(f"{'Út':<12} {'Bot':>10}   {'FFmpeg':>10}   {'Stream/mag':>8}")
+
+    pcm = measure("PCM", run_pcm, args.source, args.seconds, args.volume)
+    opus = measure("Opus", run_opus, args.source, args.seconds, args.volume)
+    if args.copy:
+        if args.source:
+            measure("Opus másolás", run_opus, args.source, args.seconds, args.volume, True)
+        else:
+            print("⚠️  --copy csak Opus bemenettel (pl. YouTube WebM) mérhető")
+
+    if pcm and opus:
+        print(f"\n✅ Az Opus út a bot folyamatában {pcm / opus:.1f}x kevesebb CPU-t használ streamenként")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -61,6 +61,17 @@ class MusicBot(commands.Bot):
             )
         )
     
+    async def close(self):
+        """Bot leállítása - a zene lejátszó erőforrásainak felszabadítása"""
+        music_player = getattr(self, 'music_player', None)
+        if music_player is not None:
+            try:
+                await music_player.close()
+            except Exception as e:
+                print(f"❌ Hiba a zene lejátszó leállítása során: {e}")
+        
+        await super().close()
+    
     async def on_command_error(self, ctx, error):
         """Parancs hibák kezelése"""
         if isinstance(error, commands.CommandNotFound):
@@ -10,11 +10,76 @@ BOT_PREFIX = '/'
 # Spotify API kulcsok
 SPOTIFY_CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID')
 SPOTIFY_CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET')
+# API címek (teszteléshez helyi stub szerverre állíthatók)
+SPOTIFY_API_BASE = os.getenv('SPOTIFY_API_BASE', 'https://api.spotify.com/v1')
+SPOTIFY_TOKEN_URL = os.getenv('SPOTIFY_TOKEN_URL', 'https://accounts.spotify.com/api/token')
+SPOTIFY_MAX_CONNECTIONS = 10  # Közös HTTP kapcsolatkészlet mérete
+
+# Spotify metaadat gyorsítótár (track / album / playlist)
+SPOTIFY_CACHE_PATH = 'cache/spotify_cache.db'
+SPOTIFY_CACHE_TTL = 24 * 3600       # Bejegyzések maximális élettartama
+SPOTIFY_CACHE_MAX_ENTRIES = 2000    # Lemezen tárolt bejegyzések maximuma (LRU)
+SPOTIFY_CACHE_MEMORY_MB = 32        # Memóriában tartott bejegyzések maximális mérete
+SPOTIFY_SNAPSHOT_RECHECK = 300      # Ennyi ideig a playlist snapshot_id-jét sem ellenőrizzük újra
 
 # Zene bot beállítások
-MAX_QUEUE_SIZE = 100
-DEFAULT_VOLUME = 0.5
-MAX_PLAYLIST_SIZE = 50
+MAX_QUEUE_SIZE = 100      # Egy szerver várólistájának maximális hossza
+MAX_USER_QUEUE_SIZE = 50  # Egy felhasználó által egy szerveren várólistára tett számok maximuma
+MAX_TOTAL_QUEUE_SIZE = 100000  # Az összes szerver várólistáinak együttes maximális hossza
+MAX_QUEUE_MEMORY_MB = 64  # Az összes várólista becsült memóriájának felső korlátja
+DEFAULT_VOLUME = 0.5       # 1.0-nál az Opus csomagok dekódolás és újrakódolás nélkül mennek ki
+MAX_PLAYLIST_SIZE = 50    # Egy playlistből/albumból betölthető számok maximuma
+QUEUE_PAGE_SIZE = 10      # Számok száma a várólista egy oldalán
+DEDUP_MODE = 'allow'      # Duplikátumok: 'allow' (engedve), 'skip' (kihagyva), 'collapse' (összevonva)
+
+# YouTube keresés (yt-dlp) worker beállítások
+RESOLVER_WORKERS = 8          # Egyszerre futó yt-dlp kinyerések maximális száma
+RESOLVER_PER_GUILD_LIMIT = 2  # Ennyi workert foglalhat egyszerre egy szerver
+
+# Keresési eredmények gyorsítótára (SQLite, újraindítás után is megmarad)
+RESOLVER_CACHE_PATH = 'cache/resolution_cache.db'
+RESOLVER_CACHE_MAX_ENTRIES = 5000  # LRU kiürítés e felett
+STREAM_URL_TTL = 6 * 3600          # Stream URL élettartam, ha a URL nem tartalmaz lejáratot
+STREAM_URL_REFRESH_MARGIN = 600    # Ennyi másodperccel a lejárat előtt frissítjük a stream URL-t
+STREAM_START_TIMEOUT = 10          # Ennyi mp-ig várunk az első hangkeretre, mielőtt lejátszanánk
+SPOTIFY_MATCH_MIN_CONFIDENCE = 0.6  # Ennél gyengébb Spotify -> YouTube párosítást nem használunk újra
+SPOTIFY_MATCH_CANDIDATES = 5       # Ennyi YouTube találatot pontozunk egy Spotify számhoz
+
+# Lejátszási hibák kezelése
+PLAYBACK_MAX_ATTEMPTS = 3          # Ennyiszer próbálunk elindítani egy számot, mielőtt kihagynánk
+PLAYBACK_RETRY_BACKOFF = 1.0       # Első újrapróbálás előtti várakozás (mp), próbálkozásonként duplázódik
+MAX_CONSECUTIVE_SKIPS = 10         # Ennyi egymás után kihagyott szám után leáll a lejátszás
+
+# Ennyi következő számot oldunk fel előre, amíg az aktuális szól
+PREFETCH_COUNT = 2
+
+# FFmpeg futtatható állomány (név a PATH-ban vagy teljes útvonal)
+FFMPEG_EXECUTABLE = 'ffmpeg'
+
+# Szünetmentes számváltás: a következő FFmpeg folyamat ennyivel a szám vége előtt indul
+GAPLESS_PLAYBACK = True
+GAPLESS_PRESPAWN_SECONDS = 8
+GAPLESS_READAHEAD_FRAMES = 150  # Előreolvasó puffer mérete (20 ms-os keretek, 150 = 3 mp)
+CROSSFADE_SECONDS = 0           # Átúsztatás hossza (0 = kikapcsolva)
+
+# Opus kimenet: az FFmpeg kódol (vagy WebM/Opus forrásnál csak átcsomagol). 100%-os hangerőn a bot nem dekódol
+# és nem kódol újra, más hangerőn a csomagokat a bot erősíti (dekódol, erősít, újrakódol) - az FFmpeg nem indul újra.
+# Átúsztatáshoz PCM kell, ezért CROSSFADE_SECONDS > 0 esetén nem használjuk.
+OPUS_PASSTHROUGH = True
+OPUS_BITRATE = 128              # kbps, ha az FFmpeg kódol
+
+# Helyi hang gyorsítótár: a gyakran játszott számok Ogg/Opus másolata a lemezen
+# A fájl csomagjait FFmpeg nélkül, mmap-pel olvassuk (tekeréskor az FFmpeg keres a fájlban), a hangerőt a bot állítja.
+AUDIO_CACHE_ENABLED = True
+AUDIO_CACHE_DIR = 'cache/audio'
+AUDIO_CACHE_MAX_MB = 1024
+AUDIO_CACHE_MIN_PLAYS = 3          # Ennyi lejátszás után mentjük el a számot
+AUDIO_CACHE_MAX_DURATION = 900     # Ennél hosszabb (és ismeretlen hosszú, élő) adást nem mentünk
+AUDIO_CACHE_BITRATE = 96           # kbps, ha a forrás nem Opus és át kell kódolni
+
+# Megosztott stream: az egyszerre ugyanazt a számot játszó szerverek egy FFmpeg folyamaton osztoznak
+SHARED_STREAMS = True
+SHARED_STREAM_TOLERANCE = 15       # Ennyi mp-en belül indult szerverek csatlakozhatnak (a puffer is ekkora)
 
 # Színkódok a Discord üzenetekhez
 COLORS = {
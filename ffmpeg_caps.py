@@ -0,0 +1,75 @@
+import shutil
+import subprocess
+from typing import Optional, Set
+
+
+class FFmpegCapabilities:
+    """Az FFmpeg telepítés egyszer lekérdezett tulajdonságai (útvonal, verzió, kodekek, szűrők)"""
+
+    def __init__(self, path: Optional[str] = None, version: Optional[str] = None,
+                 encoders: Optional[Set[str]] = None, filters: Optional[Set[str]] = None):
+        self.path = path
+        self.version = version
+        self.encoders = encoders or set()
+        self.filters = filters or set()
+
+    @property
+    def available(self) -> bool:
+        """Megtalálható és futtatható-e az FFmpeg"""
+        return self.path is not None and self.version is not None
+
+    def has_encoder(self, name: str) -> bool:
+        return name in self.encoders
+
+    def has_filter(self, name: str) -> bool:
+        return name in self.filters
+
+    def __repr__(self) -> str:
+        return f"<FFmpegCapabilities path={self.path!r} version={self.version!r}>"
+
+
+def _run(path: str, *args: str) -> Optional[str]:
+    """FFmpeg futtatása és a kimenet visszaadása (hiba esetén None)"""
+    try:
+        result = subprocess.run([path, '-hide_banner', *args],
+                                capture_output=True, text=True, timeout=5)
+    except (subprocess.TimeoutExpired, OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def _parse_listing(output: Optional[str], flag_chars: str) -> Set[str]:
+    """`ffmpeg -encoders` / `-filters` táblázat neveinek kinyerése"""
+    names = set()
+    if not output:
+        return names
+
+    for line in output.splitlines():
+        # Soronként: "<jelzők> <név> <leírás>", a jelmagyarázat sorai "<jelzők> = ..."
+        parts = line.split()
+        if len(parts) < 2 or parts[1] == '=':
+            continue
+        if set(parts[0]) <= set(flag_chars):
+            names.add(parts[1])
+    return names
+
+
+def probe_ffmpeg(executable: str = 'ffmpeg') -> FFmpegCapabilities:
+    """FFmpeg felderítése: útvonal, verzió, támogatott enkóderek és szűrők (blokkoló)"""
+    path = shutil.which(executable)
+    if not path:
+        return FFmpegCapabilities()
+
+    version_output = _run(path, '-version')
+    if not version_output:
+        return FFmpegCapabilities(path)
+
+    # "ffmpeg version 6.1.1 Copyright ..." -> "6.1.1"
+    first_line = version_output.splitlines()[0] if version_output.splitlines() else ''
+    parts = first_line.split()
+    version = parts[2] if len(parts) > 2 and parts[1] == 'version' else first_line
+
+    encoders = _parse_listing(_run(path, '-encoders'), 'VASFXBD.')
+    filters = _parse_listing(_run(path, '-filters'), 'TSC.')
+
+    return FFmpegCapabilities(path, version, encoders, filters)
@@ -0,0 +1,79 @@
+import asyncio
+import functools
+import inspect
+from typing import Any, Callable, Optional
+
+
+class GuildActor:
+    """Egy szerver lejátszási állapotát egyetlen task módosítja
+
+    A parancsok egy postafiókba kerülnek és érkezési sorrendben, egymás után futnak,
+    így a várólista / aktuális szám / hangkliens módosításai zárak nélkül sem versenyeznek.
+    A lassú műveleteket (keresés, stream feloldás) a hívó a postafiókon kívül végzi.
+    """
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.mailbox: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        if not self.running:
+            self.task = asyncio.create_task(self._run(), name=f"guild-actor-{self.guild_id}")
+
+    async def call(self, func: Callable, *args) -> Any:
+        """Parancs végrehajtása az actorban, megvárva az eredményét"""
+        future = asyncio.get_running_loop().create_future()
+        self.mailbox.put_nowait((func, args, future))
+        return await future
+
+    def tell(self, func: Callable, *args):
+        """Parancs beküldése válasz nélkül (az event loopról hívandó)"""
+        self.mailbox.put_nowait((func, args, None))
+
+    async def _run(self):
+        while True:
+            func, args, future = await self.mailbox.get()
+            if future is not None and future.cancelled():
+                continue
+            try:
+                result = func(*args)
+                if inspect.isawaitable(result):
+                    result = await result
+            except asyncio.CancelledError:
+                if future is not None and not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                else:
+                    print(f"Hiba a szerver parancs feldolgozása során ({self.guild_id}): {e}")
+                continue
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    def stop(self):
+        """Az actor leállítása, a várakozó hívások megszakítása"""
+        if self.task is not None:
+            self.task.cancel()
+        while not self.mailbox.empty():
+            _, _, future = self.mailbox.get_nowait()
+            if future is not None and not future.done():
+                future.cancel()
+
+
+def serialized(method: Callable) -> Callable:
+    """Parancskezelő dekorátor: a metódus a szerver actorjában fut, a többi állapotmódosítással sorban"""
+
+    @functools.wraps(method)
+    async def wrapper(self, interaction, *args):
+        if interaction.guild is None:
+            return await method(self, interaction, *args)
+        return await self.actor(interaction.guild).call(method, self, interaction, *args)
+
+    return wrapper
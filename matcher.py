@@ -0,0 +1,71 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Szavakra bontás (betűk és számok)
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def _words(text: Optional[str]) -> set:
+    """Szöveg szavainak halmaza (kisbetűsen)"""
+    return set(WORD_PATTERN.findall((text or '').lower()))
+
+
+def duration_score(expected: int, actual: int) -> float:
+    """Hossz egyezés: 1.0 ha legfeljebb 3 mp az eltérés, 30 mp eltérésnél 0"""
+    if not expected or not actual:
+        return 0.5  # Ismeretlen hossz: semleges
+    diff = abs(expected - actual)
+    if diff <= 3:
+        return 1.0
+    return max(0.0, 1.0 - (diff - 3) / 27)
+
+
+def title_score(title: str, candidate_title: Optional[str]) -> float:
+    """A Spotify cím szavainak hányada szerepel a YouTube címben"""
+    expected = _words(title)
+    if not expected:
+        return 0.0
+    return len(expected & _words(candidate_title)) / len(expected)
+
+
+def artist_score(artist: str, candidate: Dict) -> float:
+    """Az előadó szerepel-e a YouTube címben vagy a feltöltő nevében"""
+    expected = _words(artist)
+    if not expected:
+        return 0.0
+    found = _words(candidate.get('title')) | _words(candidate.get('uploader')) | _words(candidate.get('channel'))
+    return len(expected & found) / len(expected)
+
+
+def match_confidence(title: str, artist: str, duration: int, candidate: Dict) -> float:
+    """Egy YouTube találat egyezési pontszáma (0-1) egy Spotify számhoz"""
+    return round(
+        0.5 * duration_score(duration, candidate.get('duration') or 0)
+        + 0.3 * title_score(title, candidate.get('title'))
+        + 0.2 * artist_score(artist, candidate),
+        3
+    )
+
+
+# Más felvételre utaló szavak - csak akkor büntetjük, ha a Spotify címben nem szerepelnek
+VARIANT_WORDS = {
+    'cover', 'karaoke', 'instrumental', 'remix', 'live', 'loop', 'hour', 'hours',
+    'nightcore', 'slowed', 'sped', 'reverb', '8d', 'bassboosted'
+}
+
+
+def variant_penalty(title: str, candidate_title: Optional[str]) -> float:
+    """Levonás feldolgozás / remix / órás loop jellegű találatokért"""
+    unexpected = (_words(candidate_title) & VARIANT_WORDS) - _words(title)
+    return min(0.3, 0.15 * len(unexpected))
+
+
+def rank_candidates(title: str, artist: str, duration: int, candidates: List[Dict]) -> List[Tuple[float, Dict]]:
+    """YouTube találatok sorba rendezése pontszám szerint (legjobb elöl)"""
+    scored = []
+    for candidate in candidates:
+        score = match_confidence(title, artist, duration, candidate) - variant_penalty(title, candidate.get('title'))
+        scored.append((round(max(0.0, score), 3), candidate))
+    # Stabil rendezés: azonos pontszámnál a YouTube sorrend dönt
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+    return scored
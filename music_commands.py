@@ -1,7 +1,7 @@
 import discord
 from discord import app_commands
 from discord.ui import View, Button
-from music_player import MusicPlayer
+from music_player import MusicPlayer, format_timestamp
 
 class MusicControlView(View):
     def __init__(self, music_player: MusicPlayer):
@@ -120,53 +120,91 @@ class MusicControlView(View):
     
     async def volume_down_callback(self, interaction: discord.Interaction):
         """Volume down gomb callback"""
-        guild_id = interaction.guild_id
-        if guild_id in self.music_player.voice_clients:
-            voice_client = self.music_player.voice_clients[guild_id]
-            current_volume = voice_client.source.volume if hasattr(voice_client.source, 'volume') else 1.0
-            new_volume = max(0.0, current_volume - 0.1)
-            
-            if hasattr(voice_client.source, 'volume'):
-                voice_client.source.volume = new_volume
-            
-            embed = discord.Embed(
-                title="🔉 Hangerej csökkentve",
-                description=f"Új hangerej: {int(new_volume * 100)}%",
-                color=0x00ff00
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-        else:
-            embed = discord.Embed(
-                title="❌ Hiba!",
-                description="A bot nincs hangcsatornában!",
-                color=0xff0000
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+        await self.music_player.adjust_volume(interaction, -0.1)
     
     async def volume_up_callback(self, interaction: discord.Interaction):
         """Volume up gomb callback"""
-        guild_id = interaction.guild_id
-        if guild_id in self.music_player.voice_clients:
-            voice_client = self.music_player.voice_clients[guild_id]
-            current_volume = voice_client.source.volume if hasattr(voice_client.source, 'volume') else 1.0
-            new_volume = min(2.0, current_volume + 0.1)
-            
-            if hasattr(voice_client.source, 'volume'):
-                voice_client.source.volume = new_volume
-            
-            embed = discord.Embed(
-                title="🔊 Hangerej növelve",
-                description=f"Új hangerej: {int(new_volume * 100)}%",
-                color=0x00ff00
-            )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
-        else:
+        await self.music_player.adjust_volume(interaction, 0.1)
+
+class QueueJumpModal(discord.ui.Modal, title="Ugrás oldalra"):
+    page = discord.ui.TextInput(label="Oldal száma", max_length=6)
+    
+    def __init__(self, view: 'QueueView'):
+        super().__init__()
+        self.queue_view = view
+    
+    async def on_submit(self, interaction: discord.Interaction):
+        """Oldalszám feldolgozása és a meglévő üzenet frissítése"""
+        try:
+            page = int(str(self.page.value).strip()) - 1
+        except ValueError:
             embed = discord.Embed(
                 title="❌ Hiba!",
-                description="A bot nincs hangcsatornában!",
+                description="Érvénytelen oldalszám!",
                 color=0xff0000
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        await self.queue_view.show_page(interaction, page)
+
+class QueueView(View):
+    def __init__(self, music_player: MusicPlayer):
+        super().__init__(timeout=300)  # A lapozás 5 perc után lejár
+        self.music_player = music_player
+        self.page = 0
+        
+        # Előző oldal gomb
+        self.prev_button = Button(
+            style=discord.ButtonStyle.secondary,
+            label="Előző",
+            emoji="◀️"
+        )
+        self.prev_button.callback = self.prev_callback
+        self.add_item(self.prev_button)
+        
+        # Ugrás gomb
+        self.jump_button = Button(
+            style=discord.ButtonStyle.primary,
+            label="Ugrás",
+            emoji="🔢"
+        )
+        self.jump_button.callback = self.jump_callback
+        self.add_item(self.jump_button)
+        
+        # Következő oldal gomb
+        self.next_button = Button(
+            style=discord.ButtonStyle.secondary,
+            label="Következő",
+            emoji="▶️"
+        )
+        self.next_button.callback = self.next_callback
+        self.add_item(self.next_button)
+        
+        self.prev_button.disabled = True
+    
+    async def show_page(self, interaction: discord.Interaction, page: int):
+        """A kért oldal megjelenítése a meglévő üzenet szerkesztésével"""
+        guild_id = interaction.guild_id
+        page_count = self.music_player.queue_page_count(guild_id)
+        self.page = max(0, min(page, page_count - 1))
+        
+        self.prev_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= page_count - 1
+        
+        embed = self.music_player.render_queue_page(guild_id, self.page)
+        await interaction.response.edit_message(embed=embed, view=self)
+    
+    async def prev_callback(self, interaction: discord.Interaction):
+        """Előző oldal gomb callback"""
+        await self.show_page(interaction, self.page - 1)
+    
+    async def next_callback(self, interaction: discord.Interaction):
+        """Következő oldal gomb callback"""
+        await self.show_page(interaction, self.page + 1)
+    
+    async def jump_callback(self, interaction: discord.Interaction):
+        """Ugrás gomb callback - oldalszám bekérése"""
+        await interaction.response.send_modal(QueueJumpModal(self))
 
 class MusicCommands(app_commands.Group):
     def __init__(self, bot):
@@ -250,7 +288,7 @@ class MusicCommands(app_commands.Group):
     @app_commands.command(name="queue", description="Várólista megjelenítése")
     async def queue(self, interaction: discord.Interaction):
         """Várólista megjelenítése"""
-        await self.music_player.show_queue(interaction)
+        await self.music_player.show_queue(interaction, QueueView(self.music_player))
     
     @app_commands.command(name="nowplaying", description="Aktuális szám")
     async def nowplaying(self, interaction: discord.Interaction):
@@ -269,51 +307,59 @@ class MusicCommands(app_commands.Group):
             
             embed = discord.Embed(
                 title="🎵 Most játszik",
-                description=f"**{now_playing['title']}**",
+                description=f"**{now_playing.title}**",
                 color=0x0099ff
             )
             
-            if now_playing.get('thumbnail'):
-                embed.set_thumbnail(url=now_playing['thumbnail'])
+            if now_playing.thumbnail:
+                embed.set_thumbnail(url=now_playing.thumbnail)
             
             # Előadó/Uploader információ
-            if now_playing.get('artist'):
+            if now_playing.artist:
                 embed.add_field(
                     name="👤 Előadó",
-                    value=now_playing['artist'],
+                    value=now_playing.artist,
                     inline=True
                 )
-            elif now_playing.get('uploader'):
+            elif now_playing.uploader:
                 embed.add_field(
                     name="👤 Feltöltő",
-                    value=now_playing['uploader'],
+                    value=now_playing.uploader,
                     inline=True
                 )
             
             # Album információ (Spotify esetén)
-            if now_playing.get('album'):
+            if now_playing.album:
                 embed.add_field(
                     name="💿 Album",
-                    value=now_playing['album'],
+                    value=now_playing.album,
                     inline=True
                 )
             
-            if now_playing.get('duration'):
-                duration = f"{now_playing['duration']//60}:{now_playing['duration']%60:02d}"
+            if now_playing.duration:
+                duration = f"{now_playing.duration//60}:{now_playing.duration%60:02d}"
                 embed.add_field(
                     name="⏱️ Hossz",
                     value=duration,
                     inline=True
                 )
             
+            position = self.music_player.playback_position(guild_id)
+            if position is not None:
+                embed.add_field(
+                    name="▶️ Pozíció",
+                    value=format_timestamp(position),
+                    inline=True
+                )
+            
             embed.add_field(
                 name="👤 Kérte",
-                value=now_playing['requester'].mention,
+                value=now_playing.requester_mention,
                 inline=True
             )
             
             # Forrás típus
-            source_type = "🎵 Spotify" if 'spotify' in str(now_playing.get('type', '')).lower() else "📺 YouTube"
+            source_type = "🎵 Spotify" if now_playing.is_spotify else "📺 YouTube"
             embed.add_field(
                 name="🔗 Forrás",
                 value=source_type,
@@ -321,10 +367,10 @@ class MusicCommands(app_commands.Group):
             )
             
             # Spotify link megjelenítése (ha van)
-            if now_playing.get('spotify_url'):
+            if now_playing.spotify_url:
                 embed.add_field(
                     name="🎵 Spotify Link",
-                    value=f"[Nyisd meg Spotify-on]({now_playing['spotify_url']})",
+                    value=f"[Nyisd meg Spotify-on]({now_playing.spotify_url})",
                     inline=False
                 )
             
@@ -372,6 +418,46 @@ class MusicCommands(app_commands.Group):
         """Várólista törlése"""
         await self.music_player.clear_queue(interaction)
     
+    @app_commands.command(name="remove", description="Szám eltávolítása a várólistából")
+    @app_commands.describe(position="Pozíció a várólistában (1-től)")
+    async def remove(self, interaction: discord.Interaction, position: int):
+        """Szám eltávolítása a várólistából"""
+        await self.music_player.remove_track(interaction, position)
+    
+    @app_commands.command(name="move", description="Szám áthelyezése a várólistában")
+    @app_commands.describe(source="Jelenlegi pozíció", destination="Új pozíció")
+    async def move(self, interaction: discord.Interaction, source: int, destination: int):
+        """Szám áthelyezése a várólistában"""
+        await self.music_player.move_track(interaction, source, destination)
+    
+    @app_commands.command(name="skipto", description="Ugrás a várólista adott pozíciójára")
+    @app_commands.describe(position="Pozíció a várólistában (1-től)")
+    async def skipto(self, interaction: discord.Interaction, position: int):
+        """Ugrás a várólista adott pozíciójára"""
+        await self.music_player.skip_to(interaction, position)
+    
+    @app_commands.command(name="seek", description="Tekerés a jelenlegi számban")
+    @app_commands.describe(position="Pozíció (pl. 1:30 vagy 90)")
+    async def seek(self, interaction: discord.Interaction, position: str):
+        """Tekerés a jelenlegi számban"""
+        await self.music_player.seek(interaction, position)
+    
+    @app_commands.command(name="dedup", description="Duplikátumok kezelése a várólistán")
+    @app_commands.describe(mode="allow: engedve, skip: kihagyva, collapse: összevonva")
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="allow - duplikátumok engedve", value="allow"),
+        app_commands.Choice(name="skip - duplikátumok kihagyva", value="skip"),
+        app_commands.Choice(name="collapse - duplikátumok összevonva", value="collapse")
+    ])
+    async def dedup(self, interaction: discord.Interaction, mode: app_commands.Choice[str]):
+        """Duplikátumok kezelése a várólistán"""
+        await self.music_player.set_dedup_mode(interaction, mode.value)
+    
+    @app_commands.command(name="stats", description="Teljesítmény statisztikák")
+    async def stats(self, interaction: discord.Interaction):
+        """Teljesítmény statisztikák"""
+        await self.music_player.show_stats(interaction)
+    
     @app_commands.command(name="controls", description="Zene vezérlő gombok megjelenítése")
     async def controls(self, interaction: discord.Interaction):
         """Zene vezérlő gombok megjelenítése"""
@@ -438,7 +524,13 @@ class HelpCommands(app_commands.Group):
             value=(
                 "`/music queue` - Várólista megjelenítése\n"
                 "`/music nowplaying` - Aktuális szám\n"
-                "`/music clear` - Várólista törlése"
+                "`/music clear` - Várólista törlése\n"
+                "`/music remove <pozíció>` - Szám eltávolítása\n"
+                "`/music move <honnan> <hová>` - Szám áthelyezése\n"
+                "`/music skipto <pozíció>` - Ugrás a várólistában\n"
+                "`/music seek <pozíció>` - Tekerés a számban\n"
+                "`/music dedup <mód>` - Duplikátumok kezelése\n"
+                "`/music stats` - Teljesítmény statisztikák"
             ),
             inline=False
         )
@@ -485,5 +577,7 @@ class HelpCommands(app_commands.Group):
 
 def setup(bot):
     """Bot parancsok betöltése"""
-    bot.tree.add_command(MusicCommands(bot))
+    music_commands = MusicCommands(bot)
+    bot.music_player = music_commands.music_player  # leállításkor a bot zárja le
+    bot.tree.add_command(music_commands)
     bot.tree.add_command(HelpCommands(bot))
@@ -1,21 +1,58 @@
 import discord
 import asyncio
-import yt_dlp
 import os
-import subprocess
 import re
+import time
 from collections import deque
-from typing import Optional, Dict, List
-from config import SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, COLORS
+from itertools import islice
+from typing import Optional, Dict, List, AsyncIterator, Callable, Tuple
+from config import (
+    SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, SPOTIFY_API_BASE, SPOTIFY_TOKEN_URL, SPOTIFY_MAX_CONNECTIONS, COLORS,
+    DEFAULT_VOLUME, DEDUP_MODE,
+    RESOLVER_WORKERS, RESOLVER_PER_GUILD_LIMIT,
+    RESOLVER_CACHE_PATH, RESOLVER_CACHE_MAX_ENTRIES, STREAM_URL_TTL, STREAM_URL_REFRESH_MARGIN,
+    SPOTIFY_MATCH_MIN_CONFIDENCE, SPOTIFY_MATCH_CANDIDATES,
+    PLAYBACK_MAX_ATTEMPTS, PLAYBACK_RETRY_BACKOFF, MAX_CONSECUTIVE_SKIPS,
+    PREFETCH_COUNT, STREAM_START_TIMEOUT, QUEUE_PAGE_SIZE, GAPLESS_PLAYBACK, GAPLESS_PRESPAWN_SECONDS, GAPLESS_READAHEAD_FRAMES, CROSSFADE_SECONDS,
+    OPUS_PASSTHROUGH, OPUS_BITRATE, AUDIO_CACHE_ENABLED, AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_MB, AUDIO_CACHE_MIN_PLAYS,
+    AUDIO_CACHE_MAX_DURATION, AUDIO_CACHE_BITRATE, SHARED_STREAMS, SHARED_STREAM_TOLERANCE, FFMPEG_EXECUTABLE, MAX_QUEUE_SIZE, MAX_PLAYLIST_SIZE, MAX_USER_QUEUE_SIZE, MAX_TOTAL_QUEUE_SIZE,
+    MAX_QUEUE_MEMORY_MB,
+    SPOTIFY_CACHE_PATH, SPOTIFY_CACHE_TTL, SPOTIFY_CACHE_MAX_ENTRIES, SPOTIFY_CACHE_MEMORY_MB, SPOTIFY_SNAPSHOT_RECHECK
+)
+from audio_sources import (
+    ReadAheadSource, GaplessSource, OggOpusFileSource, RecordingOpusAudio, SharedStream, SharedStreamReader,
+    FRAMES_PER_SECOND
+)
+from audio_cache import AudioCache
+from ffmpeg_caps import probe_ffmpeg
+from spotify_client import SpotifyClient
+from spotify_cache import SpotifyCache
+from resolver import ResolverPool, YoutubeDLPool, TrackUnavailable, is_unavailable_error
+from guild_actor import GuildActor, serialized
+from resolution_cache import ResolutionCache, stream_url_expiry, is_opus_stream
+from track import Track
+from track_queue import TrackQueue, QueueUsage
+from matcher import match_confidence, rank_candidates
+
+def parse_timestamp(text: str) -> Optional[int]:
+    """Pozíció értelmezése másodpercre: 90, 1:30 vagy 1:02:03"""
+    parts = text.strip().split(':')
+    if not 1 <= len(parts) <= 3 or not all(part.isdigit() for part in parts):
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def format_timestamp(seconds: int) -> str:
+    """Másodpercek m:ss / h:mm:ss alakban"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
 
-# Spotify támogatás
-try:
-    import spotipy
-    from spotipy.oauth2 import SpotifyClientCredentials
-    SPOTIFY_AVAILABLE = True
-except ImportError:
-    SPOTIFY_AVAILABLE = False
-    print("⚠️ Spotify támogatás nem elérhető. Telepítsd: pip install spotipy")
 
 class MusicPlayer:
     def __init__(self, bot):
@@ -24,19 +61,82 @@ class MusicPlayer:
         self.queues = {}
         self.now_playing = {}
         
+        # yt-dlp kinyerések külön szálkészletben futnak
+        self.resolver = ResolverPool(RESOLVER_WORKERS, RESOLVER_PER_GUILD_LIMIT)
+        
+        # Keresési eredmények perzisztens gyorsítótára
+        self.resolution_cache = ResolutionCache(
+            RESOLVER_CACHE_PATH,
+            max_entries=RESOLVER_CACHE_MAX_ENTRIES,
+            stream_ttl=STREAM_URL_TTL,
+            refresh_margin=STREAM_URL_REFRESH_MARGIN
+        )
+        
+        # Előre feloldás alatt álló várólista elemek: guild_id -> {id(elem): (elem, task)}
+        self.prefetch_tasks = {}
+        
+        # Az actoron kívül futó számindítás (feloldás + FFmpeg): guild_id -> task
+        self.start_tasks = {}
+        
+        # Szünetmentes váltás: aktuális forrás és az előre elindított következő FFmpeg
+        self.gapless_sources = {}
+        self.prepared_sources = {}  # guild_id -> (elem, ReadAheadSource)
+        self.prepare_tasks = {}  # guild_id -> a következő szám forrását indító task
+        self.track_ended_at = {}
+        self.transition_gaps = deque(maxlen=200)  # (szünet ms, szünetmentes volt-e)
+        
+        # Szerverek között megosztott FFmpeg streamek: (azonosító, kimenet, hangerő) -> SharedStream
+        self.shared_streams = {}
+        
+        # Lejátszhatatlan, kihagyott számok címei (összevont értesítéshez): guild_id -> [cím]
+        self.skipped_tracks = {}
+        
+        # Szerverenkénti actor: a lejátszási állapot minden módosítása ezen keresztül, sorban fut
+        self.actors = {}
+        
+        # Várólista generáció szerverenként - leállításkor/törléskor nő, a futó betöltések ebből látják, hogy abba kell hagyni
+        self.queue_generations = {}
+        
+        # Az összes szerver várólistájának közös számlálója (globális korlátok)
+        self.queue_usage = QueueUsage()
+        
+        # Duplikátum kezelés szerverenként: 'allow', 'skip' vagy 'collapse'
+        self.dedup_modes = {}
+        
+        # Hangerő szerverenként (0.0 - 2.0) - számváltáskor és újracsatlakozáskor is megmarad
+        self.volumes = {}
+        
+        # Megjelenített várólista oldalak: guild_id -> (várólista állapot, {oldal: embed})
+        self.queue_pages = {}
+        
         # Spotify API inicializálása
         self.spotify = None
-        if SPOTIFY_AVAILABLE and SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET:
-            try:
-                client_credentials_manager = SpotifyClientCredentials(
-                    client_id=SPOTIFY_CLIENT_ID,
-                    client_secret=SPOTIFY_CLIENT_SECRET
-                )
-                self.spotify = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
-                print("✅ Spotify API sikeresen inicializálva!")
-            except Exception as e:
-                print(f"❌ Spotify API inicializálási hiba: {e}")
-                self.spotify = None
+        if SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET:
+            # Aszinkron kliens: közös HTTP kapcsolatkészlet, token újrahasznosítás, 429 kezelés
+            self.spotify = SpotifyClient(
+                SPOTIFY_CLIENT_ID,
+                SPOTIFY_CLIENT_SECRET,
+                api_base=SPOTIFY_API_BASE,
+                token_url=SPOTIFY_TOKEN_URL,
+                max_connections=SPOTIFY_MAX_CONNECTIONS
+            )
+            print("✅ Spotify API sikeresen inicializálva!")
+        
+        # Spotify entitások gyorsítótára (track / album / playlist azonosító alapján)
+        self.spotify_cache = SpotifyCache(
+            SPOTIFY_CACHE_PATH,
+            ttl=SPOTIFY_CACHE_TTL,
+            max_entries=SPOTIFY_CACHE_MAX_ENTRIES,
+            memory_bytes=SPOTIFY_CACHE_MEMORY_MB * 1024 * 1024
+        )
+        
+        # Gyakran játszott számok helyi Ogg/Opus másolata
+        self.audio_cache = AudioCache(
+            AUDIO_CACHE_DIR,
+            max_bytes=AUDIO_CACHE_MAX_MB * 1024 * 1024,
+            min_plays=AUDIO_CACHE_MIN_PLAYS,
+            bitrate=AUDIO_CACHE_BITRATE
+        ) if AUDIO_CACHE_ENABLED else None
         
         # yt-dlp beállítások DRM védett videók kiszűrésére
         self.ydl_opts = {
@@ -61,21 +161,78 @@ class MusicPlayer:
             }
         }
         
+        # YoutubeDL példányok profilonként, keresésenként újrahasznosítva
+        search_opts = self.ydl_opts.copy()
+        search_opts.update({
+            'format': 'bestaudio[ext=mp3]/bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best',
+            'audioquality': '0',  # Legjobb minőség
+            # DRM ellenőrzés eltávolítva - minden videó támogatott
+            'extractor_args': {
+                'youtube': {
+                    'skip': ['live'],  # Csak élő adásokat hagyunk ki
+                }
+            }
+        })
+        # DRM hiba esetén: bármilyen formátum, audió kivonás nélkül
+        fallback_opts = search_opts.copy()
+        fallback_opts.update({
+            'format': 'bestaudio/best',
+            'extractaudio': False
+        })
+        # Lapos keresés: csak metaadatok, formátum feloldás nélkül
+        flat_opts = self.ydl_opts.copy()
+        flat_opts.update({
+            'extract_flat': 'in_playlist',
+            'noplaylist': False
+        })
+        self.ydl_pool = YoutubeDLPool({
+            'search': search_opts,
+            'fallback': fallback_opts,
+            'flat': flat_opts
+        }, size=RESOLVER_WORKERS)
+        
         # FFmpeg beállítások
         self.ffmpeg_options = {
             'options': '-vn',
             'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'
         }
+        
+        # FFmpeg felderítése egyszer, induláskor
+        self.ffmpeg = probe_ffmpeg(FFMPEG_EXECUTABLE)
+        if self.ffmpeg.available:
+            print(f"✅ FFmpeg {self.ffmpeg.version} ({self.ffmpeg.path})")
+        else:
+            print("⚠️ FFmpeg nem található! A zene lejátszáshoz telepítsd az FFmpeg-et.")
+    
+    async def close(self):
+        """Erőforrások felszabadítása leállításkor"""
+        for actor in self.actors.values():
+            actor.stop()
+        self.actors.clear()
+        for guild_id in list(self.start_tasks):
+            self.cancel_start(guild_id)
+        for task in self.prepare_tasks.values():
+            task.cancel()
+        self.prepare_tasks.clear()
+        if self.spotify:
+            await self.spotify.close()
+        self.resolver.shutdown()
+        self.ydl_pool.close()
+        self.resolution_cache.close()
+        self.spotify_cache.close()
+        if self.audio_cache:
+            await self.audio_cache.close()
+    
+    async def reprobe_ffmpeg(self):
+        """FFmpeg újbóli felderítése (háttérszálon, pl. indítási hiba után)"""
+        self.ffmpeg = await asyncio.to_thread(probe_ffmpeg, FFMPEG_EXECUTABLE)
     
     async def check_ffmpeg(self) -> bool:
         """FFmpeg telepítés ellenőrzése"""
-        try:
-            # Próbáljuk meg megtalálni az FFmpeg-et
-            result = subprocess.run(['ffmpeg', '-version'], 
-                                  capture_output=True, text=True, timeout=5)
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-            return False
+        # Ha induláskor nem volt meg, megnézzük, azóta telepítették-e
+        if not self.ffmpeg.available:
+            await self.reprobe_ffmpeg()
+        return self.ffmpeg.available
     
     async def join_voice_channel(self, interaction: discord.Interaction) -> bool:
         """Csatlakozás a hangcsatornához"""
@@ -106,7 +263,7 @@ class MusicPlayer:
             
             voice_client = await voice_channel.connect()
             self.voice_clients[interaction.guild.id] = voice_client
-            self.queues[interaction.guild.id] = deque()
+            self.queues[interaction.guild.id] = TrackQueue(usage=self.queue_usage)
             self.now_playing[interaction.guild.id] = None
             
             embed = discord.Embed(
@@ -126,6 +283,7 @@ class MusicPlayer:
             await interaction.response.send_message(embed=embed)
             return False
     
+    @serialized
     async def leave_voice_channel(self, interaction: discord.Interaction) -> bool:
         """Kilépés a hangcsatornából"""
         guild_id = interaction.guild.id
@@ -143,10 +301,21 @@ class MusicPlayer:
             voice_client = self.voice_clients[guild_id]
             await voice_client.disconnect()
             
-            # Adatok törlése
+            # Adatok törlése - az actor a folyamatban lévő parancs után áll le
+            actor = self.actors.pop(guild_id, None)
+            if actor is not None:
+                actor.tell(actor.stop)
+            self.cancel_prefetch(guild_id)
+            self.cancel_start(guild_id)
+            self.discard_prepared(guild_id)
+            self.gapless_sources.pop(guild_id, None)
             del self.voice_clients[guild_id]
+            self.queues[guild_id].clear()  # A globális számlálók miatt
             del self.queues[guild_id]
             del self.now_playing[guild_id]
+            self.queue_pages.pop(guild_id, None)
+            self.skipped_tracks.pop(guild_id, None)
+            self.bump_generation(guild_id)
             
             embed = discord.Embed(
                 title="👋 Kilépés!",
@@ -192,27 +361,141 @@ class MusicPlayer:
                 return await self.get_spotify_info(query)
             
             # Ha nem URL, keressük meg
-            results = self.spotify.search(q=query, type='track', limit=1)
+            results = await self.spotify.search(q=query, type='track', limit=1)
             
             if not results['tracks']['items']:
                 return None
             
-            track = results['tracks']['items'][0]
-            
-            return {
-                'title': track['name'],
-                'artist': track['artists'][0]['name'] if track['artists'] else 'Ismeretlen előadó',
-                'album': track['album']['name'] if track['album'] else 'Ismeretlen album',
-                'duration': track['duration_ms'] // 1000,  # milliszekundum -> másodperc
-                'thumbnail': track['album']['images'][0]['url'] if track['album']['images'] else None,
-                'spotify_url': track['external_urls']['spotify'],
-                'type': 'spotify_track'
-            }
+            return self._spotify_track_info(results['tracks']['items'][0])
             
         except Exception as e:
             print(f"Hiba a Spotify keresés során: {e}")
             return None
     
+    def _spotify_track_info(self, track: Dict, album: Optional[Dict] = None, track_type: str = 'spotify_track') -> Dict:
+        """Spotify track JSON átalakítása a bot formátumára"""
+        # Album számainál (egyszerűsített track) az album adatait a hívó adja
+        album = album or track.get('album') or {}
+        return {
+            'title': track['name'],
+            'artist': track['artists'][0]['name'] if track['artists'] else 'Ismeretlen előadó',
+            'album': album.get('name') or 'Ismeretlen album',
+            'duration': track['duration_ms'] // 1000,
+            'thumbnail': album['images'][0]['url'] if album.get('images') else None,
+            'spotify_url': (track.get('external_urls') or {}).get('spotify'),
+            'spotify_id': track.get('id'),
+            'isrc': (track.get('external_ids') or {}).get('isrc'),
+            'type': track_type
+        }
+    
+    async def get_spotify_collection(self, url: str) -> Optional[Dict]:
+        """Spotify playlist/album fejléc adatai (gyorsítótárból, ha a tartalom nem változott)"""
+        if self.is_spotify_playlist(url):
+            playlist_id = url.split('playlist/')[-1].split('?')[0]
+            cached = await asyncio.to_thread(self.spotify_cache.get, 'playlist', playlist_id)
+            
+            # Frissen ellenőrzött playlist: API hívás nélkül kiszolgáljuk
+            if cached and time.time() - cached[2] < SPOTIFY_SNAPSHOT_RECHECK:
+                return dict(cached[0])
+            
+            playlist_info = await self.spotify.playlist(
+                playlist_id,
+                fields='id,name,description,images,external_urls,snapshot_id,tracks.total'
+            )
+            
+            # Változatlan snapshot_id: a számlistát nem kell újra letölteni
+            if cached and cached[1] and cached[1] == playlist_info.get('snapshot_id'):
+                await asyncio.to_thread(self.spotify_cache.touch, 'playlist', playlist_id)
+                return dict(cached[0])
+            
+            return {
+                'id': playlist_id,
+                'title': f"Playlist: {playlist_info['name']}",
+                'album': playlist_info.get('description') or 'Nincs leírás',
+                'thumbnail': playlist_info['images'][0]['url'] if playlist_info.get('images') else None,
+                'spotify_url': playlist_info['external_urls']['spotify'],
+                'type': 'spotify_playlist',
+                'total': playlist_info['tracks']['total'],
+                'snapshot_id': playlist_info.get('snapshot_id'),
+                'playlist_name': playlist_info['name']
+            }
+        
+        if self.is_spotify_album(url):
+            album_id = url.split('album/')[-1].split('?')[0]
+            
+            # Az album tartalma nem változik, a TTL-en belül mindig a gyorsítótárból jön
+            cached = await asyncio.to_thread(self.spotify_cache.get, 'album', album_id)
+            if cached:
+                return dict(cached[0])
+            
+            album_info = await self.spotify.album(album_id)
+            return {
+                'id': album_id,
+                'title': f"Album: {album_info['name']}",
+                'artist': album_info['artists'][0]['name'] if album_info['artists'] else 'Ismeretlen előadó',
+                'album': album_info['name'],
+                'thumbnail': album_info['images'][0]['url'] if album_info['images'] else None,
+                'spotify_url': album_info['external_urls']['spotify'],
+                'type': 'spotify_album',
+                'total': album_info['tracks']['total'],
+                'album_name': album_info['name'],
+                # Az album válasz már tartalmazza a számok első oldalát
+                'first_page': album_info['tracks'],
+                'album_images': album_info['images']
+            }
+        
+        return None
+    
+    async def iter_spotify_tracks(self, collection: Dict) -> AsyncIterator[List[Dict]]:
+        """Spotify playlist/album számai oldalanként, ahogy megérkeznek
+
+        Minden oldal a továbblapozás előtt a gyorsítótárba kerül (a folytatás URL-jével), mert a betöltést
+        a korlátok vagy egy leállítás bármikor félbeszakíthatják - a következő betöltés innen folytatja.
+        """
+        playlist = collection['type'] == 'spotify_playlist'
+        track_type = 'spotify_playlist_track' if playlist else 'spotify_album_track'
+        album = None if playlist else {'name': collection['album_name'], 'images': collection.get('album_images') or []}
+        
+        # Gyorsítótárból: a már letöltött számokat csak oldalakra bontjuk
+        all_tracks = list(collection.get('tracks') or [])
+        for i in range(0, len(all_tracks), 100):
+            yield all_tracks[i:i + 100]
+        
+        if 'tracks' in collection:
+            # Részleges bejegyzés: a hiányzó oldalak letöltése onnan, ahol abbamaradt
+            if not collection.get('next'):
+                return
+            page = await self.spotify.next(collection)
+        elif playlist:
+            page = await self.spotify.playlist_items(collection['id'], limit=100, additional_types=('track',))
+        else:
+            page = collection['first_page']
+        
+        header = {key: value for key, value in collection.items() if key not in ('first_page', 'tracks', 'next')}
+        while page:
+            tracks = []
+            for item in page['items']:
+                # Playlist elemeknél a track egy szinttel lejjebb van
+                track = item.get('track') if playlist else item
+                # Törölt számok és podcast epizódok kihagyása
+                if track and track.get('type', 'track') == 'track':
+                    tracks.append(self._spotify_track_info(track, album, track_type))
+            all_tracks.extend(tracks)
+            
+            # 'next' jelzi a részleges bejegyzést (None, ha a lista végigért)
+            entry = dict(header, tracks=list(all_tracks), next=page.get('next'))
+            if playlist:
+                await asyncio.to_thread(
+                    self.spotify_cache.put, 'playlist', collection['id'], entry, collection.get('snapshot_id')
+                )
+            else:
+                await asyncio.to_thread(self.spotify_cache.put, 'album', collection['id'], entry)
+            yield tracks
+            
+            if not page.get('next'):
+                break
+            page = await self.spotify.next(page)
+    
     async def get_spotify_info(self, url: str) -> Optional[Dict]:
         """Spotify URL információ kinyerése"""
         if not self.spotify:
@@ -222,85 +505,14 @@ class MusicPlayer:
             if self.is_spotify_track(url):
                 # Track információ
                 track_id = url.split('track/')[-1].split('?')[0]
-                track = self.spotify.track(track_id)
+                cached = await asyncio.to_thread(self.spotify_cache.get, 'track', track_id)
+                if cached:
+                    return dict(cached[0])
                 
-                return {
-                    'title': track['name'],
-                    'artist': track['artists'][0]['name'] if track['artists'] else 'Ismeretlen előadó',
-                    'album': track['album']['name'] if track['album'] else 'Ismeretlen album',
-                    'duration': track['duration_ms'] // 1000,
-                    'thumbnail': track['album']['images'][0]['url'] if track['album']['images'] else None,
-                    'spotify_url': track['external_urls']['spotify'],
-                    'type': 'spotify_track'
-                }
-            
-            elif self.is_spotify_playlist(url):
-                # Playlist összes számának információja
-                playlist_id = url.split('playlist/')[-1].split('?')[0]
-                playlist_info = self.spotify.playlist(playlist_id)
-                playlist_tracks = self.spotify.playlist_tracks(playlist_id, limit=50)  # Maximum 50 szám
-                
-                if not playlist_tracks['items']:
-                    return None
-                
-                tracks = []
-                for item in playlist_tracks['items']:
-                    if item['track']:
-                        track = item['track']
-                        tracks.append({
-                            'title': track['name'],
-                            'artist': track['artists'][0]['name'] if track['artists'] else 'Ismeretlen előadó',
-                            'album': track['album']['name'] if track['album'] else 'Ismeretlen album',
-                            'duration': track['duration_ms'] // 1000,
-                            'thumbnail': track['album']['images'][0]['url'] if track['album']['images'] else None,
-                            'spotify_url': track['external_urls']['spotify'],
-                            'type': 'spotify_playlist_track'
-                        })
-                
-                return {
-                    'title': f"Playlist: {playlist_info['name']}",
-                    'artist': f"{len(tracks)} szám",
-                    'album': playlist_info.get('description', 'Nincs leírás'),
-                    'duration': sum(track['duration'] for track in tracks),
-                    'thumbnail': playlist_info['images'][0]['url'] if playlist_info['images'] else None,
-                    'spotify_url': playlist_info['external_urls']['spotify'],
-                    'type': 'spotify_playlist',
-                    'tracks': tracks,
-                    'playlist_name': playlist_info['name']
-                }
-            
-            elif self.is_spotify_album(url):
-                # Album összes számának információja
-                album_id = url.split('album/')[-1].split('?')[0]
-                album_info = self.spotify.album(album_id)
-                album_tracks = self.spotify.album_tracks(album_id)
-                
-                if not album_tracks['items']:
-                    return None
-                
-                tracks = []
-                for track in album_tracks['items']:
-                    tracks.append({
-                        'title': track['name'],
-                        'artist': track['artists'][0]['name'] if track['artists'] else 'Ismeretlen előadó',
-                        'album': album_info['name'],
-                        'duration': track['duration_ms'] // 1000,
-                        'thumbnail': album_info['images'][0]['url'] if album_info['images'] else None,
-                        'spotify_url': track['external_urls']['spotify'],
-                        'type': 'spotify_album_track'
-                    })
-                
-                return {
-                    'title': f"Album: {album_info['name']}",
-                    'artist': album_info['artists'][0]['name'] if album_info['artists'] else 'Ismeretlen előadó',
-                    'album': album_info['name'],
-                    'duration': sum(track['duration'] for track in tracks),
-                    'thumbnail': album_info['images'][0]['url'] if album_info['images'] else None,
-                    'spotify_url': album_info['external_urls']['spotify'],
-                    'type': 'spotify_album',
-                    'tracks': tracks,
-                    'album_name': album_info['name']
-                }
+                track = await self.spotify.track(track_id)
+                track_info = self._spotify_track_info(track)
+                await asyncio.to_thread(self.spotify_cache.put, 'track', track_id, track_info)
+                return track_info
             
             return None
             
@@ -308,109 +520,165 @@ class MusicPlayer:
             print(f"Hiba a Spotify információ kinyerése során: {e}")
             return None
     
-    async def search_youtube(self, query: str) -> Optional[Dict]:
+    async def search_youtube(self, query: str, guild_id: Optional[int] = None) -> Optional[Dict]:
         """YouTube keresés - minden fajta zene támogatott, kivéve élő adások"""
+        # Az SQLite hívások sem futnak az event loopon
+        cached, fresh = await asyncio.to_thread(self.resolution_cache.lookup, query)
+        if cached and fresh:
+            return cached
+        
+        # Ismert videó lejárt stream URL-lel: keresés helyett csak a videót oldjuk fel újra
+        lookup = cached['webpage_url'] if cached and cached.get('webpage_url') else query
+        
+        # A yt-dlp blokkoló, ezért a resolver worker szálakon fut
+        result = await self.resolver.run(guild_id, self._extract_youtube, lookup)
+        if result:
+            await asyncio.to_thread(self.resolution_cache.store, query, result)
+        return result
+    
+    async def search_youtube_flat(self, query: str, guild_id: Optional[int] = None) -> Optional[Dict]:
+        """Olcsó keresés a várólistához: csak a videó azonosítója és metaadatai, stream URL nélkül"""
+        cached, fresh = await asyncio.to_thread(self.resolution_cache.lookup, query)
+        if cached:
+            return cached
+        
+        candidates = await self.resolver.run(guild_id, self._search_candidates, query, 1)
+        if not candidates:
+            return None
+        
+        video = candidates[0]
+        result = {
+            'id': video['id'],
+            'title': video.get('title') or 'Ismeretlen cím',
+            'duration': video.get('duration', 0),
+            'url': None,
+            'thumbnail': video.get('thumbnail'),
+            'webpage_url': f"https://www.youtube.com/watch?v={video['id']}",
+            'uploader': video.get('uploader') or video.get('channel') or 'Ismeretlen feltöltő',
+            'type': 'youtube'
+        }
+        await asyncio.to_thread(self.resolution_cache.store, query, result)
+        return result
+    
+    async def resolve_spotify_track(self, guild_id: Optional[int], title: str, artist: str, duration: int,
+                                    spotify_id: Optional[str] = None, isrc: Optional[str] = None) -> Optional[Dict]:
+        """Spotify szám YouTube megfelelője: először a mentett párosítás, csak utána keresés"""
+        artist = artist or ''
+        duration = duration or 0
+        
+        match = await asyncio.to_thread(self.resolution_cache.get_match, spotify_id, isrc)
+        if match and match[1] >= SPOTIFY_MATCH_MIN_CONFIDENCE:
+            try:
+                result = await self.search_youtube(f"https://www.youtube.com/watch?v={match[0]}", guild_id)
+            except TrackUnavailable:
+                # A mentett videót azóta törölték - új párosítást keresünk
+                result = None
+            if result:
+                return result
+        
+        # Több találat csak metaadatokkal, a teljes feloldás csak a győztesre fut
+        search_query = f"{artist} {title}"
+        candidates = await self.resolver.run(guild_id, self._search_candidates, search_query, SPOTIFY_MATCH_CANDIDATES)
+        for confidence, candidate in rank_candidates(title, artist, duration, candidates or []):
+            try:
+                result = await self.search_youtube(f"https://www.youtube.com/watch?v={candidate['id']}", guild_id)
+            except TrackUnavailable:
+                continue
+            if result:
+                await asyncio.to_thread(self.resolution_cache.store_match, spotify_id, isrc, candidate['id'], confidence)
+                return result
+        
+        # Ha a lapos keresés nem adott használható találatot, a régi módon keresünk
         try:
-            # Speciális yt-dlp beállítások a jobb kompatibilitáshoz
-            search_opts = self.ydl_opts.copy()
-            search_opts.update({
-                'format': 'bestaudio[ext=mp3]/bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best',
-                'extractaudio': True,
-                'audioformat': 'mp3',
-                'audioquality': '0',  # Legjobb minőség
-                'nocheckcertificate': True,
-                'ignoreerrors': False,
-                'quiet': True,
-                'no_warnings': True,
-                'default_search': 'auto',
-                'source_address': '0.0.0.0',
-                # DRM ellenőrzés eltávolítva - minden videó támogatott
-                'extractor_args': {
-                    'youtube': {
-                        'skip': ['live'],  # Csak élő adásokat hagyunk ki
-                    }
-                }
+            result = await self.search_youtube(search_query, guild_id)
+        except TrackUnavailable:
+            return None
+        if result and result.get('id'):
+            confidence = match_confidence(title, artist, duration, result)
+            await asyncio.to_thread(self.resolution_cache.store_match, spotify_id, isrc, result['id'], confidence)
+        return result
+    
+    def _search_candidates(self, query: str, count: int) -> List[Dict]:
+        """Az első `count` YouTube találat metaadatai formátum feloldás nélkül (blokkoló)"""
+        try:
+            with self.ydl_pool.checkout('flat') as ydl:
+                info = ydl.extract_info(f"ytsearch{count}:{query}", download=False)
+        except Exception as e:
+            print(f"Hiba a YouTube keresés során: {e}")
+            return []
+        
+        candidates = []
+        for entry in (info or {}).get('entries') or []:
+            if not entry or not entry.get('id'):
+                continue
+            # Élő adások nem támogatottak
+            if entry.get('live_status') in ('is_live', 'is_upcoming') or entry.get('is_live'):
+                continue
+            candidates.append({
+                'id': entry['id'],
+                'title': entry.get('title'),
+                'duration': int(entry.get('duration') or 0),
+                'uploader': entry.get('uploader'),
+                'channel': entry.get('channel'),
+                'thumbnail': (entry.get('thumbnails') or [{}])[-1].get('url')
             })
-            
-            with yt_dlp.YoutubeDL(search_opts) as ydl:
-                try:
-                    # Próbáljuk meg a keresést
-                    if query.startswith(('http://', 'https://')):
-                        # Ha URL, közvetlenül próbáljuk meg
-                        info = ydl.extract_info(query, download=False)
-                        video = info
-                    else:
-                        # Ha keresési kifejezés, keressük meg
-                        info = ydl.extract_info(f"ytsearch:{query}", download=False)
-                        if not info or 'entries' not in info or not info['entries']:
-                            return None
-                        video = info['entries'][0]
-                    
-                    # Csak élő adásokat ellenőrizzük
-                    if video.get('is_live', False):
-                        return None  # Élő adások nem támogatottak
-                    
-                    # Ellenőrizzük, hogy a videó lejátszható-e
-                    if not video.get('url') and not video.get('webpage_url'):
-                        return None
-                    
-                    return {
-                        'title': video.get('title', 'Ismeretlen cím'),
-                        'duration': video.get('duration', 0),
-                        'url': video.get('url') or video.get('webpage_url'),
-                        'thumbnail': video.get('thumbnail'),
-                        'webpage_url': video.get('webpage_url'),
-                        'uploader': video.get('uploader', 'Ismeretlen feltöltő'),
-                        'type': 'youtube'
-                    }
-                    
-                except Exception as e:
-                    error_msg = str(e).lower()
-                    
-                    # Ha DRM hiba, próbáljuk meg alternatív formátumokkal
-                    if 'drm' in error_msg or 'protected' in error_msg:
-                        try:
-                            # Próbáljuk meg más formátumokkal
-                            alt_opts = search_opts.copy()
-                            alt_opts['format'] = 'bestaudio/best'
-                            alt_opts['extractaudio'] = False  # Ne próbáljuk meg kivonni az audiót
-                            
-                            with yt_dlp.YoutubeDL(alt_opts) as ydl2:
-                                if query.startswith(('http://', 'https://')):
-                                    info = ydl2.extract_info(query, download=False)
-                                    video = info
-                                else:
-                                    info = ydl2.extract_info(f"ytsearch:{query}", download=False)
-                                    if not info or 'entries' not in info or not info['entries']:
-                                        return None
-                                    video = info['entries'][0]
-                                
-                                if video.get('is_live', False):
-                                    return None
-                                
-                                if not video.get('url') and not video.get('webpage_url'):
-                                    return None
-                                
-                                return {
-                                    'title': video.get('title', 'Ismeretlen cím'),
-                                    'duration': video.get('duration', 0),
-                                    'url': video.get('url') or video.get('webpage_url'),
-                                    'thumbnail': video.get('thumbnail'),
-                                    'webpage_url': video.get('webpage_url'),
-                                    'uploader': video.get('uploader', 'Ismeretlen feltöltő'),
-                                    'type': 'youtube'
-                                }
-                        except:
-                            pass  # Ha ez sem működik, akkor tényleg nem lejátszható
-                    
-                    print(f"Hiba a YouTube keresés során: {e}")
+        return candidates
+    
+    def _extract_with(self, profile: str, query: str) -> Optional[Dict]:
+        """Egy videó feloldása a megadott profilú YoutubeDL példánnyal (blokkoló)"""
+        with self.ydl_pool.checkout(profile) as ydl:
+            if query.startswith(('http://', 'https://')):
+                # Ha URL, közvetlenül próbáljuk meg
+                video = ydl.extract_info(query, download=False)
+            else:
+                # Ha keresési kifejezés, keressük meg
+                info = ydl.extract_info(f"ytsearch:{query}", download=False)
+                if not info or 'entries' not in info or not info['entries']:
                     return None
-                    
+                video = info['entries'][0]
+        
+        # Csak élő adásokat ellenőrizzük
+        if not video or video.get('is_live', False):
+            return None  # Élő adások nem támogatottak
+        
+        # Ellenőrizzük, hogy a videó lejátszható-e
+        if not video.get('url') and not video.get('webpage_url'):
+            return None
+        
+        return {
+            'title': video.get('title', 'Ismeretlen cím'),
+            'duration': video.get('duration', 0),
+            'url': video.get('url') or video.get('webpage_url'),
+            'thumbnail': video.get('thumbnail'),
+            'webpage_url': video.get('webpage_url'),
+            'uploader': video.get('uploader', 'Ismeretlen feltöltő'),
+            'id': video.get('id'),
+            'type': 'youtube'
+        }
+    
+    def _extract_youtube(self, query: str) -> Optional[Dict]:
+        """YouTube információ kinyerése yt-dlp-vel (blokkoló, worker szálon fut)"""
+        try:
+            return self._extract_with('search', query)
         except Exception as e:
+            # Törölt / privát / letiltott videó: a hívó ne próbálja újra
+            if is_unavailable_error(e):
+                print(f"A videó nem elérhető: {query}: {e}")
+                raise TrackUnavailable(str(e)) from e
+            
+            error_msg = str(e).lower()
+            
+            # Ha DRM hiba, próbáljuk meg alternatív formátumokkal
+            if 'drm' in error_msg or 'protected' in error_msg:
+                try:
+                    return self._extract_with('fallback', query)
+                except Exception:
+                    pass  # Ha ez sem működik, akkor tényleg nem lejátszható
+            
             print(f"Hiba a YouTube keresés során: {e}")
             return None
     
-    async def search_music(self, query: str) -> Optional[Dict]:
+    async def search_music(self, query: str, guild_id: Optional[int] = None) -> Optional[Dict]:
         """Univerzális zene keresés - Spotify és YouTube"""
         # Ha Spotify URL és nincs Spotify API, egyértelmű hibaüzenet
         if self.is_spotify_url(query) and not self.spotify:
@@ -418,20 +686,30 @@ class MusicPlayer:
             return None
         
         # Először próbáljuk meg a Spotify-t
+        spotify_result = None
         if self.spotify and (self.is_spotify_url(query) or 'spotify' in query.lower()):
             spotify_result = await self.search_spotify(query)
             if spotify_result:
                 return spotify_result
 
         # Ha nem Spotify vagy nem találtunk semmit, próbáljuk meg a YouTube-ot
-        youtube_result = await self.search_youtube(query)
+        # Keresési kifejezésnél elég a lapos keresés, a stream URL lejátszáskor oldódik fel
+        if query.startswith(('http://', 'https://')):
+            try:
+                youtube_result = await self.search_youtube(query, guild_id)
+            except TrackUnavailable:
+                youtube_result = None
+        else:
+            youtube_result = await self.search_youtube_flat(query, guild_id)
         if youtube_result:
             return youtube_result
 
         # Ha Spotify eredményt találtunk, de YouTube-on nem, próbáljuk meg keresni az előadó + cím alapján
         if self.spotify and spotify_result:
-            search_query = f"{spotify_result['artist']} {spotify_result['title']}"
-            youtube_result = await self.search_youtube(search_query)
+            youtube_result = await self.resolve_spotify_track(
+                guild_id, spotify_result['title'], spotify_result['artist'], spotify_result.get('duration'),
+                spotify_result.get('spotify_id'), spotify_result.get('isrc')
+            )
             if youtube_result:
                 # Frissítjük a YouTube eredményt a Spotify információkkal
                 youtube_result.update({
@@ -442,6 +720,256 @@ class MusicPlayer:
 
         return None
     
+    def queue_limit(self, guild_id: int, user_id: int) -> Optional[str]:
+        """Melyik várólista korlát telt be (None, ha még fér új szám)"""
+        queue = self.queues[guild_id]
+        # Az összevont duplikátumok ismétlései is számítanak, különben az összevonás megkerülné a korlátokat
+        if queue.total_plays >= MAX_QUEUE_SIZE:
+            return 'queue'
+        if queue.user_count(user_id) >= MAX_USER_QUEUE_SIZE:
+            return 'user'
+        if self.queue_usage.count >= MAX_TOTAL_QUEUE_SIZE:
+            return 'global'
+        if self.queue_usage.memory >= MAX_QUEUE_MEMORY_MB * 1024 * 1024:
+            return 'memory'
+        return None
+    
+    def limit_message(self, reason: str) -> str:
+        """Felhasználóbarát magyarázat egy betelt korláthoz"""
+        return {
+            'playlist': f"Egy playlistből legfeljebb **{MAX_PLAYLIST_SIZE}** szám tölthető be.",
+            'queue': f"A várólista megtelt (legfeljebb **{MAX_QUEUE_SIZE}** szám).",
+            'user': f"Egy felhasználó legfeljebb **{MAX_USER_QUEUE_SIZE}** számot tehet a várólistára.",
+            'global': "A bot összes várólistája megtelt, próbáld újra később.",
+            'memory': "A bot várólistáinak memóriakorlátja betelt, próbáld újra később."
+        }[reason]
+    
+    def enqueue(self, guild_id: int, track: Track) -> str:
+        """Szám várólistára tétele a szerver duplikátum beállítása szerint (a korlátokat a hívó ellenőrzi előtte)
+
+        Visszatérés: 'added', 'skipped' (már a várólistán van) vagy 'collapsed'
+        (a meglévő elem még egyszer szól, újabb feloldás nélkül - a kérő korlátjaiba beszámít).
+        """
+        queue = self.queues[guild_id]
+        mode = self.dedup_modes.get(guild_id, DEDUP_MODE)
+        if mode != 'allow':
+            existing = queue.duplicate_of(track)
+            if existing is not None:
+                if mode == 'skip':
+                    return 'skipped'
+                queue.add_play(existing, track.requester_id)
+                return 'collapsed'
+        
+        queue.append(track)
+        return 'added'
+    
+    def pop_next(self, guild_id: int) -> Track:
+        """A várólista következő eleme - összevont duplikátum esetén az elem elöl marad"""
+        return self.queues[guild_id].pop_play()
+    
+    def bump_generation(self, guild_id: int):
+        """A folyamatban lévő playlist betöltések leállítása (leállítás, törlés, kilépés után)"""
+        self.queue_generations[guild_id] = self.queue_generations.get(guild_id, 0) + 1
+    
+    def _enqueue_track(self, guild, track: Track) -> Tuple[str, int]:
+        """Korlát ellenőrzés és várólistára tétel egy lépésben (az actorban fut)
+
+        Visszatérés: (állapot, pozíció) - az állapot 'gone' (közben kiléptünk), egy korlát neve,
+        vagy az enqueue eredménye.
+        """
+        queue = self.queues.get(guild.id)
+        if queue is None:
+            return 'gone', 0
+        limit_reason = self.queue_limit(guild.id, track.requester_id)
+        if limit_reason:
+            return limit_reason, 0
+        
+        status = self.enqueue(guild.id, track)
+        if status == 'added':
+            position = len(queue)
+        else:
+            # Összevonásnál / kihagyásnál a meglévő elem pozíciója számít
+            position = queue.index(queue.duplicate_of(track)) + 1
+        
+        if status != 'skipped':
+            if not self.now_playing.get(guild.id):
+                self.request_play(guild)
+            else:
+                self.schedule_prefetch(guild.id)
+        return status, position
+    
+    def _enqueue_page(self, guild, generation: int, page: List[Dict], user_id: int,
+                      loaded: int) -> Optional[Tuple[int, int, Optional[str]]]:
+        """Egy playlist oldal várólistára tétele (az actorban fut)
+
+        None, ha a betöltést abba kell hagyni (kiléptünk, vagy leállították / törölték a várólistát);
+        egyébként (hozzáadott, duplikátum, betelt korlát).
+        """
+        guild_id = guild.id
+        if guild_id not in self.queues or self.queue_generations.get(guild_id, 0) != generation:
+            return None
+        
+        added_count = 0
+        duplicates = 0
+        limit_reason = None
+        for track in page:
+            if loaded + added_count + duplicates >= MAX_PLAYLIST_SIZE:
+                limit_reason = 'playlist'
+                break
+            limit_reason = self.queue_limit(guild_id, user_id)
+            if limit_reason:
+                break
+            
+            # Közvetlenül a Spotify track URL-t használjuk
+            queue_item = Track.from_info(track, user_id, track_type='spotify_track')
+            
+            if self.enqueue(guild_id, queue_item) == 'added':
+                added_count += 1
+            else:
+                duplicates += 1
+        
+        # Az első oldal után már indulhat a lejátszás
+        if added_count:
+            if not self.now_playing.get(guild_id):
+                self.request_play(guild)
+            else:
+                self.schedule_prefetch(guild_id)
+        return added_count, duplicates, limit_reason
+    
+    def _collection_embed(self, collection: Dict, interaction: discord.Interaction, added_count: int,
+                          total: int, first_position: int, finished: bool, limit_reason: Optional[str] = None,
+                          duplicates: int = 0) -> discord.Embed:
+        """Playlist/album betöltési állapot embed"""
+        embed = discord.Embed(
+            title="✅ Playlist/Album hozzáadva!" if finished else "⏳ Playlist/Album betöltése...",
+            description=f"**{collection['title']}** hozzáadva a várólistához!" if finished
+                        else f"**{collection['title']}** számai folyamatosan kerülnek a várólistára...",
+            color=COLORS['SPOTIFY']
+        )
+        
+        if collection.get('thumbnail'):
+            embed.set_thumbnail(url=collection['thumbnail'])
+        
+        embed.add_field(
+            name="📊 Hozzáadott számok",
+            value=f"**{added_count}** szám a **{total}**-ból",
+            inline=True
+        )
+        
+        if added_count:
+            embed.add_field(
+                name="📋 Várólista",
+                value=f"Pozíció: {first_position} - {first_position + added_count - 1}",
+                inline=True
+            )
+        
+        embed.add_field(
+            name="🎵 Kérte",
+            value=interaction.user.mention,
+            inline=True
+        )
+        
+        if duplicates:
+            collapsed = self.dedup_modes.get(interaction.guild.id, DEDUP_MODE) == 'collapse'
+            embed.add_field(
+                name="🔁 Duplikátumok",
+                value=f"**{duplicates}** szám már a várólistán volt, " + ("összevonva." if collapsed else "kihagyva."),
+                inline=False
+            )
+        
+        if limit_reason == 'stopped':
+            embed.add_field(
+                name="⏹️ Megszakítva",
+                value="A lejátszást leállították vagy a várólistát törölték, a többi szám nem került a várólistára.",
+                inline=False
+            )
+        elif limit_reason and limit_reason != 'error':
+            embed.add_field(
+                name="⚠️ Korlát",
+                value=self.limit_message(limit_reason),
+                inline=False
+            )
+        elif limit_reason == 'error':
+            embed.add_field(
+                name="⚠️ Hiba",
+                value="A betöltés közben hiba történt, a többi szám nem került a várólistára.",
+                inline=False
+            )
+        
+        return embed
+    
+    async def enqueue_spotify_collection(self, interaction: discord.Interaction, url: str) -> bool:
+        """Spotify playlist/album számainak várólistára tétele oldalanként, ahogy megérkeznek"""
+        guild_id = interaction.guild.id
+        generation = self.queue_generations.get(guild_id, 0)
+        
+        try:
+            collection = await self.get_spotify_collection(url)
+        except Exception as e:
+            print(f"Hiba a Spotify információ kinyerése során: {e}")
+            collection = None
+        
+        if not collection or not collection['total']:
+            embed = discord.Embed(
+                title="❌ Hiba!",
+                description=f"Nem sikerült betölteni a Spotify playlistet/albumot: **{url}**",
+                color=COLORS['ERROR']
+            )
+            await interaction.followup.send(embed=embed)
+            return False
+        
+        total = collection['total']
+        queue = self.queues.get(guild_id)
+        if queue is None or self.queue_generations.get(guild_id, 0) != generation:
+            # A gyűjtemény letöltése közben kiléptünk / leállították a lejátszást
+            return False
+        first_position = len(queue) + 1
+        added_count = 0
+        duplicates = 0
+        limit_reason = None
+        
+        # Egyetlen üzenet, amit a betöltés során frissítünk
+        progress_message = await interaction.followup.send(
+            embed=self._collection_embed(collection, interaction, 0, total, first_position, False),
+            wait=True
+        )
+        
+        try:
+            async for page in self.iter_spotify_tracks(collection):
+                # Kilépés után nem hozunk létre új actort
+                if guild_id not in self.queues:
+                    return False
+                
+                # Minden oldal után az actorban: a korlát ellenőrzés és a hozzáadás nem keveredhet más parancsokkal
+                result = await self.actor(interaction.guild).call(
+                    self._enqueue_page, interaction.guild, generation, page, interaction.user.id,
+                    added_count + duplicates
+                )
+                if result is None:
+                    # Közben kiléptünk, leállították vagy törölték a várólistát
+                    limit_reason = 'stopped'
+                    break
+                
+                page_added, page_duplicates, limit_reason = result
+                added_count += page_added
+                duplicates += page_duplicates
+                if limit_reason:
+                    break
+                
+                await progress_message.edit(
+                    embed=self._collection_embed(collection, interaction, added_count, total, first_position, False,
+                                                 duplicates=duplicates)
+                )
+        except Exception as e:
+            print(f"Hiba a Spotify playlist betöltése során: {e}")
+            limit_reason = 'error'
+        
+        await progress_message.edit(
+            embed=self._collection_embed(collection, interaction, added_count, total, first_position, True, limit_reason,
+                                         duplicates)
+        )
+        return added_count > 0
+    
     async def add_to_queue(self, interaction: discord.Interaction, query: str) -> bool:
         """Zene hozzáadása a várólistához"""
         guild_id = interaction.guild.id
@@ -455,10 +983,25 @@ class MusicPlayer:
             await interaction.response.send_message(embed=embed)
             return False
         
+        # Betelt várólistánál keresni / Spotify oldalakat letölteni sem érdemes
+        limit_reason = self.queue_limit(guild_id, interaction.user.id)
+        if limit_reason:
+            embed = discord.Embed(
+                title="⚠️ A várólista megtelt!",
+                description=self.limit_message(limit_reason),
+                color=COLORS['WARNING']
+            )
+            await interaction.response.send_message(embed=embed)
+            return False
+        
         # Zene keresés
         await interaction.response.defer()
         
-        music_info = await self.search_music(query)
+        # Spotify playlist/album: oldalanként töltjük be, a lejátszás az első oldal után indul
+        if self.spotify and self.is_spotify_url(query) and (self.is_spotify_playlist(query) or self.is_spotify_album(query)):
+            return await self.enqueue_spotify_collection(interaction, query)
+        
+        music_info = await self.search_music(query, guild_id)
         if not music_info:
             # Spotify specifikus hibaüzenet
             if self.is_spotify_url(query) and not self.spotify:
@@ -495,79 +1038,38 @@ class MusicPlayer:
             await interaction.followup.send(embed=embed)
             return False
         
-        # Ha playlist vagy album, minden számot hozzáadunk
-        if music_info.get('type') in ['spotify_playlist', 'spotify_album'] and music_info.get('tracks'):
-            tracks = music_info['tracks']
-            added_count = 0
-            
-            for track in tracks:
-                # Közvetlenül a Spotify track URL-t használjuk
-                queue_item = {
-                    'title': track['title'],
-                    'duration': track.get('duration', 0),
-                    'url': track['spotify_url'],  # Spotify URL közvetlenül
-                    'thumbnail': track.get('thumbnail'),
-                    'webpage_url': track['spotify_url'],
-                    'uploader': track.get('artist', 'Ismeretlen előadó'),
-                    'album': track.get('album'),
-                    'type': 'spotify_track',  # Spotify track típus
-                    'requester': interaction.user
-                }
-                
-                self.queues[guild_id].append(queue_item)
-                added_count += 1
-            
-            # Értesítés a playlist/album hozzáadásáról
-            embed_color = COLORS['SPOTIFY']
+        # Egyetlen zene hozzáadása - a lejáró stream URL helyett a videó oldalát tároljuk
+        queue_item = Track.from_info(music_info, interaction.user.id)
+        
+        # Keresés közben betelhetett (pl. párhuzamos playlist betöltés) vagy kiléphettünk -
+        # az ellenőrzés és a hozzáadás az actorban, egy lépésben történik
+        status, position = await self.actor(interaction.guild).call(self._enqueue_track, interaction.guild, queue_item) \
+            if guild_id in self.queues else ('gone', 0)
+        if status == 'gone':
             embed = discord.Embed(
-                title="✅ Playlist/Album hozzáadva!",
-                description=f"**{music_info['title']}** hozzáadva a várólistához!",
-                color=embed_color
-            )
-            
-            if music_info.get('thumbnail'):
-                embed.set_thumbnail(url=music_info['thumbnail'])
-            
-            embed.add_field(
-                name="📊 Hozzáadott számok",
-                value=f"**{added_count}** szám a **{len(tracks)}**-ból",
-                inline=True
-            )
-            
-            embed.add_field(
-                name="📋 Várólista",
-                value=f"Pozíció: {len(self.queues[guild_id]) - added_count + 1} - {len(self.queues[guild_id])}",
-                inline=True
+                title="❌ Hiba!",
+                description="Keresés közben kiléptem a hangcsatornából, a zene nem került a várólistára.",
+                color=COLORS['ERROR']
             )
-            
-            embed.add_field(
-                name="🎵 Kérte",
-                value=interaction.user.mention,
-                inline=True
+            await interaction.followup.send(embed=embed)
+            return False
+        if status not in ('added', 'skipped', 'collapsed'):
+            embed = discord.Embed(
+                title="⚠️ A várólista megtelt!",
+                description=self.limit_message(status),
+                color=COLORS['WARNING']
             )
-            
             await interaction.followup.send(embed=embed)
-            
-            # Ha nincs zene lejátszásban, indítsuk el
-            if not self.now_playing.get(guild_id):
-                await self.play_next(interaction.guild)
-            
-            return True
-        
-        # Egyetlen zene hozzáadása
-        queue_item = {
-            'title': music_info['title'],
-            'duration': music_info.get('duration', 0),
-            'url': music_info.get('url') or music_info.get('spotify_url'),
-            'thumbnail': music_info.get('thumbnail'),
-            'webpage_url': music_info.get('webpage_url') or music_info.get('spotify_url'),
-            'uploader': music_info.get('uploader') or music_info.get('artist', 'Ismeretlen előadó'),
-            'album': music_info.get('album'),
-            'type': music_info.get('type', 'unknown'),
-            'requester': interaction.user
-        }
+            return False
         
-        self.queues[guild_id].append(queue_item)
+        if status == 'skipped':
+            embed = discord.Embed(
+                title="🔁 Már a várólistán!",
+                description=f"**{queue_item.title}** már szerepel a várólistán ({position}. pozíció), nem adtam hozzá újra.",
+                color=COLORS['WARNING']
+            )
+            await interaction.followup.send(embed=embed)
+            return False
         
         # Embed szín beállítása a típus alapján
         embed_color = COLORS['SPOTIFY'] if 'spotify' in str(music_info.get('type', '')).lower() else COLORS['SUCCESS']
@@ -622,7 +1124,7 @@ class MusicPlayer:
         
         embed.add_field(
             name="📊 Várólista",
-            value=f"Pozíció: {len(self.queues[guild_id])}",
+            value=f"Pozíció: {position}" + (" (összevonva, egymás után többször szól)" if status == 'collapsed' else ""),
             inline=True
         )
         
@@ -634,170 +1136,712 @@ class MusicPlayer:
         )
         
         await interaction.followup.send(embed=embed)
-        
-        # Ha nincs zene lejátszásban, indítsuk el
-        if not self.now_playing.get(guild_id):
-            await self.play_next(interaction.guild)
-        
         return True
     
-    async def play_next(self, guild):
-        """Következő zene lejátszása"""
-        guild_id = guild.id
+    def is_stream_fresh(self, queue_item: Track) -> bool:
+        """Ellenőrzi, hogy az elem előre feloldott stream URL-je még nem jár-e le hamarosan"""
+        if not queue_item.stream_url:
+            return False
+        return queue_item.stream_expires - STREAM_URL_REFRESH_MARGIN > time.time()
+    
+    async def resolve_play_url(self, guild_id: int, queue_item: Track) -> Optional[str]:
+        """Lejátszható stream URL meghatározása egy várólista elemhez"""
+        # Ha épp fut rá előre feloldás, azt várjuk meg új keresés helyett
+        entry = self.prefetch_tasks.get(guild_id, {}).pop(id(queue_item), None)
+        if entry and entry[0] is queue_item:
+            try:
+                await entry[1]
+            except asyncio.CancelledError:
+                pass
+        elif entry:
+            entry[1].cancel()
+        
+        if self.is_stream_fresh(queue_item):
+            return queue_item.stream_url
+        return await self._resolve_uncached(guild_id, queue_item)
+    
+    async def _resolve_uncached(self, guild_id: int, queue_item: Track) -> Optional[str]:
+        """Stream URL feloldása keresővel (az előre feloldó task is ezt hívja, nem önmagát várja)"""
+        if queue_item.type == 'spotify_track' and 'spotify.com' in str(queue_item.url):
+            # Spotify track konvertálása YouTube-ra (mentett párosítás alapján, ha van)
+            youtube_result = await self.resolve_spotify_track(
+                guild_id, queue_item.title, queue_item.uploader, queue_item.duration,
+                queue_item.spotify_id, queue_item.isrc
+            )
+            
+            if not youtube_result:
+                # Ha nem találjuk meg YouTube-on, próbáljuk meg a Spotify URL-t
+                print(f"Spotify track nem található YouTube-on, Spotify URL használata")
+                return queue_item.url
+            
+            print(f"Spotify track konvertálva YouTube-ra: {queue_item.uploader} - {queue_item.title}")
+        elif queue_item.webpage_url:
+            # A videó feloldása most (a gyorsítótárban lévő friss URL-t újrahasznosítva)
+            youtube_result = await self.search_youtube(queue_item.webpage_url, guild_id)
+            if not youtube_result:
+                return None
+        else:
+            return queue_item.url
         
-        if guild_id not in self.queues or not self.queues[guild_id]:
-            self.now_playing[guild_id] = None
+        queue_item.video_id = youtube_result.get('id') or queue_item.video_id
+        queue_item.stream_url = youtube_result.get('url')
+        queue_item.stream_expires = stream_url_expiry(queue_item.stream_url, STREAM_URL_TTL)
+        return queue_item.stream_url
+    
+    async def note_play(self, queue_item: Track):
+        """Lejátszás számolása; elég gyakran játszott számnál helyi másolat készítése a háttérben"""
+        if self.audio_cache is None or not queue_item.video_id:
             return
-        
-        if guild_id not in self.voice_clients:
+        if not 0 < queue_item.duration <= AUDIO_CACHE_MAX_DURATION:
             return
-        
-        voice_client = self.voice_clients[guild_id]
-        if not voice_client.is_connected():
+        if not await asyncio.to_thread(self.audio_cache.record_play, queue_item.video_id):
             return
         
-        try:
-            # Következő zene a várólistából
-            queue_item = self.queues[guild_id].popleft()
-            self.now_playing[guild_id] = queue_item
+        # Ide csak akkor jutunk, ha a lejátszást nem lehetett rögzíteni (PCM kimenet, más szerver streamje):
+        # a már feloldott stream URL-t a szám vége után töltjük le; ha nincs friss, a következő lejátszáskor próbáljuk
+        if not self.is_stream_fresh(queue_item) or not self.ffmpeg.available:
+            return
+        copy = is_opus_stream(queue_item.stream_url)
+        if not copy and not self.ffmpeg.has_encoder('libopus'):
+            return
+        self.audio_cache.schedule_store(queue_item.video_id, queue_item.stream_url, self.ffmpeg.path, copy,
+                                        delay=queue_item.duration)
+    
+    async def invalidate_stream(self, queue_item: Track):
+        """Hibás / lejárt stream URL elvetése az elemből és a gyorsítótárból"""
+        queue_item.stream_url = None
+        queue_item.stream_expires = 0.0
+        await asyncio.to_thread(self.resolution_cache.invalidate_stream, queue_item.video_id)
+    
+    async def open_source(self, guild_id: int, queue_item: Track, start: float = 0.0) -> ReadAheadSource:
+        """FFmpeg forrás indítása; ha a stream URL hang nélkül ér véget (lejárt, 403), egyszer újra feloldjuk"""
+        # Egy másik szerveren épp most indult ugyanez a szám: csatlakozunk, feloldás nélkül
+        if start <= 0 and queue_item.video_id:
+            source = self.join_shared(self.share_key(queue_item.video_id))
+            if source is not None:
+                return source
+        
+        # Helyben tárolt szám: nincs feloldás és nincs hálózati stream
+        local_path = await asyncio.to_thread(self.audio_cache.path_for, queue_item.video_id) \
+            if self.audio_cache else None
+        if local_path:
+            try:
+                source = self.buffered_source(
+                    self.share_key(queue_item.video_id),
+                    lambda offset: self.create_local_source(local_path, offset),
+                    start
+                )
+            except OSError as e:
+                source = None
+                print(f"Nem sikerült megnyitni a helyi fájlt ({queue_item.title}): {e}")
+            if source is not None:
+                if await self.wait_ready(source):
+                    return source
+                source.cleanup()
+            await asyncio.to_thread(self.audio_cache.invalidate, queue_item.video_id)
+        
+        # Ha ezzel a lejátszással éri el a mentési küszöböt, a lejátszó FFmpeg kimenetét rögzítjük
+        record_id = None
+        if (start <= 0 and self.audio_cache and self.opus_passthrough
+                and 0 < queue_item.duration <= AUDIO_CACHE_MAX_DURATION
+                and await asyncio.to_thread(self.audio_cache.wants, queue_item.video_id)):
+            record_id = queue_item.video_id
+        
+        for attempt in range(2):
+            play_url = await self.resolve_play_url(guild_id, queue_item)
+            if not play_url:
+                raise ValueError("Nem sikerült lejátszható stream URL-t találni")
             
-            # FFmpeg ellenőrzés
-            if not await self.check_ffmpeg():
-                print("FFmpeg nincs telepítve!")
+            source = self.buffered_source(
+                self.share_key(queue_item.video_id or play_url),
+                lambda offset: self.create_ffmpeg_source(play_url, offset, record_id),
+                start
+            )
+            if await self.wait_ready(source):
+                return source
+            
+            source.cleanup()
+            print(f"A stream URL nem adott hangot, újra feloldjuk: {queue_item.title}")
+            await self.invalidate_stream(queue_item)
+        
+        raise ValueError("A stream nem adott hangot (lejárt vagy elérhetetlen)")
+    
+    async def wait_ready(self, source: ReadAheadSource) -> bool:
+        """Várakozás a forrás első keretére; ha közben megszakítanak (kilépés, újabb indítás), a forrás is leáll"""
+        try:
+            return await asyncio.to_thread(source.wait_ready, STREAM_START_TIMEOUT)
+        except asyncio.CancelledError:
+            source.cleanup()
+            raise
+    
+    def share_key(self, identity: str) -> tuple:
+        """Megosztott stream kulcsa - a hangerőt szerverenként a GaplessSource állítja, így az nem része"""
+        return (identity, 'opus' if self.opus_passthrough else 'pcm')
+    
+    def join_shared(self, key: tuple) -> Optional[SharedStreamReader]:
+        """Csatlakozás egy futó megosztott streamhez, ha még az elejéről követhető"""
+        if not SHARED_STREAMS:
+            return None
+        stream = self.shared_streams.get(key)
+        if stream is None:
+            return None
+        return stream.subscribe(SHARED_STREAM_TOLERANCE * FRAMES_PER_SECOND)
+    
+    def buffered_source(self, key: tuple, factory: Callable[[float], discord.AudioSource], start: float):
+        """Előreolvasó forrás; a szám elejéről indítva megosztva, hogy más szerverek is csatlakozhassanak"""
+        if not SHARED_STREAMS or start > 0:
+            return ReadAheadSource(factory(start), GAPLESS_READAHEAD_FRAMES)
+        
+        # Lezárt (már senki által nem hallgatott) streamek törlése
+        for stale in [k for k, stream in self.shared_streams.items() if stream.closed]:
+            del self.shared_streams[stale]
+        
+        reader = self.join_shared(key)
+        if reader is not None:
+            return reader
+        
+        tolerance = SHARED_STREAM_TOLERANCE * FRAMES_PER_SECOND
+        stream = SharedStream(
+            factory(0.0),
+            capacity=tolerance + GAPLESS_READAHEAD_FRAMES,
+            readahead=GAPLESS_READAHEAD_FRAMES,
+            fallback=factory
+        )
+        self.shared_streams[key] = stream
+        return stream.subscribe(tolerance)
+    
+    async def _prefetch_item(self, guild_id: int, queue_item: Track):
+        """Egy várólista elem feloldása a háttérben"""
+        try:
+            if not self.is_stream_fresh(queue_item):
+                await self._resolve_uncached(guild_id, queue_item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Hiba az előre feloldás során ({queue_item.title}): {e}")
+    
+    def schedule_prefetch(self, guild_id: int):
+        """A várólista következő PREFETCH_COUNT elemének feloldása a háttérben"""
+        queue = self.queues.get(guild_id)
+        tasks = self.prefetch_tasks.setdefault(guild_id, {})
+        window = list(islice(queue, PREFETCH_COUNT)) if queue else []
+        wanted = {id(item) for item in window}
+        
+        # Ami kikerült az ablakból (kihagyva, törölve), annak a feloldását leállítjuk
+        for key, (item, task) in list(tasks.items()):
+            if key not in wanted or task.done():
+                del tasks[key]
+                task.cancel()
+        
+        for item in window:
+            if id(item) in tasks or self.is_stream_fresh(item):
+                continue
+            if self.audio_cache and self.audio_cache.contains(item.video_id):
+                continue  # Helyből szól, nem kell stream URL
+            task = asyncio.create_task(self._prefetch_item(guild_id, item))
+            tasks[id(item)] = (item, task)
+    
+    def cancel_prefetch(self, guild_id: int):
+        """Összes futó előre feloldás leállítása egy szerveren"""
+        for item, task in self.prefetch_tasks.pop(guild_id, {}).values():
+            task.cancel()
+    
+    @property
+    def opus_passthrough(self) -> bool:
+        """Opus kimenet használható-e (van libopus az FFmpeg-ben és nincs átúsztatás)"""
+        return (OPUS_PASSTHROUGH and self.ffmpeg.has_encoder('libopus')
+                and not (GAPLESS_PLAYBACK and CROSSFADE_SECONDS))
+    
+    def volume_of(self, guild_id: int) -> float:
+        return self.volumes.get(guild_id, DEFAULT_VOLUME)
+    
+    def create_local_source(self, path: str, start: float = 0.0) -> discord.AudioSource:
+        """Forrás egy helyben tárolt Ogg/Opus fájlhoz"""
+        # Az elejétől a csomagokat közvetlenül a fájlból olvassuk, FFmpeg nélkül (tekeréshez az FFmpeg keres)
+        if self.opus_passthrough and not start:
+            return OggOpusFileSource(path)
+        return self.create_ffmpeg_source(path, start)
+    
+    def create_ffmpeg_source(self, play_url: str, start: float = 0.0,
+                             record_id: Optional[str] = None) -> discord.AudioSource:
+        """FFmpeg forrás létrehozása egy stream URL-hez vagy helyi fájlhoz (a szám `start` másodpercétől)
+
+        `record_id` esetén az elejétől indított Opus kimenet a helyi gyorsítótárba is kerül.
+        """
+        executable = self.ffmpeg.path or FFMPEG_EXECUTABLE
+        remote = play_url.startswith(('http://', 'https://'))
+        # Az újracsatlakozási kapcsolók csak HTTP forrásra vonatkoznak
+        before_options = self.ffmpeg_options['before_options'] if remote else ''
+        if start > 0:
+            before_options += f" -ss {start:.2f}"
+        
+        if not self.opus_passthrough:
+            # PCM kimenet: a hangerőt a GaplessSource állítja
+            return discord.FFmpegPCMAudio(
+                play_url,
+                executable=executable,
+                before_options=before_options,
+                options=self.ffmpeg_options['options']
+            )
+        
+        # Opus kimenet: az Opus stream átkódolás nélkül átcsomagolható, a hangerőt a GaplessSource állítja
+        options = self.ffmpeg_options['options']
+        codec = 'opus' if not remote or is_opus_stream(play_url) else None
+        
+        partial = self.audio_cache.begin_recording(record_id) if record_id and remote and not start else None
+        if partial:
+            loop = self.bot.loop
+            return RecordingOpusAudio(
+                play_url,
+                partial,
+                # Bármelyik szálból hívódhat: a lezárás az event loopon indul
+                lambda complete: loop.call_soon_threadsafe(
+                    self.audio_cache.schedule_finish, record_id, complete
+                ),
+                bitrate=OPUS_BITRATE,
+                codec=codec,
+                executable=executable,
+                before_options=before_options,
+                options=options
+            )
+        
+        return discord.FFmpegOpusAudio(
+            play_url,
+            bitrate=OPUS_BITRATE,
+            codec=codec,
+            executable=executable,
+            before_options=before_options,
+            options=options
+        )
+    
+    def record_transition(self, gap_ms: float, gapless: bool):
+        """Számváltási szünet rögzítése (a hang szálból hívódik)"""
+        self.transition_gaps.append((gap_ms, gapless))
+    
+    def after_playback(self, guild, source, error):
+        """A hangkliens lejátszásának vége (a hang szálból hívódik)"""
+        self.track_ended_at[guild.id] = time.perf_counter()
+        if error:
+            print(f"Hiba a lejátszás során: {error}")
+        # Az event loop nem szálbiztos: csak jelzünk, a szerver actorja dolgozza fel
+        self.bot.loop.call_soon_threadsafe(self._signal_track_end, guild, source)
+    
+    def _signal_track_end(self, guild, source):
+        """Szám vége esemény az actor postafiókjába (az event loopon fut)"""
+        self.tell_actor(guild, self.on_track_end, guild, source)
+    
+    def actor(self, guild) -> GuildActor:
+        """A szerver actorja (lustán létrehozva és elindítva)"""
+        actor = self.actors.get(guild.id)
+        if actor is None or not actor.running:
+            actor = GuildActor(guild.id)
+            actor.start()
+            self.actors[guild.id] = actor
+        return actor
+    
+    def tell_actor(self, guild, func: Callable, *args) -> bool:
+        """Üzenet a szerver meglévő actorjának - kilépés után nem hozunk létre újat, az üzenet elvész"""
+        actor = self.actors.get(guild.id)
+        if actor is None:
+            return False
+        actor.tell(func, *args)
+        return True
+    
+    def request_play(self, guild):
+        """Lejátszás indítása, ha épp nem szól és nem is indul semmi"""
+        self.actor(guild).tell(self.play_if_idle, guild)
+    
+    async def play_if_idle(self, guild):
+        voice_client = self.voice_clients.get(guild.id)
+        if voice_client is None or voice_client.is_playing() or voice_client.is_paused():
+            return
+        if self.now_playing.get(guild.id):
+            return  # Épp oldódik fel / indul
+        await self.play_next(guild)
+    
+    async def on_track_end(self, guild, source):
+        """A hangkliens forrása elfogyott (skip, stop vagy a szám vége)"""
+        # Elavult jelzés: egy korábbi forrás vége, ami helyett már más szól
+        if source is not self.gapless_sources.get(guild.id):
+            return
+        voice_client = self.voice_clients.get(guild.id)
+        if voice_client is None or voice_client.is_playing() or voice_client.is_paused():
+            return
+        await self.play_next(guild)
+    
+    def take_prepared(self, guild_id: int, queue_item: Track) -> Optional[ReadAheadSource]:
+        """Előkészített FFmpeg forrás átvétele, ha pont ehhez az elemhez tartozik"""
+        item, source = self.prepared_sources.pop(guild_id, (None, None))
+        gapless = self.gapless_sources.get(guild_id)
+        if gapless:
+            gapless.clear_next()
+        
+        if source is None:
+            return None
+        if item is queue_item and source.claim():
+            return source
+        if source.claim():
+            source.cleanup()
+        return None
+    
+    def discard_prepared(self, guild_id: int):
+        """Előkészített (vagy épp induló) FFmpeg forrás eldobása (pl. ha a várólista eleje megváltozott)"""
+        task = self.prepare_tasks.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+        item, source = self.prepared_sources.pop(guild_id, (None, None))
+        gapless = self.gapless_sources.get(guild_id)
+        if gapless:
+            gapless.clear_next()
+        if source is not None and source.claim():
+            source.cleanup()
+    
+    def schedule_prepare(self, guild, track):
+        """A következő szám FFmpeg forrásának előkészítése a jelenlegi vége előtt"""
+        task = self.prepare_tasks.get(guild.id)
+        if task is not None and not task.done():
+            return
+        self.prepare_tasks[guild.id] = asyncio.create_task(self.prepare_next(guild, track))
+    
+    async def prepare_next(self, guild, track):
+        """A várólista első elemének FFmpeg forrását elindítjuk és bemelegítjük (az actoron kívül)"""
+        guild_id = guild.id
+        queue = self.queues.get(guild_id)
+        gapless = self.gapless_sources.get(guild_id)
+        if not queue or gapless is None or gapless.track is not track or guild_id in self.prepared_sources:
+            return
+        
+        queue_item = queue[0]
+        try:
+            source = await self.open_source(guild_id, queue_item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Hiba a következő szám előkészítése során: {e}")
+            return
+        
+        task = asyncio.current_task()
+        if not self.tell_actor(guild, self.set_prepared, guild_id, task, gapless, queue_item, source):
+            source.cleanup()
+    
+    def set_prepared(self, guild_id: int, task: asyncio.Task, gapless: GaplessSource, queue_item: Track,
+                     source: ReadAheadSource):
+        """Bemelegített következő forrás átadása a lejátszásnak (az actorban fut)"""
+        # Közben eldobták (pl. tekerés), vagy a várólista / a lejátszás megváltozott
+        if self.prepare_tasks.get(guild_id) is not task:
+            source.cleanup()
+            return
+        del self.prepare_tasks[guild_id]
+        if (not self.queues.get(guild_id) or self.queues[guild_id][0] is not queue_item
+                or self.gapless_sources.get(guild_id) is not gapless or guild_id in self.prepared_sources):
+            source.cleanup()
+            return
+        
+        self.prepared_sources[guild_id] = (queue_item, source)
+        gapless.queue_next(source, queue_item, queue_item.duration)
+    
+    def schedule_advance(self, guild, track):
+        """Keret határon történt váltás feldolgozása (az actorban)"""
+        self.tell_actor(guild, self.on_gapless_advance, guild, track)
+    
+    async def on_gapless_advance(self, guild, queue_item: Track):
+        """A lejátszás szünet nélkül átváltott a következő számra"""
+        guild_id = guild.id
+        item, source = self.prepared_sources.get(guild_id, (None, None))
+        if item is queue_item:
+            del self.prepared_sources[guild_id]
+        
+        queue = self.queues.get(guild_id)
+        if queue and queue[0] is queue_item:
+            self.pop_next(guild_id)
+        self.now_playing[guild_id] = queue_item
+        
+        self.schedule_prefetch(guild_id)
+        await self.note_play(queue_item)
+        await self.announce_now_playing(guild, queue_item)
+    
+    async def announce_now_playing(self, guild, queue_item: Track):
+        """"Most játszik" értesítés küldése"""
+        guild_id = guild.id
+        
+        # Értesítés a lejátszásról
+        embed = discord.Embed(
+            title="🎵 Most játszik",
+            description=f"**{queue_item.title}**",
+            color=COLORS['SPOTIFY'] if queue_item.is_spotify else COLORS['SUCCESS']
+        )
+        
+        if queue_item.thumbnail:
+            embed.set_thumbnail(url=queue_item.thumbnail)
+        
+        # Előadó/Uploader információ
+        if queue_item.artist:
+            embed.add_field(
+                name="👤 Előadó",
+                value=queue_item.artist,
+                inline=True
+            )
+        elif queue_item.uploader:
+            embed.add_field(
+                name="👤 Feltöltő",
+                value=queue_item.uploader,
+                inline=True
+            )
+        
+        # Album információ (Spotify esetén)
+        if queue_item.album:
+            embed.add_field(
+                name="💿 Album",
+                value=queue_item.album,
+                inline=True
+            )
+        
+        # Hossz információ
+        if queue_item.duration:
+            duration = f"{queue_item.duration//60}:{queue_item.duration%60:02d}"
+            embed.add_field(
+                name="⏱️ Hossz",
+                value=duration,
+                inline=True
+            )
+        
+        embed.add_field(
+            name="👤 Kérte",
+            value=queue_item.requester_mention,
+            inline=True
+        )
+        
+        # Forrás típus
+        source_type = "🎵 Spotify" if queue_item.is_spotify else "📺 YouTube"
+        embed.add_field(
+            name="🔗 Forrás",
+            value=source_type,
+            inline=True
+        )
+        
+        # Várólista hossz
+        remaining = len(self.queues.get(guild_id, ()))
+        if remaining > 0:
+            embed.add_field(
+                name="📋 Várólista",
+                value=f"Még {remaining} szám vár",
+                inline=True
+            )
+        
+        # Csatorna keresése az értesítéshez
+        for channel in guild.text_channels:
+            if channel.permissions_for(guild.me).send_messages:
+                try:
+                    await channel.send(embed=embed)
+                    break
+                except:
+                    continue
+    
+    async def play_next(self, guild):
+        """Következő zene lejátszása (az actorban fut, a stream feloldása a postafiókon kívül)"""
+        guild_id = guild.id
+        
+        if guild_id not in self.queues or not self.queues[guild_id]:
+            self.now_playing[guild_id] = None
+            self.gapless_sources.pop(guild_id, None)
+            await self.report_skipped(guild)
+            return
+        
+        if guild_id not in self.voice_clients:
+            return
+        
+        voice_client = self.voice_clients[guild_id]
+        if not voice_client.is_connected():
+            return
+        
+        # Túl sok szám bukott el egymás után (pl. nincs FFmpeg, hálózati hiba) - nem égetjük el a várólistát
+        if len(self.skipped_tracks.get(guild_id, ())) >= MAX_CONSECUTIVE_SKIPS:
+            self.now_playing[guild_id] = None
+            await self.report_skipped(guild, halted=True)
+            return
+        
+        # Következő zene a várólistából
+        queue_item = self.pop_next(guild_id)
+        self.now_playing[guild_id] = queue_item
+        
+        # Előre elindított FFmpeg forrás átvétele, ha van
+        prepared = self.take_prepared(guild_id, queue_item)
+        if prepared is not None:
+            await self.start_playback(guild, queue_item, prepared)
+        else:
+            # A feloldás alatt a többi parancs (skip, stop, ...) is feldolgozható
+            self.cancel_start(guild_id)
+            self.start_tasks[guild_id] = asyncio.create_task(self._open_and_start(guild, queue_item))
+    
+    def cancel_start(self, guild_id: int):
+        """Folyamatban lévő számindítás leállítása (a félig elindított forrást az open_source lezárja)"""
+        task = self.start_tasks.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+    
+    async def _open_and_start(self, guild, queue_item: Track):
+        """Stream feloldása és FFmpeg indítása újrapróbálással, az eredmény visszaküldése az actornak"""
+        # FFmpeg nélkül egyik szám sem indulna el - nem léptetjük végig a várólistát
+        if not await self.check_ffmpeg():
+            self.tell_actor(guild, self.playback_halted, guild, queue_item)
+            return
+        
+        error = None
+        for attempt in range(PLAYBACK_MAX_ATTEMPTS):
+            # Közben leállították vagy továbbléptek - nincs mit indítani
+            if self.now_playing.get(guild.id) is not queue_item:
                 return
             
-            # Zene lejátszása
+            if attempt:
+                await asyncio.sleep(PLAYBACK_RETRY_BACKOFF * 2 ** (attempt - 1))
+            
             try:
-                # Ha Spotify URL, konvertáljuk YouTube-ra
-                if queue_item.get('type') == 'spotify_track' and 'spotify.com' in str(queue_item.get('url', '')):
-                    # Spotify track konvertálása YouTube-ra
-                    search_query = f"{queue_item.get('uploader', '')} {queue_item.get('title', '')}"
-                    youtube_result = await self.search_youtube(search_query)
-                    
-                    if youtube_result:
-                        # YouTube URL használata a lejátszáshoz
-                        play_url = youtube_result.get('url')
-                        print(f"Spotify track konvertálva YouTube-ra: {search_query}")
-                    else:
-                        # Ha nem találjuk meg YouTube-on, próbáljuk meg a Spotify URL-t
-                        play_url = queue_item.get('url')
-                        print(f"Spotify track nem található YouTube-on, Spotify URL használata")
-                else:
-                    # Normál URL (YouTube vagy más)
-                    play_url = queue_item.get('url')
-                
-                source = discord.FFmpegPCMAudio(
-                    play_url,
-                    **self.ffmpeg_options
-                )
-                
-                # Hangerej beállítása
-                source = discord.PCMVolumeTransformer(source)
-                source.volume = 0.5
-                
-                voice_client.play(source, after=lambda e: self.bot.loop.create_task(self.play_next(guild)))
-                
-                # Értesítés a lejátszásról
-                embed = discord.Embed(
-                    title="🎵 Most játszik",
-                    description=f"**{queue_item['title']}**",
-                    color=COLORS['SPOTIFY'] if 'spotify' in str(queue_item.get('type', '')).lower() else COLORS['SUCCESS']
-                )
-                
-                if queue_item['thumbnail']:
-                    embed.set_thumbnail(url=queue_item['thumbnail'])
-                
-                # Előadó/Uploader információ
-                if queue_item.get('artist'):
-                    embed.add_field(
-                        name="👤 Előadó",
-                        value=queue_item['artist'],
-                        inline=True
-                    )
-                elif queue_item.get('uploader'):
-                    embed.add_field(
-                        name="👤 Feltöltő",
-                        value=queue_item['uploader'],
-                        inline=True
-                    )
-                
-                # Album információ (Spotify esetén)
-                if queue_item.get('album'):
-                    embed.add_field(
-                        name="💿 Album",
-                        value=queue_item['album'],
-                        inline=True
-                    )
-                
-                # Hossz információ
-                if queue_item.get('duration'):
-                    duration = f"{queue_item['duration']//60}:{queue_item['duration']%60:02d}"
-                    embed.add_field(
-                        name="⏱️ Hossz",
-                        value=duration,
-                        inline=True
-                    )
-                
-                embed.add_field(
-                    name="👤 Kérte",
-                    value=queue_item['requester'].mention,
-                    inline=True
-                )
-                
-                # Forrás típus
-                source_type = "🎵 Spotify" if 'spotify' in str(queue_item.get('type', '')).lower() else "📺 YouTube"
-                embed.add_field(
-                    name="🔗 Forrás",
-                    value=source_type,
-                    inline=True
-                )
-                
-                # Várólista hossz
-                remaining = len(self.queues[guild_id])
-                if remaining > 0:
-                    embed.add_field(
-                        name="📋 Várólista",
-                        value=f"Még {remaining} szám vár",
-                        inline=True
-                    )
-                
-                # Csatorna keresése az értesítéshez
-                for channel in guild.text_channels:
-                    if channel.permissions_for(guild.me).send_messages:
-                        try:
-                            await channel.send(embed=embed)
-                            break
-                        except:
-                            continue
-                
+                # Stream URL (az előre feloldott eredményt használjuk, ha van)
+                source = await self.open_source(guild.id, queue_item)
+            except asyncio.CancelledError:
+                raise
+            except TrackUnavailable as e:
+                # Törölt / privát videó: újrapróbálni felesleges
+                error = e
+                break
             except Exception as e:
-                print(f"Hiba a következő szám lejátszása során: {e}")
-                
-                # Részletes hibaüzenet
-                error_embed = discord.Embed(
-                    title="❌ Hiba a lejátszás során!",
-                    description=f"**{queue_item['title']}** nem játszható le!\n\n"
-                               f"**Hiba:** {str(e)}\n\n"
-                               "**Próbáljuk meg a következő számot...**",
-                    color=0xff0000
-                )
-                
-                # Csatorna keresése a hibaüzenethez
-                for channel in guild.text_channels:
-                    if channel.permissions_for(guild.me).send_messages:
-                        try:
-                            await channel.send(embed=error_embed)
-                            break
-                        except:
-                            continue
-                
-                # Próbáljuk meg a következő számot
-                await self.play_next(guild)
+                error = e
+                print(f"Nem sikerült elindítani ({attempt + 1}/{PLAYBACK_MAX_ATTEMPTS}): {queue_item.title}: {e}")
                 
+                # Az FFmpeg indítása nem sikerült - lehet, hogy eltűnt vagy frissült
+                if isinstance(e, discord.ClientException):
+                    await self.reprobe_ffmpeg()
+                # A következő próbálkozás friss stream URL-lel indul
+                await self.invalidate_stream(queue_item)
+                continue
+            
+            if not self.tell_actor(guild, self.start_playback, guild, queue_item, source):
+                source.cleanup()  # Közben kiléptünk
+            return
+        
+        self.tell_actor(guild, self.playback_failed, guild, queue_item, error)
+    
+    async def start_playback(self, guild, queue_item: Track, prepared: ReadAheadSource):
+        """Elindított FFmpeg forrás lejátszása (az actorban fut)"""
+        guild_id = guild.id
+        voice_client = self.voice_clients.get(guild_id)
+        
+        # A feloldás közben leállították, kiléptünk, vagy már más szól
+        if (self.now_playing.get(guild_id) is not queue_item or voice_client is None
+                or voice_client.is_playing() or voice_client.is_paused()):
+            prepared.cleanup()
+            return
+        
+        # Zene lejátszása
+        try:
+            prepared.claim()
+            source = GaplessSource(
+                prepared,
+                queue_item,
+                queue_item.duration,
+                prespawn_seconds=GAPLESS_PRESPAWN_SECONDS,
+                crossfade_seconds=CROSSFADE_SECONDS if GAPLESS_PLAYBACK else 0,
+                on_near_end=(lambda track: self.bot.loop.call_soon_threadsafe(self.schedule_prepare, guild, track))
+                if GAPLESS_PLAYBACK else None,
+                on_advance=lambda track: self.bot.loop.call_soon_threadsafe(self.schedule_advance, guild, track),
+                on_transition=self.record_transition,
+                previous_end=self.track_ended_at.pop(guild_id, None),
+                volume=self.volume_of(guild_id)
+            )
+            self.gapless_sources[guild_id] = source
+            
+            # Opus forrásnál a hangkliens nem hoz létre kódolót, de nem egységnyi hangerőn PCM-et kap
+            if not voice_client.encoder:
+                voice_client.encoder = discord.opus.Encoder(bitrate=OPUS_BITRATE)
+            voice_client.play(source, after=lambda e: self.after_playback(guild, source, e))
         except Exception as e:
-            print(f"Hiba a play_next során: {e}")
-            self.now_playing[guild_id] = None
+            prepared.cleanup()
+            self.tell_actor(guild, self.playback_failed, guild, queue_item, e)
+            return
+        
+        # A következő számok feloldása, amíg ez szól
+        self.schedule_prefetch(guild_id)
+        await self.note_play(queue_item)
+        
+        await self.report_skipped(guild)
+        await self.announce_now_playing(guild, queue_item)
+    
+    async def playback_failed(self, guild, queue_item: Track, error: Exception):
+        """Egy szám többszöri próbálkozásra sem indult el: kihagyjuk (az actorban fut)"""
+        guild_id = guild.id
+        if self.now_playing.get(guild_id) is not queue_item:
+            return
+        
+        print(f"Kihagyott szám: {queue_item.title}: {error}")
+        self.skipped_tracks.setdefault(guild_id, []).append(queue_item.title)
+        self.now_playing[guild_id] = None
+        
+        # Nem rekurzívan: a következő szám külön üzenetként kerül a postafiókba
+        self.tell_actor(guild, self.play_next, guild)
+    
+    async def playback_halted(self, guild, queue_item: Track):
+        """Nincs FFmpeg: a szám visszakerül a várólista elejére, a lejátszás leáll (az actorban fut)"""
+        guild_id = guild.id
+        if self.now_playing.get(guild_id) is not queue_item:
+            return
+        
+        self.now_playing[guild_id] = None
+        queue = self.queues.get(guild_id)
+        if queue is not None:
+            # Összevont duplikátumnál az elem még elöl van, csak az ismétlést adjuk vissza
+            if queue and queue[0] is queue_item:
+                queue.add_play(queue_item, queue_item.requester_id)
+            else:
+                queue.appendleft(queue_item)
+        
+        embed = discord.Embed(
+            title="❌ FFmpeg nincs telepítve!",
+            description=f"**{queue_item.title}** nem indítható el, a lejátszás leállt. "
+                        "A várólista megmaradt - az FFmpeg telepítése után a `/music play` folytatja.",
+            color=COLORS['ERROR']
+        )
+        
+        # Csatorna keresése az értesítéshez
+        for channel in guild.text_channels:
+            if channel.permissions_for(guild.me).send_messages:
+                try:
+                    await channel.send(embed=embed)
+                    break
+                except:
+                    continue
+    
+    async def report_skipped(self, guild, halted: bool = False):
+        """Összevont értesítés a kihagyott számokról (számonkénti hibaüzenetek helyett)"""
+        skipped = self.skipped_tracks.pop(guild.id, None)
+        if not skipped:
+            return
+        
+        lines = [f"• {title}" for title in skipped[:10]]
+        if len(skipped) > 10:
+            lines.append(f"... és még {len(skipped) - 10}")
+        
+        embed = discord.Embed(
+            title=f"⚠️ {len(skipped)} szám kimaradt",
+            description="Ezeket többszöri próbálkozásra sem sikerült lejátszani:\n" + "\n".join(lines),
+            color=COLORS['WARNING']
+        )
+        if halted:
+            embed.add_field(
+                name="⏹️ Lejátszás leállítva",
+                value="Túl sok szám hibázott egymás után. A várólista megmaradt, a következő `/music play` után folytatódik.",
+                inline=False
+            )
+        
+        # Csatorna keresése az értesítéshez
+        for channel in guild.text_channels:
+            if channel.permissions_for(guild.me).send_messages:
+                try:
+                    await channel.send(embed=embed)
+                    break
+                except:
+                    continue
     
+    @serialized
     async def skip(self, interaction: discord.Interaction) -> bool:
         """Következő szám"""
         guild_id = interaction.guild.id
@@ -813,8 +1857,13 @@ class MusicPlayer:
         
         voice_client = self.voice_clients[guild_id]
         
-        if voice_client.is_playing():
-            voice_client.stop()
+        if voice_client.is_playing() or (self.now_playing.get(guild_id) and not voice_client.is_paused()):
+            if voice_client.is_playing():
+                voice_client.stop()
+            else:
+                # Még indul (újrapróbálás alatt) - a feloldó task látja, hogy már nem aktuális
+                self.now_playing[guild_id] = None
+                self.actor(interaction.guild).tell(self.play_next, interaction.guild)
             embed = discord.Embed(
                 title="⏭️ Kihagyva!",
                 description="A jelenlegi szám kihagyva!",
@@ -831,6 +1880,7 @@ class MusicPlayer:
             await interaction.response.send_message(embed=embed)
             return False
     
+    @serialized
     async def pause(self, interaction: discord.Interaction) -> bool:
         """Szüneteltetés"""
         guild_id = interaction.guild.id
@@ -864,6 +1914,7 @@ class MusicPlayer:
             await interaction.response.send_message(embed=embed)
             return False
     
+    @serialized
     async def resume(self, interaction: discord.Interaction) -> bool:
         """Folytatás"""
         guild_id = interaction.guild.id
@@ -897,6 +1948,7 @@ class MusicPlayer:
             await interaction.response.send_message(embed=embed)
             return False
     
+    @serialized
     async def stop(self, interaction: discord.Interaction) -> bool:
         """Leállítás"""
         guild_id = interaction.guild.id
@@ -912,10 +1964,14 @@ class MusicPlayer:
         
         voice_client = self.voice_clients[guild_id]
         
-        if voice_client.is_playing() or voice_client.is_paused():
-            voice_client.stop()
+        if voice_client.is_playing() or voice_client.is_paused() or self.now_playing.get(guild_id):
             self.queues[guild_id].clear()
+            self.bump_generation(guild_id)
+            self.cancel_prefetch(guild_id)
+            self.discard_prepared(guild_id)
             self.now_playing[guild_id] = None
+            self.skipped_tracks.pop(guild_id, None)
+            voice_client.stop()
             
             embed = discord.Embed(
                 title="⏹️ Leállítva!",
@@ -933,6 +1989,7 @@ class MusicPlayer:
             await interaction.response.send_message(embed=embed)
             return False
     
+    @serialized
     async def set_volume(self, interaction: discord.Interaction, volume: int) -> bool:
         """Hangerej beállítása"""
         guild_id = interaction.guild.id
@@ -955,42 +2012,188 @@ class MusicPlayer:
             await interaction.response.send_message(embed=embed)
             return False
         
-        voice_client = self.voice_clients[guild_id]
+        self.apply_volume(interaction.guild, volume / 100.0)
         
-        if voice_client.source and hasattr(voice_client.source, 'volume'):
-            voice_client.source.volume = volume / 100.0
-            
+        embed = discord.Embed(
+            title="🔊 Hangerej!",
+            description=f"A hangerej beállítva: **{volume}%**",
+            color=0x00ff00
+        )
+        await interaction.response.send_message(embed=embed)
+        return True
+    
+    @serialized
+    async def adjust_volume(self, interaction: discord.Interaction, step: float) -> bool:
+        """Hangerej léptetése (a lejátszó gombjai)"""
+        guild_id = interaction.guild.id
+        
+        if guild_id not in self.voice_clients:
             embed = discord.Embed(
-                title="🔊 Hangerej!",
-                description=f"A hangerej beállítva: **{volume}%**",
-                color=0x00ff00
+                title="❌ Hiba!",
+                description="A bot nincs hangcsatornában!",
+                color=0xff0000
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return False
+        
+        new_volume = round(max(0.0, min(2.0, self.volume_of(guild_id) + step)), 2)
+        self.apply_volume(interaction.guild, new_volume)
+        
+        embed = discord.Embed(
+            title="🔊 Hangerej növelve" if step > 0 else "🔉 Hangerej csökkentve",
+            description=f"Új hangerej: {int(new_volume * 100)}%",
+            color=0x00ff00
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return True
+    
+    def apply_volume(self, guild, volume: float):
+        """Hangerő mentése és alkalmazása a szóló számra"""
+        guild_id = guild.id
+        self.volumes[guild_id] = volume
+        
+        gapless = self.gapless_sources.get(guild_id)
+        queue_item = self.now_playing.get(guild_id)
+        if gapless is None or queue_item is None:
+            return
+        
+        # A következő kerettől érvényes, a forrás újraindítása nélkül
+        gapless.volume = volume
+    
+    async def restart_current(self, guild, queue_item: Track, gapless: GaplessSource, position: float,
+                              catch_up: bool = True) -> bool:
+        """A szóló szám FFmpeg forrásának újraindítása egy pozíciótól, keret határon cserélve
+
+        A már feloldott (gyorsítótárazott) stream URL-t vagy a helyi fájlt használja, új keresés nélkül.
+        """
+        guild_id = guild.id
+        try:
+            source = await self.open_source(guild_id, queue_item, start=position)
+        except Exception as e:
+            print(f"Hiba a forrás újraindítása során ({queue_item.title}): {e}")
+            return False
+        
+        # Közben váltottunk vagy leálltunk
+        if self.gapless_sources.get(guild_id) is not gapless or gapless.track is not queue_item:
+            source.cleanup()
+            return False
+        
+        gapless.replace_current(source, queue_item, position, catch_up)
+        return True
+    
+    def playback_position(self, guild_id: int) -> Optional[float]:
+        """A szóló szám lejátszási pozíciója másodpercben (ha ismert)"""
+        gapless = self.gapless_sources.get(guild_id)
+        queue_item = self.now_playing.get(guild_id)
+        if gapless is None or queue_item is None or gapless.track is not queue_item:
+            return None
+        return gapless.position
+    
+    async def seek(self, interaction: discord.Interaction, position: str) -> bool:
+        """Tekerés a szóló számban (az FFmpeg újraindul `-ss` kapcsolóval, a feloldott stream URL-en)"""
+        guild_id = interaction.guild.id
+        
+        if guild_id not in self.voice_clients:
+            embed = discord.Embed(
+                title="❌ Hiba!",
+                description="Nem vagyok hangcsatornában!",
+                color=0xff0000
             )
             await interaction.response.send_message(embed=embed)
-            return True
-        else:
+            return False
+        
+        queue_item = self.now_playing.get(guild_id)
+        gapless = self.gapless_sources.get(guild_id)
+        if self.playback_position(guild_id) is None:
             embed = discord.Embed(
                 title="❌ Hiba!",
-                description="Nem sikerült beállítani a hangerejt!",
+                description="Jelenleg nincs zene lejátszásban!",
                 color=0xff0000
             )
             await interaction.response.send_message(embed=embed)
             return False
-    
-    async def show_queue(self, interaction: discord.Interaction) -> bool:
-        """Várólista megjelenítése"""
-        guild_id = interaction.guild.id
         
-        if guild_id not in self.queues:
+        seconds = parse_timestamp(position)
+        if seconds is None:
             embed = discord.Embed(
                 title="❌ Hiba!",
-                description="Nem vagyok hangcsatornában!",
+                description="Érvénytelen pozíció! Példa: `1:30` vagy `90`",
                 color=0xff0000
             )
             await interaction.response.send_message(embed=embed)
             return False
         
-        queue = self.queues[guild_id]
+        if queue_item.duration and seconds >= queue_item.duration:
+            embed = discord.Embed(
+                title="❌ Hiba!",
+                description=f"A szám csak {format_timestamp(queue_item.duration)} hosszú!",
+                color=0xff0000
+            )
+            await interaction.response.send_message(embed=embed)
+            return False
+        
+        # Az FFmpeg indulása eltarthat egy ideig
+        await interaction.response.defer()
+        
+        # A válasz alatt a szám véget érhetett: az ellenőrzés és az előkészített szám eldobása az actorban fut
+        actor = self.actors.get(guild_id)
+        if actor is None or not await actor.call(self._prepare_seek, guild_id, queue_item, gapless):
+            embed = discord.Embed(
+                title="❌ Hiba!",
+                description="Nem sikerült a tekerés! Közben véget ért a szám.",
+                color=0xff0000
+            )
+            await interaction.followup.send(embed=embed)
+            return False
+        
+        # Nem az actorban fut: a forrás indulása alatt a többi parancs is feldolgozható
+        if await self.restart_current(interaction.guild, queue_item, gapless, seconds, catch_up=False):
+            embed = discord.Embed(
+                title="⏩ Tekerés!",
+                description=f"**{queue_item.title}**\nPozíció: **{format_timestamp(seconds)}**",
+                color=0x00ff00
+            )
+            await interaction.followup.send(embed=embed)
+            return True
+        
+        embed = discord.Embed(
+            title="❌ Hiba!",
+            description="Nem sikerült a tekerés! Lehet, hogy közben véget ért a szám.",
+            color=0xff0000
+        )
+        await interaction.followup.send(embed=embed)
+        return False
+    
+    def _prepare_seek(self, guild_id: int, queue_item: Track, gapless: GaplessSource) -> bool:
+        """Tekerés előtt (az actorban): még ez a szám szól-e, és az előkészített következő eldobása"""
+        if (self.gapless_sources.get(guild_id) is not gapless or gapless.track is not queue_item
+                or self.now_playing.get(guild_id) is not queue_item):
+            return False
+        
+        # A szám vége előtt már előkészített következő szám a tekerés után túl korán indult volna
+        # (visszatekerésnél percekig állna a puffere) - a szám vége felé újra előkészül
+        self.discard_prepared(guild_id)
+        return True
+    
+    def queue_page_count(self, guild_id: int) -> int:
+        """Várólista oldalak száma (legalább 1)"""
+        queue = self.queues.get(guild_id) or ()
+        return max(1, -(-len(queue) // QUEUE_PAGE_SIZE))
+    
+    def render_queue_page(self, guild_id: int, page: int) -> discord.Embed:
+        """Egy várólista oldal embedje - a várólista változásáig gyorsítótárazva"""
+        queue = self.queues.get(guild_id) or TrackQueue()
         now_playing = self.now_playing.get(guild_id)
+        page = max(0, min(page, self.queue_page_count(guild_id) - 1))
+        
+        # Csak a várólista vagy az aktuális szám változása érvényteleníti a kész oldalakat
+        key = (id(queue), queue.version, now_playing.uid if now_playing else None)
+        cached_key, pages = self.queue_pages.get(guild_id, (None, {}))
+        if cached_key != key:
+            pages = {}
+            self.queue_pages[guild_id] = (key, pages)
+        if page in pages:
+            return pages[page]
         
         embed = discord.Embed(
             title="📋 Várólista",
@@ -999,13 +2202,13 @@ class MusicPlayer:
         
         if now_playing:
             # Forrás típus meghatározása
-            source_type = "🎵 Spotify" if 'spotify' in str(now_playing.get('type', '')).lower() else "📺 YouTube"
+            source_type = "🎵 Spotify" if now_playing.is_spotify else "📺 YouTube"
             
-            now_playing_text = f"**{now_playing['title']}**\n{source_type}"
+            now_playing_text = f"**{now_playing.title}**\n{source_type}"
             
             # Spotify link hozzáadása (ha van)
-            if now_playing.get('spotify_url'):
-                now_playing_text += f"\n[🎵 Spotify Link]({now_playing['spotify_url']})"
+            if now_playing.spotify_url:
+                now_playing_text += f"\n[🎵 Spotify Link]({now_playing.spotify_url})"
             
             embed.add_field(
                 name="🎵 Most játszik",
@@ -1014,27 +2217,41 @@ class MusicPlayer:
             )
         
         if queue:
-            queue_text = ""
-            for i, item in enumerate(queue[:10], 1):  # Csak az első 10 elem
-                duration = f" ({item['duration']//60}:{item['duration']%60:02d})" if item.get('duration') else ""
-                source_type = "🎵" if 'spotify' in str(item.get('type', '')).lower() else "📺"
+            lines = []
+            # Csak a látható oldal elemeit kérjük le az indexelt várólistából
+            for i, item in enumerate(queue.page(page, QUEUE_PAGE_SIZE), page * QUEUE_PAGE_SIZE + 1):
+                duration = f" ({item.duration//60}:{item.duration%60:02d})" if item.duration else ""
+                source_type = "🎵" if item.is_spotify else "📺"
                 
-                item_text = f"{i}. {source_type} **{item['title']}**{duration}"
+                item_text = f"{i}. {source_type} **{item.title}**{duration}"
+                if item.plays > 1:
+                    item_text += f" ×{item.plays}"
                 
                 # Spotify link hozzáadása (ha van)
-                if item.get('spotify_url'):
-                    item_text += f" - [🎵 Spotify]({item['spotify_url']})"
+                if item.spotify_url:
+                    item_text += f" - [🎵 Spotify]({item.spotify_url})"
                 
-                queue_text += item_text + "\n"
+                lines.append(item_text)
             
-            if len(queue) > 10:
-                queue_text += f"\n... és még {len(queue) - 10} szám"
+            # Egész sorokat adunk hozzá a mező 1024 karakteres korlátjáig - vágással egy markdown
+            # link (vagy félkövér cím) félbemaradna; a kimaradó sorok számához helyet hagyunk
+            value = ""
+            shown = 0
+            for line in lines:
+                candidate = f"{value}\n{line}" if value else line
+                if len(candidate) > 1024 - 40:
+                    break
+                value = candidate
+                shown += 1
+            if shown < len(lines):
+                value += ("\n" if value else "") + f"... és még {len(lines) - shown} szám ezen az oldalon"
             
             embed.add_field(
                 name=f"⏭️ Következő ({len(queue)} szám)",
-                value=queue_text,
+                value=value,
                 inline=False
             )
+            embed.set_footer(text=f"{page + 1}. oldal / {self.queue_page_count(guild_id)}")
         else:
             embed.add_field(
                 name="⏭️ Következő",
@@ -1042,7 +2259,27 @@ class MusicPlayer:
                 inline=False
             )
         
-        await interaction.response.send_message(embed=embed)
+        pages[page] = embed
+        return embed
+    
+    async def show_queue(self, interaction: discord.Interaction, view: Optional[discord.ui.View] = None) -> bool:
+        """Várólista megjelenítése (első oldal, lapozó gombokkal, ha a hívó ad nézetet)"""
+        guild_id = interaction.guild.id
+        
+        if guild_id not in self.queues:
+            embed = discord.Embed(
+                title="❌ Hiba!",
+                description="Nem vagyok hangcsatornában!",
+                color=0xff0000
+            )
+            await interaction.response.send_message(embed=embed)
+            return False
+        
+        embed = self.render_queue_page(guild_id, 0)
+        if view is not None and self.queue_page_count(guild_id) > 1:
+            await interaction.response.send_message(embed=embed, view=view)
+        else:
+            await interaction.response.send_message(embed=embed)
         return True
     
     async def show_now_playing(self, interaction: discord.Interaction) -> bool:
@@ -1061,51 +2298,59 @@ class MusicPlayer:
         now_playing = self.now_playing[guild_id]
         
         # Forrás típus meghatározása
-        source_type = "🎵 Spotify" if 'spotify' in str(now_playing.get('type', '')).lower() else "📺 YouTube"
-        embed_color = COLORS['SPOTIFY'] if 'spotify' in str(now_playing.get('type', '')).lower() else COLORS['SUCCESS']
+        source_type = "🎵 Spotify" if now_playing.is_spotify else "📺 YouTube"
+        embed_color = COLORS['SPOTIFY'] if now_playing.is_spotify else COLORS['SUCCESS']
         
         embed = discord.Embed(
             title="🎵 Most játszik",
-            description=f"**{now_playing['title']}**",
+            description=f"**{now_playing.title}**",
             color=embed_color
         )
         
-        if now_playing['thumbnail']:
-            embed.set_thumbnail(url=now_playing['thumbnail'])
+        if now_playing.thumbnail:
+            embed.set_thumbnail(url=now_playing.thumbnail)
         
         # Előadó/Uploader információ
-        if now_playing.get('artist'):
+        if now_playing.artist:
             embed.add_field(
                 name="👤 Előadó",
-                value=now_playing['artist'],
+                value=now_playing.artist,
                 inline=True
             )
-        elif now_playing.get('uploader'):
+        elif now_playing.uploader:
             embed.add_field(
                 name="👤 Feltöltő",
-                value=now_playing['uploader'],
+                value=now_playing.uploader,
                 inline=True
             )
         
         # Album információ (Spotify esetén)
-        if now_playing.get('album'):
+        if now_playing.album:
             embed.add_field(
                 name="💿 Album",
-                value=now_playing['album'],
+                value=now_playing.album,
                 inline=True
             )
         
-        if now_playing.get('duration'):
-            duration = f"{now_playing['duration']//60}:{now_playing['duration']%60:02d}"
+        if now_playing.duration:
+            duration = f"{now_playing.duration//60}:{now_playing.duration%60:02d}"
             embed.add_field(
                 name="⏱️ Hossz",
                 value=duration,
                 inline=True
             )
         
+        position = self.playback_position(guild_id)
+        if position is not None:
+            embed.add_field(
+                name="▶️ Pozíció",
+                value=format_timestamp(position),
+                inline=True
+            )
+        
         embed.add_field(
             name="👤 Kérte",
-            value=now_playing['requester'].mention,
+            value=now_playing.requester_mention,
             inline=True
         )
         
@@ -1117,16 +2362,17 @@ class MusicPlayer:
         )
         
         # Spotify link megjelenítése (ha van)
-        if now_playing.get('spotify_url'):
+        if now_playing.spotify_url:
             embed.add_field(
                 name="🎵 Spotify Link",
-                value=f"[Nyisd meg Spotify-on]({now_playing['spotify_url']})",
+                value=f"[Nyisd meg Spotify-on]({now_playing.spotify_url})",
                 inline=False
             )
         
         # Az üzenetet a parancs küldi el, nem itt
         return True
     
+    @serialized
     async def clear_queue(self, interaction: discord.Interaction) -> bool:
         """Várólista törlése"""
         guild_id = interaction.guild.id
@@ -1142,6 +2388,9 @@ class MusicPlayer:
         
         queue_length = len(self.queues[guild_id])
         self.queues[guild_id].clear()
+        self.bump_generation(guild_id)
+        self.cancel_prefetch(guild_id)
+        self.discard_prepared(guild_id)
         
         embed = discord.Embed(
             title="🗑️ Várólista törölve!",
@@ -1150,3 +2399,200 @@ class MusicPlayer:
         )
         await interaction.response.send_message(embed=embed)
         return True
+    
+    def queue_changed(self, guild_id: int):
+        """A várólista átrendezése után: elavult előkészítés eldobása, előre feloldás frissítése"""
+        item, source = self.prepared_sources.get(guild_id, (None, None))
+        queue = self.queues.get(guild_id)
+        if item is not None and (not queue or queue[0] is not item):
+            self.discard_prepared(guild_id)
+        self.schedule_prefetch(guild_id)
+    
+    async def _check_position(self, interaction: discord.Interaction, *positions: int) -> bool:
+        """Várólista pozíció(k) ellenőrzése (1-től számozva), hiba esetén üzenettel"""
+        queue = self.queues.get(interaction.guild.id)
+        if queue is None:
+            description = "Nem vagyok hangcsatornában!"
+        elif not queue:
+            description = "A várólista üres!"
+        elif any(not 1 <= position <= len(queue) for position in positions):
+            description = f"Érvénytelen pozíció! (1-{len(queue)})"
+        else:
+            return True
+        
+        embed = discord.Embed(
+            title="❌ Hiba!",
+            description=description,
+            color=0xff0000
+        )
+        await interaction.response.send_message(embed=embed)
+        return False
+    
+    @serialized
+    async def remove_track(self, interaction: discord.Interaction, position: int) -> bool:
+        """Szám eltávolítása a várólistából pozíció alapján"""
+        if not await self._check_position(interaction, position):
+            return False
+        
+        guild_id = interaction.guild.id
+        track = self.queues[guild_id].pop(position - 1)
+        self.queue_changed(guild_id)
+        
+        embed = discord.Embed(
+            title="🗑️ Eltávolítva!",
+            description=f"**{track.title}** eltávolítva a várólistából!",
+            color=0x00ff00
+        )
+        await interaction.response.send_message(embed=embed)
+        return True
+    
+    @serialized
+    async def move_track(self, interaction: discord.Interaction, source: int, destination: int) -> bool:
+        """Szám áthelyezése a várólistában"""
+        if not await self._check_position(interaction, source, destination):
+            return False
+        
+        guild_id = interaction.guild.id
+        track = self.queues[guild_id].move(source - 1, destination - 1)
+        self.queue_changed(guild_id)
+        
+        embed = discord.Embed(
+            title="↕️ Áthelyezve!",
+            description=f"**{track.title}** áthelyezve: {source}. → {destination}. pozíció",
+            color=0x00ff00
+        )
+        await interaction.response.send_message(embed=embed)
+        return True
+    
+    @serialized
+    async def skip_to(self, interaction: discord.Interaction, position: int) -> bool:
+        """Ugrás a várólista adott pozíciójára (az előtte lévő számok kimaradnak)"""
+        if not await self._check_position(interaction, position):
+            return False
+        
+        guild_id = interaction.guild.id
+        dropped = self.queues[guild_id].skip_to(position - 1)
+        self.queue_changed(guild_id)
+        track = self.queues[guild_id][0]
+        
+        embed = discord.Embed(
+            title="⏭️ Ugrás!",
+            description=f"**{dropped}** szám kihagyva, következik: **{track.title}**",
+            color=0x00ff00
+        )
+        await interaction.response.send_message(embed=embed)
+        
+        # A jelenlegi szám leállítása - a lejátszás vége indítja a várólista új elejét
+        voice_client = self.voice_clients.get(guild_id)
+        if voice_client and (voice_client.is_playing() or voice_client.is_paused()):
+            voice_client.stop()
+        elif voice_client:
+            self.request_play(interaction.guild)
+        return True
+    
+    @serialized
+    async def set_dedup_mode(self, interaction: discord.Interaction, mode: str) -> bool:
+        """Duplikátum kezelés beállítása: 'allow', 'skip' vagy 'collapse'"""
+        descriptions = {
+            'allow': "A duplikátumok újra bekerülnek a várólistára.",
+            'skip': "A várólistán már szereplő számok nem kerülnek be újra.",
+            'collapse': "A duplikátumok összevonódnak: a meglévő elem többször szól, egyszer feloldva."
+        }
+        if mode not in descriptions:
+            embed = discord.Embed(
+                title="❌ Hiba!",
+                description="Érvénytelen mód! (allow, skip, collapse)",
+                color=0xff0000
+            )
+            await interaction.response.send_message(embed=embed)
+            return False
+        
+        self.dedup_modes[interaction.guild.id] = mode
+        embed = discord.Embed(
+            title="🔁 Duplikátum kezelés",
+            description=f"Mód: **{mode}**\n{descriptions[mode]}",
+            color=0x00ff00
+        )
+        await interaction.response.send_message(embed=embed)
+        return True
+    
+    async def show_stats(self, interaction: discord.Interaction) -> bool:
+        """Teljesítmény statisztikák megjelenítése"""
+        # A COUNT lekérdezések sem futnak az event loopon
+        cache_stats = await asyncio.to_thread(self.resolution_cache.stats)
+        spotify_stats = await asyncio.to_thread(self.spotify_cache.stats)
+        audio_stats = await asyncio.to_thread(self.audio_cache.stats) if self.audio_cache else None
+        
+        embed = discord.Embed(
+            title="📈 Statisztika",
+            color=COLORS['INFO']
+        )
+        
+        embed.add_field(
+            name="🗄️ Keresési gyorsítótár",
+            value=f"Találat: **{cache_stats['hits']}**\n"
+                  f"Hiány: **{cache_stats['misses']}**\n"
+                  f"Stream URL frissítés: **{cache_stats['refreshes']}**\n"
+                  f"Találati arány: **{cache_stats['hit_rate']:.0%}**\n"
+                  f"Bejegyzések: **{cache_stats['entries']}**\n"
+                  f"Spotify párosítások: **{cache_stats['matches']}** (újrahasznosítva: {cache_stats['match_hits']})",
+            inline=True
+        )
+        
+        # Várólisták együttes mérete a globális korlátokhoz képest
+        embed.add_field(
+            name="📋 Várólisták",
+            value=f"Számok: **{self.queue_usage.count}** / {MAX_TOTAL_QUEUE_SIZE}\n"
+                  f"Memória: **{self.queue_usage.memory / (1024 * 1024):.1f}** / {MAX_QUEUE_MEMORY_MB} MB",
+            inline=True
+        )
+        
+        # Spotify gyorsítótár és API használat
+        spotify_text = (f"Találat: **{spotify_stats['hits']}**\n"
+                        f"Hiány: **{spotify_stats['misses']}**\n"
+                        f"Bejegyzések: **{spotify_stats['entries']}** "
+                        f"(memóriában {spotify_stats['memory_entries']}, {spotify_stats['memory_bytes'] // 1024} KB)")
+        if self.spotify:
+            spotify_text += (f"\nAPI kérések: **{self.spotify.requests}**\n"
+                             f"Rate limit (429): **{self.spotify.rate_limited}**")
+        embed.add_field(
+            name="🎵 Spotify gyorsítótár",
+            value=spotify_text,
+            inline=True
+        )
+        
+        if audio_stats:
+            embed.add_field(
+                name="💾 Helyi hang gyorsítótár",
+                value=f"Fájlok: **{audio_stats['files']}** ({audio_stats['size_mb']:.0f} MB)\n"
+                      f"Helyből indítva: **{audio_stats['hits']}**\n"
+                      f"Mentés folyamatban: **{audio_stats['pending']}**",
+                inline=True
+            )
+        
+        # Számváltási szünetek (ms)
+        if self.transition_gaps:
+            gaps = [gap for gap, _ in self.transition_gaps]
+            gapless_count = sum(1 for _, gapless in self.transition_gaps if gapless)
+            embed.add_field(
+                name="🎚️ Számváltás",
+                value=f"Utolsó: **{gaps[-1]:.0f} ms**\n"
+                      f"Átlag: **{sum(gaps) / len(gaps):.0f} ms**\n"
+                      f"Maximum: **{max(gaps):.0f} ms**\n"
+                      f"Szünetmentes: **{gapless_count}/{len(gaps)}**",
+                inline=True
+            )
+        
+        output_text = "Opus (FFmpeg kódol)" if self.opus_passthrough else "PCM (a bot kódol)"
+        shared = [stream for stream in self.shared_streams.values() if not stream.closed]
+        if shared:
+            listeners = sum(stream.listeners for stream in shared)
+            output_text += f"\nMegosztott streamek: **{len(shared)}** ({listeners} hallgató)"
+        embed.add_field(
+            name="🔊 Hang kimenet",
+            value=output_text,
+            inline=True
+        )
+        
+        await interaction.response.send_message(embed=embed)
+        return True
@@ -0,0 +1,287 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+# Találatkor a hozzáférési időket csak ennyi másodpercenként írjuk a lemezre (egy kötegben)
+ACCESS_FLUSH_INTERVAL = 60
+
+# YouTube videó azonosító kinyerése a gyakori URL formákból
+YOUTUBE_ID_PATTERN = re.compile(
+    r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/)|youtu\.be/)([A-Za-z0-9_-]{11})'
+)
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """YouTube videó azonosító kinyerése URL-ből"""
+    match = YOUTUBE_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def normalize_query(query: str) -> str:
+    """Keresési kifejezés / URL normalizálása gyorsítótár kulccsá"""
+    query = query.strip()
+    if query.startswith(('http://', 'https://')):
+        video_id = extract_video_id(query)
+        return f"yt:{video_id}" if video_id else query
+    return ' '.join(query.lower().split())
+
+
+def stream_url_expiry(url: str, default_ttl: int) -> float:
+    """Aláírt stream URL lejárati ideje (googlevideo `expire` paraméter alapján)"""
+    try:
+        expire = parse_qs(urlparse(url).query).get('expire')
+        if expire:
+            return float(expire[0])
+    except (ValueError, TypeError):
+        pass
+    return time.time() + default_ttl
+
+
+def is_opus_stream(url: str) -> bool:
+    """Opus hangot tartalmazó YouTube stream-e (itag / mime alapján) - ilyenkor nem kell újrakódolni"""
+    try:
+        params = parse_qs(urlparse(url).query)
+    except (ValueError, TypeError):
+        return False
+    if params.get('itag', [''])[0] in ('249', '250', '251'):
+        return True
+    return params.get('mime', [''])[0] == 'audio/webm'
+
+
+class ResolutionCache:
+    """Perzisztens (SQLite) gyorsítótár a YouTube keresési eredményekhez, LRU kiürítéssel"""
+
+    def __init__(self, path: str, max_entries: int, stream_ttl: int, refresh_margin: int):
+        self.max_entries = max_entries
+        self.stream_ttl = stream_ttl
+        self.refresh_margin = refresh_margin
+
+        # Statisztika
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.match_hits = 0
+
+        # Még ki nem írt hozzáférési idők: video_id -> időpont
+        self.pending_access: Dict[str, float] = {}
+        self.last_flush = time.time()
+
+        if path and path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                title TEXT,
+                duration INTEGER,
+                uploader TEXT,
+                thumbnail TEXT,
+                webpage_url TEXT,
+                stream_url TEXT,
+                stream_expires REAL,
+                last_access REAL
+            );
+            CREATE INDEX IF NOT EXISTS videos_last_access ON videos (last_access);
+            CREATE TABLE IF NOT EXISTS queries (
+                query TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS queries_video_id ON queries (video_id);
+            CREATE TABLE IF NOT EXISTS spotify_matches (
+                spotify_id TEXT PRIMARY KEY,
+                isrc TEXT,
+                video_id TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                matched_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS spotify_matches_isrc ON spotify_matches (isrc);
+        """)
+        self.db.commit()
+
+    def lookup(self, query: str) -> Tuple[Optional[Dict], bool]:
+        """Keresés a gyorsítótárban: (találat, friss-e a stream URL) - blokkoló, worker szálról hívandó"""
+        key = normalize_query(query)
+        now = time.time()
+
+        with self.lock:
+            row = self.db.execute(
+                """SELECT v.video_id, v.title, v.duration, v.uploader, v.thumbnail,
+                          v.webpage_url, v.stream_url, v.stream_expires
+                   FROM queries q JOIN videos v ON v.video_id = q.video_id
+                   WHERE q.query = ?""",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None, False
+
+            # A hozzáférési idő csak az LRU sorrendhez kell, kötegben írjuk ki
+            self.pending_access[row[0]] = now
+            if now - self.last_flush >= ACCESS_FLUSH_INTERVAL:
+                self._flush_access()
+                self.db.commit()
+
+        info = {
+            'id': row[0],
+            'title': row[1],
+            'duration': row[2],
+            'uploader': row[3],
+            'thumbnail': row[4],
+            'webpage_url': row[5],
+            'url': row[6],
+            'type': 'youtube'
+        }
+
+        # A metaadat hosszú életű, a stream URL viszont lejár
+        fresh = bool(row[6]) and row[7] - self.refresh_margin > now
+        if fresh:
+            self.hits += 1
+        else:
+            self.refreshes += 1
+        return info, fresh
+
+    def store(self, query: str, info: Dict):
+        """Feloldott videó mentése a gyorsítótárba (blokkoló)"""
+        video_id = info.get('id')
+        if not video_id:
+            return
+
+        stream_url = info.get('url')
+        expires = stream_url_expiry(stream_url, self.stream_ttl) if stream_url else 0
+        now = time.time()
+
+        with self.lock:
+            self.pending_access.pop(video_id, None)
+            # Metaadat-only (lapos keresési) eredmény nem írja felül a meglévő stream URL-t
+            self.db.execute(
+                """INSERT INTO videos
+                   (video_id, title, duration, uploader, thumbnail, webpage_url,
+                    stream_url, stream_expires, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (video_id) DO UPDATE SET
+                       title = excluded.title,
+                       duration = CASE WHEN excluded.duration > 0 THEN excluded.duration ELSE videos.duration END,
+                       uploader = COALESCE(excluded.uploader, videos.uploader),
+                       thumbnail = COALESCE(excluded.thumbnail, videos.thumbnail),
+                       webpage_url = COALESCE(excluded.webpage_url, videos.webpage_url),
+                       stream_url = COALESCE(excluded.stream_url, videos.stream_url),
+                       stream_expires = CASE WHEN excluded.stream_url IS NULL
+                                             THEN videos.stream_expires ELSE excluded.stream_expires END,
+                       last_access = excluded.last_access""",
+                (video_id, info.get('title'), info.get('duration') or 0, info.get('uploader'),
+                 info.get('thumbnail'), info.get('webpage_url'), stream_url, expires, now)
+            )
+            # A keresési kifejezés és a videó azonosító is ugyanarra a videóra mutat
+            for key in {normalize_query(query), f"yt:{video_id}"}:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO queries (query, video_id) VALUES (?, ?)",
+                    (key, video_id)
+                )
+            self._evict()
+            self.db.commit()
+
+    def invalidate_stream(self, video_id: Optional[str]):
+        """Stream URL elvetése (pl. ha az FFmpeg 403-at kapott rá), a metaadat megmarad"""
+        if not video_id:
+            return
+
+        with self.lock:
+            self.db.execute(
+                "UPDATE videos SET stream_url = NULL, stream_expires = 0 WHERE video_id = ?", (video_id,)
+            )
+            self.db.commit()
+
+    def get_match(self, spotify_id: Optional[str], isrc: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Korábban kiválasztott YouTube videó egy Spotify számhoz: (video_id, pontszám)"""
+        if not spotify_id and not isrc:
+            return None
+
+        with self.lock:
+            row = None
+            if spotify_id:
+                row = self.db.execute(
+                    "SELECT video_id, confidence FROM spotify_matches WHERE spotify_id = ?", (spotify_id,)
+                ).fetchone()
+            # Ugyanaz a felvétel más kiadványon (azonos ISRC)
+            if row is None and isrc:
+                row = self.db.execute(
+                    """SELECT video_id, confidence FROM spotify_matches WHERE isrc = ?
+                       ORDER BY confidence DESC LIMIT 1""",
+                    (isrc,)
+                ).fetchone()
+
+        if row is None:
+            return None
+        self.match_hits += 1
+        return row[0], row[1]
+
+    def store_match(self, spotify_id: Optional[str], isrc: Optional[str], video_id: str, confidence: float):
+        """Spotify szám -> YouTube videó párosítás mentése (blokkoló)"""
+        if not spotify_id or not video_id:
+            return
+
+        with self.lock:
+            self.db.execute(
+                """INSERT OR REPLACE INTO spotify_matches (spotify_id, isrc, video_id, confidence, matched_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (spotify_id, isrc, video_id, confidence, time.time())
+            )
+            self.db.commit()
+
+    def _flush_access(self):
+        """Összegyűlt hozzáférési idők kiírása egy kötegben (commit nélkül)"""
+        if self.pending_access:
+            self.db.executemany(
+                "UPDATE videos SET last_access = ? WHERE video_id = ?",
+                [(accessed, video_id) for video_id, accessed in self.pending_access.items()]
+            )
+            self.pending_access.clear()
+        self.last_flush = time.time()
+
+    def _evict(self):
+        """Legrégebben használt bejegyzések törlése a méretkorlát felett"""
+        # A kiürítési sorrendhez a friss hozzáférési idők kellenek
+        self._flush_access()
+        count = self.db.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+
+        self.db.execute(
+            """DELETE FROM videos WHERE video_id IN (
+                   SELECT video_id FROM videos ORDER BY last_access LIMIT ?)""",
+            (excess,)
+        )
+        self.db.execute("DELETE FROM queries WHERE video_id NOT IN (SELECT video_id FROM videos)")
+
+    def stats(self) -> Dict:
+        """Találat/hiány számlálók"""
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+            matches = self.db.execute("SELECT COUNT(*) FROM spotify_matches").fetchone()[0]
+        lookups = self.hits + self.misses + self.refreshes
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'entries': entries,
+            'matches': matches,
+            'match_hits': self.match_hits,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        """Függő hozzáférési idők kiírása, adatbázis kapcsolat lezárása"""
+        with self.lock:
+            self._flush_access()
+            self.db.commit()
+            self.db.close()
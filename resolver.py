@@ -0,0 +1,124 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+import yt_dlp
+
+# Véglegesen elérhetetlen videók yt-dlp hibaüzenetei - ezeket felesleges újrapróbálni
+UNAVAILABLE_MARKERS = (
+    'video unavailable', 'private video', 'has been removed', 'no longer available',
+    'account associated with this video has been terminated', 'copyright', 'members-only',
+    'confirm your age', 'not available in your country'
+)
+
+
+class TrackUnavailable(Exception):
+    """A videó véglegesen nem játszható le (törölt, privát, letiltott)"""
+
+
+def is_unavailable_error(error: Exception) -> bool:
+    """Végleges (nem hálózati / átmeneti) yt-dlp hiba-e"""
+    if not isinstance(error, yt_dlp.utils.DownloadError):
+        return False
+    message = str(error).lower()
+    return any(marker in message for marker in UNAVAILABLE_MARKERS)
+
+
+class ResolverPool:
+    """yt-dlp kinyerések futtatása dedikált szálkészletben, az event loop blokkolása nélkül"""
+
+    def __init__(self, max_workers: int, per_guild_limit: int):
+        self.max_workers = max(1, max_workers)
+        self.per_guild_limit = max(1, min(per_guild_limit, self.max_workers))
+
+        # A yt-dlp főleg hálózati I/O-t végez, ezért szálak is elegendőek
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='resolver'
+        )
+
+        # Globális korlát: egyszerre legfeljebb max_workers kinyerés fut
+        self.global_slots = asyncio.Semaphore(self.max_workers)
+        # Szerverenkénti korlát: egy szerver nem foglalhatja le az összes workert
+        self.guild_slots: Dict[Optional[int], asyncio.Semaphore] = {}
+
+    def _guild_semaphore(self, guild_id: Optional[int]) -> asyncio.Semaphore:
+        """Szerverhez tartozó szemafor (lustán létrehozva)"""
+        semaphore = self.guild_slots.get(guild_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_guild_limit)
+            self.guild_slots[guild_id] = semaphore
+        return semaphore
+
+    async def run(self, guild_id: Optional[int], func: Callable, *args):
+        """Blokkoló függvény futtatása a worker szálakon, méltányos sorrendben"""
+        # Előbb a szerver saját slotját foglaljuk, így a globális sorban
+        # minden szerver legfeljebb per_guild_limit kéréssel várakozik
+        async with self._guild_semaphore(guild_id):
+            async with self.global_slots:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, func, *args)
+
+    def shutdown(self):
+        """Szálkészlet leállítása"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class YoutubeDLPool:
+    """Előre létrehozott YoutubeDL példányok beállítás-profilonként, kölcsönzéssel újrahasznosítva"""
+
+    def __init__(self, profiles: Dict[str, Dict], size: int):
+        self.profiles = profiles
+        self.size = max(1, size)
+
+        # Egy példányt egyszerre csak egy szál használhat, ezért profilonként szabad listát tartunk
+        self.idle: Dict[str, queue.Queue] = {name: queue.Queue() for name in profiles}
+        self.created: Dict[str, int] = {name: 0 for name in profiles}
+        self.lock = threading.Lock()
+
+        # Profilonként egy példány azonnal, a többi igény szerint
+        for name in profiles:
+            self.idle[name].put(self._create(name))
+
+    def _create(self, profile: str) -> Optional[yt_dlp.YoutubeDL]:
+        """Új példány, ha a profil még nem érte el a méretkorlátot"""
+        with self.lock:
+            if self.created[profile] >= self.size:
+                return None
+            self.created[profile] += 1
+        try:
+            return yt_dlp.YoutubeDL(dict(self.profiles[profile]))
+        except Exception:
+            with self.lock:
+                self.created[profile] -= 1
+            raise
+
+    @contextmanager
+    def checkout(self, profile: str) -> Iterator[yt_dlp.YoutubeDL]:
+        """Példány kölcsönzése egy kinyerés idejére (blokkoló, worker szálon hívandó)"""
+        idle = self.idle[profile]
+        try:
+            ydl = idle.get_nowait()
+        except queue.Empty:
+            ydl = self._create(profile) or idle.get()
+
+        try:
+            yield ydl
+        finally:
+            idle.put(ydl)
+
+    def close(self):
+        """Szabad példányok lezárása (HTTP kapcsolatok, sütik)"""
+        for idle in self.idle.values():
+            while True:
+                try:
+                    ydl = idle.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    ydl.close()
+                except Exception:
+                    pass
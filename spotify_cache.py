@@ -0,0 +1,169 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Találatkor a hozzáférési időket csak ennyi másodpercenként írjuk a lemezre (egy kötegben)
+ACCESS_FLUSH_INTERVAL = 60
+
+
+class SpotifyCache:
+    """Spotify entitások (track/album/playlist) gyorsítótára: memóriában LRU, lemezen SQLite"""
+
+    def __init__(self, path: str, ttl: int, max_entries: int, memory_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_bytes = memory_bytes
+
+        # Memória réteg: kulcs -> (adat, snapshot, lekérés ideje, méret)
+        self.memory: "OrderedDict[str, Tuple[Dict, Optional[str], float, int]]" = OrderedDict()
+        self.memory_used = 0
+
+        # Statisztika
+        self.hits = 0
+        self.misses = 0
+
+        # Még ki nem írt hozzáférési idők: kulcs -> időpont
+        self.pending_access: Dict[str, float] = {}
+        self.last_flush = time.time()
+
+        if path and path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS spotify_entities (
+                key TEXT PRIMARY KEY,
+                snapshot TEXT,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS spotify_entities_last_access ON spotify_entities (last_access);
+        """)
+        self.db.commit()
+
+    def _remember(self, key: str, data: Dict, snapshot: Optional[str], fetched_at: float, size: int):
+        """Bejegyzés a memória rétegbe, a méretkorlát feletti legrégebbiek kiürítésével"""
+        old = self.memory.pop(key, None)
+        if old:
+            self.memory_used -= old[3]
+
+        if size > self.memory_bytes:
+            return
+
+        self.memory[key] = (data, snapshot, fetched_at, size)
+        self.memory_used += size
+        while self.memory_used > self.memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_used -= evicted[3]
+
+    def get(self, kind: str, entity_id: str) -> Optional[Tuple[Dict, Optional[str], float]]:
+        """Bejegyzés lekérése: (adat, snapshot, lekérés ideje) vagy None, ha nincs / lejárt"""
+        key = f"{kind}:{entity_id}"
+        now = time.time()
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry:
+                self.memory.move_to_end(key)
+                data, snapshot, fetched_at, _ = entry
+            else:
+                row = self.db.execute(
+                    "SELECT data, snapshot, fetched_at FROM spotify_entities WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                data, snapshot, fetched_at = json.loads(row[0]), row[1], row[2]
+                self._remember(key, data, snapshot, fetched_at, len(row[0]))
+
+            if fetched_at + self.ttl < now:
+                self.misses += 1
+                return None
+
+            # Nem írunk minden találatnál: a hozzáférési idő csak a lemezes LRU sorrendhez kell
+            self.pending_access[key] = now
+            if now - self.last_flush >= ACCESS_FLUSH_INTERVAL:
+                self._flush_access()
+                self.db.commit()
+
+        self.hits += 1
+        return data, snapshot, fetched_at
+
+    def put(self, kind: str, entity_id: str, data: Dict, snapshot: Optional[str] = None):
+        """Bejegyzés mentése (memória + lemez)"""
+        key = f"{kind}:{entity_id}"
+        now = time.time()
+        encoded = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+        with self.lock:
+            self._remember(key, data, snapshot, now, len(encoded))
+            self.pending_access.pop(key, None)
+            self.db.execute(
+                """INSERT OR REPLACE INTO spotify_entities (key, snapshot, data, fetched_at, last_access)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (key, snapshot, encoded, now, now)
+            )
+            self._evict()
+            self.db.commit()
+
+    def touch(self, kind: str, entity_id: str):
+        """Lekérési idő frissítése (pl. ha a playlist snapshot_id-je nem változott)"""
+        key = f"{kind}:{entity_id}"
+        now = time.time()
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry:
+                self.memory[key] = (entry[0], entry[1], now, entry[3])
+            self.db.execute("UPDATE spotify_entities SET fetched_at = ? WHERE key = ?", (now, key))
+            self.db.commit()
+
+    def _flush_access(self):
+        """Összegyűlt hozzáférési idők kiírása egy kötegben (commit nélkül)"""
+        if self.pending_access:
+            self.db.executemany(
+                "UPDATE spotify_entities SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self.pending_access.items()]
+            )
+            self.pending_access.clear()
+        self.last_flush = time.time()
+
+    def _evict(self):
+        """Lemezen a legrégebben használt bejegyzések törlése a méretkorlát felett"""
+        # A kiürítési sorrendhez a friss hozzáférési idők kellenek
+        self._flush_access()
+        count = self.db.execute("SELECT COUNT(*) FROM spotify_entities").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                """DELETE FROM spotify_entities WHERE key IN (
+                       SELECT key FROM spotify_entities ORDER BY last_access LIMIT ?)""",
+                (excess,)
+            )
+
+    def stats(self) -> Dict:
+        """Találat/hiány számlálók és méretek"""
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM spotify_entities").fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory_used
+        }
+
+    def close(self):
+        """Függő hozzáférési idők kiírása, adatbázis kapcsolat lezárása"""
+        with self.lock:
+            self._flush_access()
+            self.db.commit()
+            self.db.close()
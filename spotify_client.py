@@ -0,0 +1,239 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+
+import aiohttp
+
+SPOTIFY_API_BASE = 'https://api.spotify.com/v1'
+SPOTIFY_TOKEN_URL = 'https://accounts.spotify.com/api/token'
+
+
+class SpotifyError(Exception):
+    """Spotify API hiba"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Spotify API hiba ({status}): {message}")
+        self.status = status
+
+
+class SpotifyClient:
+    """Aszinkron Spotify Web API kliens (client credentials), közös HTTP kapcsolatkészlettel"""
+
+    # A /tracks végpont egyszerre legfeljebb ennyi azonosítót fogad
+    MAX_IDS_PER_REQUEST = 50
+
+    def __init__(self, client_id: str, client_secret: str, api_base: str = SPOTIFY_API_BASE,
+                 token_url: str = SPOTIFY_TOKEN_URL, max_connections: int = 10,
+                 max_retries: int = 5, batch_delay: float = 0.02):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_base = api_base.rstrip('/')
+        self.token_url = token_url
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.batch_delay = batch_delay
+
+        self.session: Optional[aiohttp.ClientSession] = None
+
+        # Client credentials token, lejáratig újrahasznosítva
+        self.token: Optional[str] = None
+        self.token_expires = 0.0
+        self.token_lock = asyncio.Lock()
+
+        # 429 esetén az összes szerver kérése közösen vár eddig (monotonic idő)
+        self.retry_until = 0.0
+
+        # Egyedi track lekérések összevonása a /tracks?ids= végpontra
+        self.pending_tracks: Dict[str, List[asyncio.Future]] = {}
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        # Futó összevont lekérések (referencia nélkül a task menet közben eltűnhet)
+        self.tasks: Set[asyncio.Task] = set()
+
+        # Statisztika
+        self.requests = 0
+        self.rate_limited = 0
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Közös HTTP munkamenet (lustán létrehozva, a futó event loopon)"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return self.session
+
+    async def _get_token(self) -> str:
+        """Access token lekérése, csak lejárat előtt kérünk újat"""
+        if self.token and self.token_expires - 60 > time.monotonic():
+            return self.token
+
+        async with self.token_lock:
+            # Közben egy másik kérés már megújíthatta
+            if self.token and self.token_expires - 60 > time.monotonic():
+                return self.token
+
+            session = await self._get_session()
+            async with session.post(
+                self.token_url,
+                data={'grant_type': 'client_credentials'},
+                auth=aiohttp.BasicAuth(self.client_id, self.client_secret)
+            ) as response:
+                if response.status != 200:
+                    raise SpotifyError(response.status, await response.text())
+                payload = await response.json()
+
+            self.token = payload['access_token']
+            self.token_expires = time.monotonic() + payload.get('expires_in', 3600)
+            return self.token
+
+    async def _request(self, url: str, params: Optional[Dict] = None) -> Dict:
+        """GET kérés újrapróbálással: 401 esetén új token, 429 esetén közös várakozás"""
+        if not url.startswith(('http://', 'https://')):
+            url = f"{self.api_base}/{url.lstrip('/')}"
+
+        # Az utolsó újrapróbált válasz státusza (429, 401 vagy 5xx) - ha elfogynak a próbálkozások, ezt jelezzük
+        last_status = 429
+        for attempt in range(self.max_retries):
+            wait = self.retry_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            token = await self._get_token()
+            session = await self._get_session()
+            self.requests += 1
+
+            try:
+                async with session.get(url, params=params, headers={'Authorization': f"Bearer {token}"}) as response:
+                    last_status = response.status
+                    if response.status == 429:
+                        # Retry-After: az összes szerver kérése ennyit vár
+                        self.rate_limited += 1
+                        retry_after = float(response.headers.get('Retry-After', 1))
+                        self.retry_until = max(self.retry_until, time.monotonic() + retry_after)
+                        continue
+
+                    if response.status == 401:
+                        self.token = None
+                        continue
+
+                    if response.status >= 500:
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+                        continue
+
+                    if response.status >= 400:
+                        raise SpotifyError(response.status, await response.text())
+
+                    return await response.json()
+            except aiohttp.ClientError:
+                if attempt == self.max_retries - 1:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+        raise SpotifyError(last_status, "Túl sok újrapróbálkozás")
+
+    async def search(self, q: str, type: str = 'track', limit: int = 10) -> Dict:
+        return await self._request('search', {'q': q, 'type': type, 'limit': limit})
+
+    async def tracks(self, track_ids: List[str]) -> List[Optional[Dict]]:
+        """Több track lekérése a multi-id végponton (50-es csomagokban)"""
+        result = []
+        for i in range(0, len(track_ids), self.MAX_IDS_PER_REQUEST):
+            chunk = track_ids[i:i + self.MAX_IDS_PER_REQUEST]
+            response = await self._request('tracks', {'ids': ','.join(chunk)})
+            result.extend(response['tracks'])
+        return result
+
+    async def track(self, track_id: str) -> Dict:
+        """Egy track lekérése - az egyszerre érkező kéréseket egy /tracks hívásba vonjuk össze"""
+        future = asyncio.get_running_loop().create_future()
+        self.pending_tracks.setdefault(track_id, []).append(future)
+
+        if len(self.pending_tracks) >= self.MAX_IDS_PER_REQUEST:
+            self._flush_tracks()
+        elif self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(self.batch_delay, self._flush_tracks)
+
+        return await future
+
+    def _flush_tracks(self):
+        """Összegyűlt track lekérések elküldése"""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        pending, self.pending_tracks = self.pending_tracks, {}
+        if pending:
+            task = asyncio.create_task(self._resolve_tracks(pending))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _resolve_tracks(self, pending: Dict[str, List[asyncio.Future]]):
+        """Összevont track lekérés eredményének szétosztása a várakozóknak"""
+        try:
+            tracks = await self.tracks(list(pending))
+        except asyncio.CancelledError:
+            # Leállításkor a várakozók se várjanak örökké
+            self._cancel_waiters(pending)
+            raise
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for track_id, track in zip(pending, tracks):
+            for future in pending[track_id]:
+                if future.done():
+                    continue
+                if track is None:
+                    future.set_exception(SpotifyError(404, f"Ismeretlen track: {track_id}"))
+                else:
+                    future.set_result(track)
+
+    def _cancel_waiters(self, pending: Dict[str, List[asyncio.Future]]):
+        """Összevont lekérésre várakozók megszakítása"""
+        for futures in pending.values():
+            for future in futures:
+                future.cancel()
+
+    async def playlist(self, playlist_id: str, fields: Optional[str] = None) -> Dict:
+        params = {'fields': fields} if fields else None
+        return await self._request(f"playlists/{playlist_id}", params)
+
+    async def playlist_items(self, playlist_id: str, limit: int = 100, offset: int = 0,
+                             additional_types=('track',)) -> Dict:
+        return await self._request(f"playlists/{playlist_id}/tracks", {
+            'limit': limit,
+            'offset': offset,
+            'additional_types': ','.join(additional_types)
+        })
+
+    async def album(self, album_id: str) -> Dict:
+        return await self._request(f"albums/{album_id}")
+
+    async def album_tracks(self, album_id: str, limit: int = 50, offset: int = 0) -> Dict:
+        return await self._request(f"albums/{album_id}/tracks", {'limit': limit, 'offset': offset})
+
+    async def next(self, page: Dict) -> Optional[Dict]:
+        """Lapozás: a következő oldal lekérése (ha van)"""
+        if not page.get('next'):
+            return None
+        return await self._request(page['next'])
+
+    async def close(self):
+        """Függő és futó track lekérések leállítása, HTTP munkamenet lezárása"""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        pending, self.pending_tracks = self.pending_tracks, {}
+        self._cancel_waiters(pending)
+
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
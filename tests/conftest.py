@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# A modulok a projekt gyökerében vannak (nincs csomag)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from music_player import MusicPlayer  # noqa: E402
+from track_queue import TrackQueue, QueueUsage  # noqa: E402
+
+
+@pytest.fixture
+def player():
+    """MusicPlayer hálózati / lemezes erőforrások nélkül, az 1-es szerver hangcsatornában (szóló szám nélkül)"""
+    player = MusicPlayer.__new__(MusicPlayer)
+    player.queue_usage = QueueUsage()
+    player.queues = {1: TrackQueue(usage=player.queue_usage)}
+    player.now_playing = {1: None}
+    player.actors = {}
+    player.queue_generations = {}
+    player.dedup_modes = {}
+    player.skipped_tracks = {}
+    player.queue_pages = {}
+    player.prefetch_tasks = {}
+    player.start_tasks = {}
+    player.prepare_tasks = {}
+    player.prepared_sources = {}
+    player.gapless_sources = {}
+    player.audio_cache = None
+    player.spotify = None
+    player.spotify_cache = None
+    return player
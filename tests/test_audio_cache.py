@@ -0,0 +1,161 @@
+import asyncio
+import os
+
+import audio_cache
+from audio_cache import AudioCache
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+def make_cache(tmp_path, **kwargs):
+    options = {'max_bytes': 1024 * 1024, 'min_plays': 2, 'bitrate': 96}
+    options.update(kwargs)
+    return AudioCache(str(tmp_path), **options)
+
+
+def put_file(cache, video_id, size=100):
+    """Mentés szimulálása FFmpeg nélkül: kész fájl + bejegyzés (a mentést mindig lejátszás előzi meg)"""
+    cache.record_play(video_id)
+    with open(cache._path(video_id), 'wb') as f:
+        f.write(b'\0' * size)
+    cache._index(video_id, size)
+
+
+def test_record_play_suggests_store_after_min_plays(tmp_path):
+    cache = make_cache(tmp_path)
+    assert not cache.record_play(VIDEO_ID)
+    assert cache.record_play(VIDEO_ID)
+    # Érvénytelen azonosítót nem számolunk
+    assert not cache.record_play('../etc/passwd')
+    asyncio.run(cache.close())
+
+
+def test_hits_are_counted_on_track_start_not_on_reopen(tmp_path):
+    cache = make_cache(tmp_path)
+    put_file(cache, VIDEO_ID)
+
+    # Forrás megnyitása (pl. tekerés / hangerő váltás) nem találat
+    assert cache.path_for(VIDEO_ID) == cache._path(VIDEO_ID)
+    assert cache.path_for(VIDEO_ID) == cache._path(VIDEO_ID)
+    assert cache.hits == 0
+
+    assert not cache.record_play(VIDEO_ID)
+    assert cache.hits == 1
+    asyncio.run(cache.close())
+
+
+def test_missing_file_is_forgotten(tmp_path):
+    cache = make_cache(tmp_path)
+    put_file(cache, VIDEO_ID)
+    assert cache.contains(VIDEO_ID)
+
+    os.remove(cache._path(VIDEO_ID))
+    assert cache.path_for(VIDEO_ID) is None
+    assert not cache.contains(VIDEO_ID)
+    asyncio.run(cache.close())
+
+
+def test_index_is_reloaded_from_disk(tmp_path):
+    cache = make_cache(tmp_path)
+    put_file(cache, VIDEO_ID)
+    asyncio.run(cache.close())
+
+    reopened = make_cache(tmp_path)
+    assert reopened.contains(VIDEO_ID)
+    asyncio.run(reopened.close())
+
+
+def test_eviction_keeps_rows_of_files_that_cannot_be_removed(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, max_bytes=250)
+    locked, other = 'aaaaaaaaaaa', 'bbbbbbbbbbb'
+    put_file(cache, locked)
+    put_file(cache, other)
+
+    # A legrégebbi fájl zárolva (pl. Windowson épp lejátszás alatt)
+    real_remove = os.remove
+
+    def remove(path):
+        if locked in path:
+            raise PermissionError(13, 'A fájlt egy másik folyamat használja')
+        real_remove(path)
+
+    monkeypatch.setattr(os, 'remove', remove)
+    put_file(cache, VIDEO_ID)
+
+    assert cache.contains(locked) and os.path.exists(cache._path(locked))
+    assert not cache.contains(other) and not os.path.exists(cache._path(other))
+    size = cache.db.execute("SELECT size FROM tracks WHERE video_id = ?", (locked,)).fetchone()[0]
+    assert size == 100
+    asyncio.run(cache.close())
+
+
+def test_eviction_removes_least_recently_played(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(audio_cache.time, 'time', lambda: now[0])
+    cache = make_cache(tmp_path, max_bytes=250)
+    first, second = 'aaaaaaaaaaa', 'bbbbbbbbbbb'
+    put_file(cache, first)
+    now[0] += 1
+    put_file(cache, second)
+    now[0] += 1
+    # Az első újra szólt: a második lett a legrégebben játszott
+    cache.record_play(first)
+    now[0] += 1
+    put_file(cache, VIDEO_ID)
+
+    assert cache.contains(first) and cache.contains(VIDEO_ID)
+    assert not cache.contains(second) and not os.path.exists(cache._path(second))
+    assert cache.stats()['files'] == 2
+    asyncio.run(cache.close())
+
+
+def test_stale_play_counters_expire(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(audio_cache.time, 'time', lambda: now[0])
+    cache = make_cache(tmp_path, min_plays=2)
+    cache.record_play(VIDEO_ID)
+
+    # A számláló a következő mentéskor (kiürítéskor) törlődik, ha régóta nem szólt
+    now[0] += audio_cache.PLAY_COUNT_TTL + 1
+    put_file(cache, 'aaaaaaaaaaa')
+    assert cache.db.execute("SELECT COUNT(*) FROM tracks WHERE video_id = ?", (VIDEO_ID,)).fetchone()[0] == 0
+    # Újra az elejéről számol
+    assert not cache.record_play(VIDEO_ID)
+    asyncio.run(cache.close())
+
+
+def test_recording_during_playback_is_committed_only_when_complete(tmp_path):
+    cache = make_cache(tmp_path, min_plays=2)
+    cache.record_play(VIDEO_ID)
+    # A második lejátszás éri el a küszöböt: ezt rögzítjük
+    assert cache.wants(VIDEO_ID)
+    partial = cache.begin_recording(VIDEO_ID)
+    assert partial and cache.begin_recording(VIDEO_ID) is None
+    # Rögzítés közben nincs külön mentés
+    assert not cache.record_play(VIDEO_ID)
+
+    # Kihagyott (félbeszakadt) szám: a félkész fájl törlődik
+    with open(partial, 'wb') as f:
+        f.write(b'\0' * 10)
+    assert not cache.finish_recording(VIDEO_ID, complete=False)
+    assert not os.path.exists(partial) and not cache.contains(VIDEO_ID)
+
+    partial = cache.begin_recording(VIDEO_ID)
+    with open(partial, 'wb') as f:
+        f.write(b'\0' * 100)
+    assert cache.finish_recording(VIDEO_ID, complete=True)
+    assert cache.contains(VIDEO_ID) and cache.stats()['files'] == 1
+    assert not cache.wants(VIDEO_ID) and cache.begin_recording(VIDEO_ID) is None
+    asyncio.run(cache.close())
+
+
+def test_close_waits_for_cancelled_stores(tmp_path):
+    async def scenario():
+        cache = make_cache(tmp_path)
+        # A tartalék mentés a szám hosszáig vár a letöltéssel
+        cache.schedule_store(VIDEO_ID, 'https://example.com/a.webm', 'ffmpeg', True, delay=60)
+        task = cache.tasks[VIDEO_ID]
+        await cache.close()
+        assert task.done() and cache.closed
+
+    asyncio.run(scenario())
@@ -0,0 +1,109 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import music_player
+from track import Track
+
+
+class FakeMessage:
+    def __init__(self):
+        self.embeds = []
+
+    async def edit(self, embed=None):
+        self.embeds.append(embed)
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.message = FakeMessage()
+        self.sent = []
+
+    async def send(self, embed=None, wait=False):
+        self.sent.append(embed)
+        return self.message
+
+
+def make_interaction(guild_id: int = 1, user_id: int = 42):
+    return SimpleNamespace(
+        guild=SimpleNamespace(id=guild_id),
+        user=SimpleNamespace(id=user_id, mention=f"<@{user_id}>"),
+        followup=FakeFollowup()
+    )
+
+
+@pytest.fixture
+def player(player):
+    """A lejátszás indítása helyett csak feljegyezzük"""
+    player.played = []
+    player.request_play = lambda guild: player.played.append(guild.id)
+    player.schedule_prefetch = lambda guild_id: None
+    return player
+
+
+def spotify_page(start: int, count: int):
+    return [{'title': f'Dal {i}', 'spotify_id': f'id{i}', 'spotify_url': f'https://open.spotify.com/track/id{i}'}
+            for i in range(start, start + count)]
+
+
+def test_stop_during_playlist_load_halts_loader(player):
+    async def scenario():
+        interaction = make_interaction()
+
+        async def collection(url):
+            return {'title': 'Lista', 'total': 30}
+
+        async def pages(collection):
+            yield spotify_page(0, 10)
+            # Két oldal között leállítják a lejátszást (a stop parancs az actorban fut)
+            await player.actor(interaction.guild).call(lambda: (player.queues[1].clear(), player.bump_generation(1)))
+            yield spotify_page(10, 10)
+            yield spotify_page(20, 10)
+
+        player.get_spotify_collection = collection
+        player.iter_spotify_tracks = pages
+
+        assert await player.enqueue_spotify_collection(interaction, 'https://open.spotify.com/playlist/x')
+        assert len(player.queues[1]) == 0
+        assert player.played == [1]
+
+    asyncio.run(scenario())
+
+
+def test_leave_during_playlist_load_does_not_raise(player):
+    async def scenario():
+        interaction = make_interaction()
+
+        async def collection(url):
+            # A gyűjtemény letöltése közben kilépünk
+            player.queues.pop(1).clear()
+            player.bump_generation(1)
+            return {'title': 'Lista', 'total': 10}
+
+        player.get_spotify_collection = collection
+        assert not await player.enqueue_spotify_collection(interaction, 'https://open.spotify.com/playlist/x')
+        assert 1 not in player.actors
+
+    asyncio.run(scenario())
+
+
+def test_collapse_respects_queue_and_user_caps(player, monkeypatch):
+    monkeypatch.setattr(music_player, 'MAX_QUEUE_SIZE', 4)
+    monkeypatch.setattr(music_player, 'MAX_USER_QUEUE_SIZE', 2)
+    player.dedup_modes[1] = 'collapse'
+    guild = SimpleNamespace(id=1)
+
+    def request(user_id):
+        return Track(title='Dal', video_id='dQw4w9WgXcQ', requester_id=user_id)
+
+    assert player._enqueue_track(guild, request(1)) == ('added', 1)
+    assert player._enqueue_track(guild, request(1)) == ('collapsed', 1)
+    # A felhasználó ismétlései is a korlátjába számítanak
+    assert player._enqueue_track(guild, request(1)) == ('user', 0)
+
+    assert player._enqueue_track(guild, request(2)) == ('collapsed', 1)
+    assert player._enqueue_track(guild, request(2)) == ('collapsed', 1)
+    # Betelt a várólista: az összevonás sem kerülheti meg
+    assert player._enqueue_track(guild, request(3)) == ('queue', 0)
+    assert player.queues[1][0].plays == 4
@@ -0,0 +1,69 @@
+import audioop
+
+import discord
+
+import audio_sources
+from audio_sources import GaplessSource
+
+PCM_FRAME = b'\x00\x10' * 1920  # 20 ms sztereó 16 bites PCM
+
+
+class PacketSource(discord.AudioSource):
+    """Végtelen, azonos keretek (Opus csomag vagy PCM)"""
+
+    def __init__(self, opus: bool):
+        self.opus = opus
+
+    def read(self) -> bytes:
+        return b'opus-packet' if self.opus else PCM_FRAME
+
+    def is_opus(self) -> bool:
+        return self.opus
+
+    def cleanup(self):
+        pass
+
+
+class FakeDecoder:
+    """libopus nélkül: minden csomagból ugyanaz a PCM keret"""
+
+    created = 0
+
+    def __init__(self):
+        FakeDecoder.created += 1
+
+    def decode(self, data: bytes) -> bytes:
+        assert data == b'opus-packet'
+        return PCM_FRAME
+
+
+def make_source(opus: bool, volume: float) -> GaplessSource:
+    return GaplessSource(PacketSource(opus), track=None, duration=0, prespawn_seconds=0, volume=volume)
+
+
+def test_opus_packets_pass_through_at_unity_and_are_gained_otherwise(monkeypatch):
+    monkeypatch.setattr(audio_sources, 'OpusDecoder', FakeDecoder)
+    FakeDecoder.created = 0
+    source = make_source(opus=True, volume=1.0)
+    assert source.is_opus()
+    assert source.read() == b'opus-packet' and source.is_opus()
+
+    # Hangerő váltás: a következő kerettől PCM, a forrás (FFmpeg) nem indul újra
+    source.volume = 0.5
+    assert source.read() == audioop.mul(PCM_FRAME, 2, 0.5)
+    assert not source.is_opus()
+    source.read()
+    assert FakeDecoder.created == 1
+
+    # Vissza 100%-ra: újra változatlan csomagok
+    source.volume = 1.0
+    assert source.read() == b'opus-packet' and source.is_opus()
+
+
+def test_pcm_frames_are_gained_unless_unity():
+    source = make_source(opus=False, volume=0.5)
+    assert not source.is_opus()
+    assert source.read() == audioop.mul(PCM_FRAME, 2, 0.5)
+
+    source.volume = 1.0
+    assert source.read() == PCM_FRAME and not source.is_opus()
@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+import yt_dlp
+
+from resolver import TrackUnavailable, is_unavailable_error
+from track import Track
+
+
+@pytest.fixture
+def player(player):
+    """Az FFmpeg ellenőrzés és a továbblépés helyett számlálók"""
+    player.ffmpeg_ok = True
+    player.opened = 0
+    player.advanced = 0
+
+    async def check_ffmpeg():
+        return player.ffmpeg_ok
+
+    async def play_next(guild):
+        player.advanced += 1
+
+    async def invalidate_stream(item):
+        pass
+
+    player.check_ffmpeg = check_ffmpeg
+    player.play_next = play_next
+    player.invalidate_stream = invalidate_stream
+    return player
+
+
+def make_guild():
+    return SimpleNamespace(id=1, text_channels=[], me=None)
+
+
+async def drain(player, guild):
+    """Megvárja, amíg az actor a beküldött üzeneteket feldolgozza"""
+    for _ in range(3):
+        await player.actor(guild).call(lambda: None)
+
+
+def test_missing_ffmpeg_halts_and_requeues_track(player):
+    async def scenario():
+        player.ffmpeg_ok = False
+        guild = make_guild()
+        item, following = Track(title='Első'), Track(title='Második')
+        player.queues[1].append(following)
+        player.now_playing[1] = item
+        player.actor(guild)
+
+        await player._open_and_start(guild, item)
+        await drain(player, guild)
+
+        # A szám visszakerült az elejére, nincs kihagyás és továbblépés
+        assert list(player.queues[1]) == [item, following]
+        assert player.now_playing[1] is None
+        assert not player.skipped_tracks
+        assert player.advanced == 0
+
+    asyncio.run(scenario())
+
+
+def test_unavailable_video_is_not_retried(player):
+    async def scenario():
+        guild = make_guild()
+        item = Track(title='Törölt')
+        player.now_playing[1] = item
+
+        async def open_source(guild_id, queue_item, start=0.0):
+            player.opened += 1
+            raise TrackUnavailable("Video unavailable")
+
+        player.open_source = open_source
+        player.actor(guild)
+        await player._open_and_start(guild, item)
+        await drain(player, guild)
+
+        assert player.opened == 1
+        assert player.skipped_tracks == {1: ['Törölt']}
+        assert player.advanced == 1
+
+    asyncio.run(scenario())
+
+
+def test_result_for_departed_guild_is_dropped(player):
+    async def scenario():
+        guild = make_guild()
+        item = Track(title='Késő')
+        player.now_playing[1] = item
+        cleaned = []
+
+        async def open_source(guild_id, queue_item, start=0.0):
+            # Feloldás közben kiléptünk: az actor már nincs meg
+            player.actors.clear()
+            return SimpleNamespace(cleanup=lambda: cleaned.append(queue_item))
+
+        player.open_source = open_source
+        await player._open_and_start(guild, item)
+
+        # Nem jön létre új actor a kilépett szerverhez, az elindított forrás leáll
+        assert player.actors == {}
+        assert cleaned == [item]
+
+    asyncio.run(scenario())
+
+
+def test_unavailable_error_detection():
+    assert is_unavailable_error(yt_dlp.utils.DownloadError("ERROR: [youtube] abc: Video unavailable"))
+    assert is_unavailable_error(yt_dlp.utils.DownloadError("ERROR: [youtube] abc: Private video"))
+    assert not is_unavailable_error(yt_dlp.utils.DownloadError("ERROR: Unable to download webpage: timed out"))
+    assert not is_unavailable_error(ValueError("Video unavailable"))
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from guild_actor import GuildActor
+from track import Track
+from track_queue import TrackQueue
+
+
+def test_prefetched_item_is_fresh_without_second_extraction(player):
+    async def scenario():
+        item = Track(title='Dal', url='https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+                     webpage_url='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        player.queues[1] = TrackQueue([item])
+
+        calls = []
+
+        async def fake_search(query, guild_id):
+            calls.append(query)
+            await asyncio.sleep(0)
+            return {'id': 'dQw4w9WgXcQ', 'url': f'https://rr.googlevideo.com/x?expire={int(time.time()) + 3600}'}
+
+        player.search_youtube = fake_search
+
+        player.schedule_prefetch(1)
+        _, task = player.prefetch_tasks[1][id(item)]
+        await task
+
+        assert player.is_stream_fresh(item)
+        assert await player.resolve_play_url(1, item) == item.stream_url
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
+
+
+def test_play_waits_for_running_prefetch(player):
+    async def scenario():
+        item = Track(title='Dal', webpage_url='https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+        player.queues[1] = TrackQueue([item])
+        calls = []
+
+        async def fake_search(query, guild_id):
+            calls.append(query)
+            await asyncio.sleep(0.01)
+            return {'id': 'dQw4w9WgXcQ', 'url': f'https://rr.googlevideo.com/x?expire={int(time.time()) + 3600}'}
+
+        player.search_youtube = fake_search
+        player.schedule_prefetch(1)
+        # A lejátszás a futó előre feloldást várja meg, nem keres újra
+        assert await player.resolve_play_url(1, item)
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
+
+
+def test_prepared_source_discarded_while_opening_is_not_queued(player):
+    async def scenario():
+        guild = SimpleNamespace(id=1)
+        current, following = Track(title='Most'), Track(title='Következő')
+        player.queues[1] = TrackQueue([following])
+        queued = []
+        gapless = SimpleNamespace(track=current, clear_next=lambda: None,
+                                  queue_next=lambda source, item, duration: queued.append(item))
+        player.gapless_sources[1] = gapless
+        cleaned = []
+
+        async def open_source(guild_id, queue_item, start=0.0):
+            return SimpleNamespace(cleanup=lambda: cleaned.append(queue_item))
+
+        player.open_source = open_source
+        # Még nem fut: a kész forrás az actor postafiókjában vár, amikor a tekerés eldobja az előkészítést
+        actor = player.actors[1] = GuildActor(1)
+
+        player.schedule_prepare(guild, current)
+        await player.prepare_tasks[1]
+        player.discard_prepared(1)
+        actor.start()
+        await actor.call(lambda: None)
+
+        assert not queued and not player.prepared_sources
+        assert cleaned == [following]
+
+        # Zavartalanul az actor adja át a lejátszásnak
+        player.schedule_prepare(guild, current)
+        await player.prepare_tasks[1]
+        await actor.call(lambda: None)
+        assert queued == [following]
+        assert player.prepared_sources[1][0] is following and not player.prepare_tasks
+
+    asyncio.run(scenario())
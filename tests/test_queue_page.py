@@ -0,0 +1,23 @@
+from track import Track
+from track_queue import TrackQueue
+
+
+def test_long_queue_field_keeps_whole_lines(player):
+    url = 'https://open.spotify.com/track/' + 'x' * 22
+    tracks = [Track(title='Nagyon hosszú cím ' * 5 + str(i), url=url, type='spotify_track') for i in range(10)]
+    player.queues[1] = TrackQueue(tracks)
+    embed = player.render_queue_page(1, 0)
+    value = embed.fields[0].value
+
+    assert len(value) <= 1024
+    lines = value.split('\n')
+    # Minden megjelenített sor teljes (a link lezárva), a kimaradtak száma az utolsó sorban
+    assert all(line.endswith(f'({url})') for line in lines[:-1])
+    assert lines[-1] == f"... és még {11 - len(lines)} szám ezen az oldalon"
+
+
+def test_short_queue_field_is_unchanged(player):
+    tracks = [Track(title=f'Dal {i}', duration=61) for i in range(3)]
+    player.queues[1] = TrackQueue(tracks)
+    embed = player.render_queue_page(1, 0)
+    assert embed.fields[0].value == "\n".join(f"{i}. 📺 **Dal {i - 1}** (1:01)" for i in range(1, 4))
@@ -0,0 +1,62 @@
+import os
+import stat
+import struct
+import sys
+
+import pytest
+
+from audio_sources import RecordingOpusAudio
+
+
+def ogg_page(packets, sequence: int, flags: int = 0) -> bytes:
+    """Ogg lap (ellenőrzőösszeg nélkül - a discord.py nem ellenőrzi)"""
+    segments = b''.join(bytes([len(packet)]) for packet in packets)
+    header = struct.pack('<BBQIIIB', 0, flags, 0, 1, sequence, 0, len(packets))
+    return b'OggS' + header + segments + b''.join(packets)
+
+
+STREAM = (ogg_page([b'OpusHead' + b'\0' * 11], 0, flags=2) + ogg_page([b'OpusTags' + b'\0' * 8], 1)
+          + ogg_page([b'frame-1', b'frame-2'], 2) + ogg_page([b'frame-3'], 3, flags=4))
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    """FFmpeg helyett egy program, ami a kész Ogg folyamot írja ki (az argumentumokat figyelmen kívül hagyja)"""
+    data = tmp_path / 'stream.ogg'
+    data.write_bytes(STREAM)
+    script = tmp_path / 'ffmpeg'
+    script.write_text(f"#!{sys.executable}\nimport sys\nsys.stdout.buffer.write(open({str(data)!r}, 'rb').read())\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="a hamis FFmpeg egy futtatható szkript")
+def test_played_stream_is_written_unchanged(tmp_path, fake_ffmpeg):
+    partial = str(tmp_path / 'track.ogg.part')
+    finished = []
+    source = RecordingOpusAudio('https://example.com/a.webm', partial, finished.append,
+                                codec='opus', executable=fake_ffmpeg)
+
+    frames = []
+    while frame := source.read():
+        frames.append(frame)
+    source.cleanup()
+
+    assert frames[2:] == [b'frame-1', b'frame-2', b'frame-3']
+    assert finished == [True]
+    with open(partial, 'rb') as f:
+        assert f.read() == STREAM
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="a hamis FFmpeg egy futtatható szkript")
+def test_interrupted_stream_is_incomplete(tmp_path, fake_ffmpeg):
+    partial = str(tmp_path / 'track.ogg.part')
+    finished = []
+    source = RecordingOpusAudio('https://example.com/a.webm', partial, finished.append,
+                                codec='opus', executable=fake_ffmpeg)
+    for _ in range(3):
+        source.read()
+    # Kihagyás: a forrás a stream vége előtt áll le
+    source.cleanup()
+    source.cleanup()
+    assert finished == [False]
@@ -0,0 +1,89 @@
+import resolution_cache
+from resolution_cache import ResolutionCache, normalize_query, stream_url_expiry, is_opus_stream
+
+
+def make_cache(**kwargs):
+    options = {'max_entries': 100, 'stream_ttl': 3600, 'refresh_margin': 300}
+    options.update(kwargs)
+    return ResolutionCache(':memory:', **options)
+
+
+def video(video_id: str, expire: float = None) -> dict:
+    url = f'https://rr.googlevideo.com/videoplayback?itag=251&expire={int(expire)}' if expire else None
+    return {'id': video_id, 'title': video_id, 'duration': 200, 'url': url,
+            'webpage_url': f'https://www.youtube.com/watch?v={video_id}'}
+
+
+def test_query_normalization():
+    assert normalize_query('  Never   Gonna ') == 'never gonna'
+    assert normalize_query('https://youtu.be/dQw4w9WgXcQ') == 'yt:dQw4w9WgXcQ'
+    assert normalize_query('https://www.youtube.com/watch?list=x&v=dQw4w9WgXcQ') == 'yt:dQw4w9WgXcQ'
+
+
+def test_stream_url_helpers():
+    assert stream_url_expiry('https://x/videoplayback?expire=1234', 60) == 1234
+    assert is_opus_stream('https://x/videoplayback?itag=251')
+    assert not is_opus_stream('https://x/videoplayback?itag=140')
+
+
+def test_stream_url_freshness_respects_refresh_margin(monkeypatch):
+    cache = make_cache()
+    now = [10_000.0]
+    monkeypatch.setattr(resolution_cache.time, 'time', lambda: now[0])
+    cache.store('never gonna', video('dQw4w9WgXcQ', expire=now[0] + 1000))
+
+    info, fresh = cache.lookup('Never  Gonna')
+    assert info['id'] == 'dQw4w9WgXcQ' and fresh
+    # A videó azonosítóval is megtalálható
+    assert cache.lookup('https://youtu.be/dQw4w9WgXcQ')[1]
+
+    # A lejárat előtti biztonsági sávban már frissíteni kell, a metaadat megmarad
+    now[0] += 800
+    info, fresh = cache.lookup('never gonna')
+    assert info['title'] == 'dQw4w9WgXcQ' and not fresh
+
+    assert cache.lookup('ismeretlen') == (None, False)
+    assert (cache.hits, cache.refreshes, cache.misses) == (2, 1, 1)
+    cache.close()
+
+
+def test_metadata_only_store_keeps_stream_url(monkeypatch):
+    cache = make_cache()
+    now = 10_000.0
+    monkeypatch.setattr(resolution_cache.time, 'time', lambda: now)
+    cache.store('dal', video('dQw4w9WgXcQ', expire=now + 3600))
+    cache.store('dal', video('dQw4w9WgXcQ'))
+    info, fresh = cache.lookup('dal')
+    assert info['url'] and fresh
+    cache.close()
+
+
+def test_lru_eviction_drops_oldest_videos_and_their_queries(monkeypatch):
+    cache = make_cache(max_entries=2)
+    now = [10_000.0]
+    monkeypatch.setattr(resolution_cache.time, 'time', lambda: now[0])
+
+    cache.store('a', video('aaaaaaaaaaa'))
+    now[0] += 1
+    cache.store('b', video('bbbbbbbbbbb'))
+    now[0] += 1
+    # 'a' használata (a hozzáférési idő kötegben, az eviction előtt íródik ki)
+    assert cache.lookup('a')[0]
+    now[0] += 1
+    cache.store('c', video('ccccccccccc'))
+
+    assert cache.lookup('b') == (None, False)
+    assert cache.lookup('a')[0] and cache.lookup('c')[0]
+    queries = {row[0] for row in cache.db.execute("SELECT query FROM queries")}
+    assert queries == {'a', 'yt:aaaaaaaaaaa', 'c', 'yt:ccccccccccc'}
+    cache.close()
+
+
+def test_spotify_matches_fall_back_to_isrc():
+    cache = make_cache()
+    cache.store_match('sp1', 'USRC1', 'dQw4w9WgXcQ', 0.9)
+    assert cache.get_match('sp1') == ('dQw4w9WgXcQ', 0.9)
+    # Ugyanaz a felvétel más kiadványon
+    assert cache.get_match('sp2', 'USRC1') == ('dQw4w9WgXcQ', 0.9)
+    assert cache.get_match('sp3', 'OTHER') is None
+    cache.close()
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import discord
+
+from audio_sources import SharedStream, FRAME_LENGTH
+
+
+class CountingSource(discord.AudioSource):
+    """`frames` darab sorszámozott keret, utána vége"""
+
+    def __init__(self, frames: int, start: int = 0):
+        self.next = start
+        self.frames = frames
+        self.cleaned = threading.Event()
+
+    def read(self) -> bytes:
+        if self.next >= self.frames or self.cleaned.is_set():
+            return b''
+        frame = self.next.to_bytes(4, 'big')
+        self.next += 1
+        return frame
+
+    def is_opus(self) -> bool:
+        return False
+
+    def cleanup(self):
+        self.cleaned.set()
+
+
+def frame_number(frame: bytes) -> int:
+    return int.from_bytes(frame, 'big')
+
+
+def read_all(reader) -> list:
+    frames = []
+    while True:
+        frame = reader.read()
+        if not frame:
+            return frames
+        frames.append(frame_number(frame))
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "időtúllépés"
+        time.sleep(0.005)
+
+
+def test_subscribers_share_one_source_and_close_it_after_the_last():
+    original = CountingSource(50)
+    # A teljes szám belefér a pufferbe, így a második olvasó sem marad le
+    stream = SharedStream(original, capacity=60, readahead=4)
+    first = stream.subscribe(tolerance=10)
+    second = stream.subscribe(tolerance=10)
+    assert stream.listeners == 2
+
+    assert read_all(first) == list(range(50))
+    assert read_all(second) == list(range(50))
+
+    first.cleanup()
+    assert not stream.closed
+    second.cleanup()
+    assert stream.closed
+    assert original.cleaned.wait(1)
+    # Lezárt streamhez nem lehet csatlakozni
+    assert stream.subscribe(tolerance=10) is None
+
+
+def test_subscribe_is_refused_beyond_tolerance():
+    stream = SharedStream(CountingSource(100), capacity=40, readahead=4)
+    leader = stream.subscribe(tolerance=10)
+    for _ in range(11):
+        leader.read()
+    assert stream.subscribe(tolerance=10) is None
+    assert stream.subscribe(tolerance=20) is not None
+    leader.cleanup()
+
+
+def test_lagging_reader_detaches_to_private_fallback():
+    offsets = []
+
+    def fallback(position: float):
+        offsets.append(position)
+        return CountingSource(100, start=round(position / FRAME_LENGTH))
+
+    stream = SharedStream(CountingSource(100), capacity=10, readahead=2, fallback=fallback)
+    leader = stream.subscribe(tolerance=5)
+    lagging = stream.subscribe(tolerance=5)
+    lagging.read()  # 0. keret
+
+    # A vezető olvasó továbbhalad, a lemaradó keretei kiesnek a pufferből
+    for _ in range(20):
+        assert leader.read()
+    wait_for(lagging.detached.is_set)
+
+    assert lagging not in stream.readers
+    assert offsets == [FRAME_LENGTH]
+    # A saját forrás onnan folytatja, ahol lemaradt
+    assert frame_number(lagging.read()) == 1
+    lagging.cleanup()
+
+    assert read_all(leader) == list(range(20, 100))
+    leader.cleanup()
+    assert stream.closed
+
+
+def test_source_without_audio_cannot_be_joined():
+    # Pl. lejárt stream URL: az FFmpeg azonnal, hang nélkül kilép
+    stream = SharedStream(CountingSource(0), capacity=10, readahead=2)
+    wait_for(lambda: stream.ended)
+    assert stream.subscribe(tolerance=5) is None
@@ -0,0 +1,96 @@
+import spotify_cache
+from spotify_cache import SpotifyCache
+
+
+def make_cache(**kwargs):
+    options = {'ttl': 3600, 'max_entries': 100, 'memory_bytes': 1024 * 1024}
+    options.update(kwargs)
+    return SpotifyCache(':memory:', **options)
+
+
+def disk_access(cache, key):
+    return cache.db.execute("SELECT last_access FROM spotify_entities WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_hits_batch_last_access_until_flush(monkeypatch):
+    cache = make_cache()
+    cache.put('track', 'a', {'title': 'A'})
+    stored = disk_access(cache, 'track:a')
+
+    monkeypatch.setattr(spotify_cache.time, 'time', lambda: stored + 10)
+    assert cache.get('track', 'a')[0] == {'title': 'A'}
+    # A találat nem ír azonnal a lemezre
+    assert disk_access(cache, 'track:a') == stored
+    assert cache.pending_access == {'track:a': stored + 10}
+
+    # Az időköz lejárta után a következő találat egy kötegben kiírja
+    monkeypatch.setattr(spotify_cache.time, 'time', lambda: stored + 10 + spotify_cache.ACCESS_FLUSH_INTERVAL)
+    cache.get('track', 'a')
+    assert disk_access(cache, 'track:a') == stored + 10 + spotify_cache.ACCESS_FLUSH_INTERVAL
+    assert not cache.pending_access
+    cache.close()
+
+
+def test_eviction_sees_pending_accesses(monkeypatch):
+    cache = make_cache(max_entries=2)
+    now = [1000.0]
+    monkeypatch.setattr(spotify_cache.time, 'time', lambda: now[0])
+
+    cache.put('track', 'a', {'title': 'A'})
+    now[0] += 1
+    cache.put('track', 'b', {'title': 'B'})
+    now[0] += 1
+    # 'a' a legutóbb használt, de az időpont még csak a memóriában van
+    cache.get('track', 'a')
+    now[0] += 1
+    cache.put('track', 'c', {'title': 'C'})
+
+    keys = {row[0] for row in cache.db.execute("SELECT key FROM spotify_entities")}
+    assert keys == {'track:a', 'track:c'}
+    cache.close()
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    cache = make_cache(ttl=100)
+    now = [1000.0]
+    monkeypatch.setattr(spotify_cache.time, 'time', lambda: now[0])
+    cache.put('album', 'x', {'title': 'X'})
+
+    now[0] += 99
+    assert cache.get('album', 'x') is not None
+    now[0] += 2
+    assert cache.get('album', 'x') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Friss lekérés (pl. változatlan snapshot) után újra érvényes
+    cache.touch('album', 'x')
+    assert cache.get('album', 'x') is not None
+    cache.close()
+
+
+def test_memory_layer_is_lru_bounded_and_falls_back_to_disk():
+    cache = make_cache(memory_bytes=60)
+    for key in 'abc':
+        cache.put('track', key, {'title': key * 10})
+    # Egy bejegyzés ~25 bájt: a memóriában csak a két legutóbbi fér el
+    assert list(cache.memory) == ['track:b', 'track:c']
+    assert cache.memory_used <= 60
+
+    # A lemezről visszatöltve újra a memóriába kerül, a legrégebben használt esik ki
+    assert cache.get('track', 'a')[0] == {'title': 'a' * 10}
+    assert list(cache.memory) == ['track:c', 'track:a']
+    cache.close()
+
+
+def test_disk_layer_evicts_least_recently_used(monkeypatch):
+    cache = make_cache(max_entries=3)
+    now = [1000.0]
+    monkeypatch.setattr(spotify_cache.time, 'time', lambda: now[0])
+    for key in 'abcd':
+        now[0] += 1
+        cache.put('track', key, {'title': key})
+
+    assert cache.stats()['entries'] == 3
+    keys = {row[0] for row in cache.db.execute("SELECT key FROM spotify_entities")}
+    assert keys == {'track:b', 'track:c', 'track:d'}
+    cache.close()
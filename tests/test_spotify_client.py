@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from spotify_client import SpotifyClient, SpotifyError
+
+
+class FakeResponse:
+    def __init__(self, status: int):
+        self.status = status
+        self.headers = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def text(self):
+        return ''
+
+
+class FakeSession:
+    closed = False
+
+    def __init__(self, status: int):
+        self.status = status
+        self.calls = 0
+
+    def get(self, url, params=None, headers=None):
+        self.calls += 1
+        return FakeResponse(self.status)
+
+    async def close(self):
+        self.closed = True
+
+
+def make_client(status: int) -> SpotifyClient:
+    client = SpotifyClient('id', 'secret', max_retries=3)
+    client.session = FakeSession(status)
+
+    async def token():
+        return 'token'
+
+    client._get_token = token
+    return client
+
+
+def test_exhausted_retries_report_last_status():
+    async def scenario():
+        client = make_client(401)
+        with pytest.raises(SpotifyError) as error:
+            await client._request('tracks/x')
+        assert error.value.status == 401
+        assert client.session.calls == 3
+
+    asyncio.run(scenario())
+
+
+def test_close_cancels_running_batch_and_waiters():
+    async def scenario():
+        client = make_client(200)
+        started = asyncio.Event()
+
+        async def slow_tracks(track_ids):
+            started.set()
+            await asyncio.sleep(3600)
+
+        client.tracks = slow_tracks
+        waiter = asyncio.create_task(client.track('a'))
+        await started.wait()
+        assert len(client.tasks) == 1
+
+        # Még el nem küldött lekérés is
+        queued = asyncio.create_task(client.track('b'))
+        await asyncio.sleep(0)
+
+        await client.close()
+        assert not client.tasks
+        assert client.flush_handle is None
+        for task in (waiter, queued):
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert client.session.closed
+
+    asyncio.run(scenario())
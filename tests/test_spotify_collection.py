@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from spotify_cache import SpotifyCache
+
+
+def spotify_track(i: int):
+    return {'type': 'track', 'id': f'id{i}', 'name': f'Dal {i}', 'artists': [{'name': 'Előadó'}],
+            'album': {'name': 'Album', 'images': []}, 'duration_ms': 180000,
+            'external_urls': {'spotify': f'https://open.spotify.com/track/id{i}'}, 'external_ids': {}}
+
+
+class FakeSpotify:
+    """Három 2 számos oldal - a 'next' URL az eltolást hordozza"""
+
+    def __init__(self):
+        self.requests = []
+
+    def _page(self, offset: int):
+        self.requests.append(offset)
+        return {
+            'items': [{'track': spotify_track(i)} for i in range(offset, offset + 2)],
+            'next': f'https://api.spotify.com/v1/playlists/p/tracks?offset={offset + 2}' if offset < 4 else None
+        }
+
+    async def playlist_items(self, playlist_id, limit=100, additional_types=()):
+        return self._page(0)
+
+    async def next(self, page):
+        if not page.get('next'):
+            return None
+        return self._page(int(page['next'].rsplit('=', 1)[1]))
+
+
+@pytest.fixture
+def player(player):
+    player.spotify = FakeSpotify()
+    player.spotify_cache = SpotifyCache(':memory:', ttl=3600, max_entries=100, memory_bytes=1024 * 1024)
+    yield player
+    player.spotify_cache.close()
+
+
+def test_interrupted_playlist_load_is_cached_and_resumed(player):
+    async def scenario():
+        collection = {'id': 'p', 'title': 'Playlist: Teszt', 'type': 'spotify_playlist', 'total': 6,
+                      'snapshot_id': 'snap'}
+
+        # A fogyasztó az első oldal után abbahagyja (pl. betelt a várólista)
+        async for page in player.iter_spotify_tracks(collection):
+            assert len(page) == 2
+            break
+
+        data, snapshot, _ = player.spotify_cache.get('playlist', 'p')
+        assert snapshot == 'snap'
+        assert [track['spotify_id'] for track in data['tracks']] == ['id0', 'id1']
+        assert data['next']
+
+        # Újratöltés a gyorsítótárból: az első oldal API hívás nélkül, utána folytatás
+        resumed = []
+        async for page in player.iter_spotify_tracks(dict(data)):
+            resumed.extend(track['spotify_id'] for track in page)
+        assert resumed == [f'id{i}' for i in range(6)]
+        assert player.spotify.requests == [0, 2, 4]
+
+        data, _, _ = player.spotify_cache.get('playlist', 'p')
+        assert len(data['tracks']) == 6
+        assert data['next'] is None
+
+        # Teljes bejegyzés: nincs több API hívás
+        async for _ in player.iter_spotify_tracks(dict(data)):
+            pass
+        assert player.spotify.requests == [0, 2, 4]
+
+    asyncio.run(scenario())
@@ -0,0 +1,38 @@
+import pytest
+
+from music_player import parse_timestamp, format_timestamp
+
+
+@pytest.mark.parametrize('text, seconds', [
+    ('90', 90),
+    ('0', 0),
+    ('1:30', 90),
+    (' 1:05 ', 65),
+    ('1:02:03', 3723),
+    ('10:00:00', 36000),
+])
+def test_parse_timestamp(text, seconds):
+    assert parse_timestamp(text) == seconds
+
+
+@pytest.mark.parametrize('text', ['', 'abc', '1:', ':30', '1:2:3:4', '-5', '1.5', '1:3o'])
+def test_parse_timestamp_rejects_invalid(text):
+    assert parse_timestamp(text) is None
+
+
+@pytest.mark.parametrize('seconds, text', [
+    (0, '0:00'),
+    (5, '0:05'),
+    (90, '1:30'),
+    (3599, '59:59'),
+    (3600, '1:00:00'),
+    (3723, '1:02:03'),
+    (90.9, '1:30'),
+])
+def test_format_timestamp(seconds, text):
+    assert format_timestamp(seconds) == text
+
+
+def test_round_trip():
+    for seconds in (0, 59, 61, 3599, 3601, 86399):
+        assert parse_timestamp(format_timestamp(seconds)) == seconds
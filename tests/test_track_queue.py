@@ -0,0 +1,145 @@
+import pytest
+
+from track import Track
+from track_queue import TrackQueue, QueueUsage
+
+
+def test_identity_is_frozen_while_queued():
+    usage = QueueUsage()
+    queue = TrackQueue(usage=usage)
+    item = Track(title='Dal', url='https://example.com/dal')
+    queue.append(item)
+    assert queue.identities == {'https://example.com/dal': [item]}
+
+    # A feloldás beállítja a videó azonosítót, ami megváltoztatja a Track.identity-t
+    item.video_id = 'dQw4w9WgXcQ'
+    assert item.identity == 'yt:dQw4w9WgXcQ'
+
+    assert queue.popleft() is item
+    assert queue.identities == {}
+    assert usage.count == 0
+
+    # Újra sorba állítva már az új azonosítóval kerül be
+    queue.appendleft(item)
+    assert queue.duplicate_of(Track(title='Dal', video_id='dQw4w9WgXcQ')) is item
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """Kis blokkméret, hogy a blokkhatárokon átnyúló műveletek is lefussanak"""
+    monkeypatch.setattr(TrackQueue, 'BLOCK_SIZE', 4)
+
+
+def make_queue(count: int, usage: QueueUsage = None) -> TrackQueue:
+    return TrackQueue((Track(title=str(i), requester_id=i % 2) for i in range(count)), usage=usage)
+
+
+def titles(tracks) -> list:
+    return [int(track.title) for track in tracks]
+
+
+def test_index_and_find(small_blocks):
+    queue = make_queue(10)
+    tracks = list(queue)
+    for position, track in enumerate(tracks):
+        assert queue.index(track) == position
+        assert queue.find(track.uid) == position
+        assert queue[position] is track
+    assert queue[-1] is tracks[-1]
+    assert queue.find(-1) == -1
+
+    with pytest.raises(ValueError):
+        queue.index(Track(title='x'))
+
+
+def test_page(small_blocks):
+    queue = make_queue(10)
+    assert titles(queue.page(0, 4)) == [0, 1, 2, 3]
+    assert titles(queue.page(1, 4)) == [4, 5, 6, 7]
+    assert titles(queue.page(2, 4)) == [8, 9]
+    assert queue.page(3, 4) == []
+
+
+def test_move(small_blocks):
+    queue = make_queue(10)
+    version = queue.version
+    moved = queue.move(8, 1)
+    assert titles([moved]) == [8]
+    assert titles(queue) == [0, 8, 1, 2, 3, 4, 5, 6, 7, 9]
+    assert queue.version > version
+
+    queue.move(0, 9)
+    assert titles(queue) == [8, 1, 2, 3, 4, 5, 6, 7, 9, 0]
+    assert [queue.index(track) for track in queue] == list(range(10))
+
+
+def test_remove_keeps_counters(small_blocks):
+    usage = QueueUsage()
+    queue = make_queue(10, usage)
+    memory = queue.memory
+
+    track = queue[5]
+    queue.remove(track)
+    assert track not in queue
+    assert titles(queue) == [0, 1, 2, 3, 4, 6, 7, 8, 9]
+    assert queue.user_count(1) == 4 and queue.user_count(0) == 5
+    assert usage.count == 9
+    assert queue.memory == memory - track.footprint()
+
+    queue.clear()
+    assert len(queue) == 0 and usage.count == 0 and usage.memory == 0
+
+
+def test_skip_to_drops_across_blocks(small_blocks):
+    queue = make_queue(10)
+    assert queue.skip_to(6) == 6
+    assert titles(queue) == [6, 7, 8, 9]
+    assert queue.index(queue[0]) == 0
+
+
+def test_duplicates_are_tracked_per_identity():
+    queue = TrackQueue()
+    first = Track(title='A', video_id='dQw4w9WgXcQ')
+    second = Track(title='A (újra)', video_id='dQw4w9WgXcQ')
+    queue.extend([first, second])
+    assert queue.duplicate_of(Track(title='?', video_id='dQw4w9WgXcQ')) is first
+    queue.remove(first)
+    assert queue.duplicate_of(Track(title='?', video_id='dQw4w9WgXcQ')) is second
+
+
+def test_insert_splits_oversized_blocks(small_blocks):
+    queue = make_queue(4)
+    for i in range(10, 20):
+        queue.insert(1, Track(title=str(i)))
+    assert titles(queue) == [0] + list(range(19, 9, -1)) + [1, 2, 3]
+    assert max(len(block) for block in queue.blocks) <= 2 * TrackQueue.BLOCK_SIZE
+    assert [queue.index(track) for track in queue] == list(range(14))
+
+
+def test_collapsed_plays_count_toward_caps():
+    usage = QueueUsage()
+    queue = TrackQueue(usage=usage)
+    item = Track(title='Dal', video_id='dQw4w9WgXcQ', requester_id=1)
+    queue.append(item)
+
+    queue.add_play(item, requester_id=2)
+    queue.add_play(item, requester_id=2)
+    assert item.plays == 3 and len(queue) == 1
+    assert queue.total_plays == 3 and usage.count == 3
+    assert queue.user_count(1) == 1 and queue.user_count(2) == 2
+
+    # Egy lejátszás csak egy ismétlést fogyaszt, az elem elöl marad
+    assert queue.pop_play() is item
+    assert queue[0] is item and item.plays == 2
+    assert queue.total_plays == 2 and usage.count == 2 and queue.user_count(2) == 1
+
+    # Áthelyezés után is megmaradnak az ismétlések, törléskor mind eltűnnek
+    queue.append(Track(title='Más', requester_id=1))
+    queue.move(0, 1)
+    assert queue.total_plays == 3 and queue.user_count(2) == 1
+    queue.remove(item)
+    assert queue.total_plays == 1 and usage.count == 1 and queue.user_count(2) == 0
+
+    queue.add_play(queue[0], requester_id=2)
+    queue.clear()
+    assert usage.count == 0 and queue.total_plays == 0
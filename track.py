@@ -0,0 +1,106 @@
+import itertools
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Folyamaton belül egyedi elem azonosítók (várólista műveletekhez)
+_uids = itertools.count(1)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Ismétlődő szövegek (album, borító, előadó) egyetlen példányban tárolva"""
+    return sys.intern(value) if value else value
+
+
+@dataclass(slots=True, eq=False)
+class Track:
+    """Várólista elem - kompakt, __slots__ alapú (nagy várólistákhoz)
+
+    Az egyenlőség az azonosság: ugyanaz a szám kétszer sorba állítva két külön elem.
+    """
+
+    title: str
+    duration: int = 0
+    url: Optional[str] = None           # Videó oldal vagy Spotify URL (nem a lejáró stream URL)
+    webpage_url: Optional[str] = None
+    thumbnail: Optional[str] = None
+    uploader: Optional[str] = None      # Spotify számoknál az előadó
+    album: Optional[str] = None
+    type: str = 'youtube'
+    requester_id: int = 0
+    video_id: Optional[str] = None
+    spotify_id: Optional[str] = None
+    isrc: Optional[str] = None
+
+    # Lejátszás előtt feloldott stream URL
+    stream_url: Optional[str] = None
+    stream_expires: float = 0.0
+
+    # Összevont duplikátumok: ennyiszer szól egymás után (egyszer feloldva)
+    plays: int = 1
+    # Az ismétléseket kérők (a korlátokba náluk számítanak bele)
+    repeat_requesters: Optional[List[int]] = field(default=None, init=False, repr=False)
+
+    uid: int = field(default_factory=lambda: next(_uids), init=False, repr=False)
+
+    # Várólistára tételkori azonosító - a feloldás (video_id beállítása) nem változtathatja meg a
+    # várólista duplikátum indexének kulcsát
+    queued_identity: Optional[str] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        # Egy playlist számai ugyanazt az albumot / borítót / előadót ismétlik
+        self.thumbnail = _intern(self.thumbnail)
+        self.uploader = _intern(self.uploader)
+        self.album = _intern(self.album)
+        self.type = _intern(self.type)
+
+    @classmethod
+    def from_info(cls, info: Dict, requester_id: int, track_type: Optional[str] = None) -> 'Track':
+        """Keresési eredmény (YouTube / Spotify dict) átalakítása várólista elemmé"""
+        track_type = track_type or info.get('type', 'unknown')
+        spotify = 'spotify' in track_type
+        return cls(
+            title=info['title'],
+            duration=info.get('duration') or 0,
+            url=info.get('webpage_url') or info.get('spotify_url') or info.get('url'),
+            webpage_url=info.get('webpage_url') or info.get('spotify_url'),
+            thumbnail=info.get('thumbnail'),
+            uploader=info.get('uploader') or info.get('artist', 'Ismeretlen előadó'),
+            album=info.get('album'),
+            type=track_type,
+            requester_id=requester_id,
+            video_id=None if spotify else info.get('id'),
+            spotify_id=info.get('spotify_id'),
+            isrc=info.get('isrc')
+        )
+
+    def footprint(self) -> int:
+        """Becsült memóriaigény bájtban (a közös, internált szövegek nélkül)"""
+        return (sys.getsizeof(self) + sys.getsizeof(self.title)
+                + sys.getsizeof(self.url or '') + sys.getsizeof(self.webpage_url or ''))
+
+    @property
+    def identity(self) -> Optional[str]:
+        """A szám azonosítója duplikátum kereséshez (Spotify / YouTube azonosító vagy URL)"""
+        if self.spotify_id:
+            return f"spotify:{self.spotify_id}"
+        if self.video_id:
+            return f"yt:{self.video_id}"
+        return self.url
+
+    @property
+    def is_spotify(self) -> bool:
+        return 'spotify' in self.type.lower()
+
+    @property
+    def artist(self) -> Optional[str]:
+        """Előadó (csak Spotify számoknál ismert biztosan)"""
+        return self.uploader if self.is_spotify else None
+
+    @property
+    def spotify_url(self) -> Optional[str]:
+        return self.url if self.url and 'open.spotify.com' in self.url else None
+
+    @property
+    def requester_mention(self) -> str:
+        return f"<@{self.requester_id}>"
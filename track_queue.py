@@ -0,0 +1,287 @@
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from track import Track
+
+
+class QueueUsage:
+    """Több várólista közös számlálója (összes elem és becsült memória) a globális korlátokhoz"""
+
+    def __init__(self):
+        self.count = 0
+        self.memory = 0
+
+
+class TrackQueue:
+    """Indexelt várólista legfeljebb 2 * BLOCK_SIZE elemű blokkokra bontott listával
+
+    Pozíció szerinti elérés, beszúrás, törlés és áthelyezés O(n / BLOCK_SIZE + BLOCK_SIZE): a blokkok
+    végigjárása plusz a blokkon belüli listaművelet (rögzített blokkmérettel ez nem √n, de 10 000 elemnél
+    is csak ~80 blokk). Az eleje és a vége O(1) amortizált. A `version` minden módosításnál nő.
+    """
+
+    BLOCK_SIZE = 128
+
+    def __init__(self, items: Iterable[Track] = (), usage: Optional[QueueUsage] = None):
+        self.blocks: List[List[Track]] = []
+        self.length = 0
+        self.version = 0
+        # Elem azonosító -> az elemet tartalmazó blokk
+        self.where: Dict[int, List[Track]] = {}
+        # Szám azonosító -> a várólistán lévő példányai (O(1) duplikátum ellenőrzés)
+        self.identities: Dict[str, List[Track]] = {}
+        # Kérőnkénti elemszám (összevont ismétlésekkel) és becsült memória (korlátokhoz)
+        self.user_counts: Dict[int, int] = {}
+        # Összevont duplikátumok ismétléseinek száma
+        self.repeats = 0
+        self.memory = 0
+        self.usage = usage or QueueUsage()
+        self.extend(items)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[Track]:
+        return chain.from_iterable(self.blocks)
+
+    def __contains__(self, track: Track) -> bool:
+        return track.uid in self.where
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if step != 1:
+                return list(self)[index]
+            return list(islice(self._iter_from(start), max(0, stop - start)))
+        block, offset = self._locate(index)
+        return self.blocks[block][offset]
+
+    def _normalize(self, index: int) -> int:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("várólista index tartományon kívül")
+        return index
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Pozíció -> (blokk index, blokkon belüli pozíció)"""
+        index = self._normalize(index)
+        if index >= self.length - len(self.blocks[-1]):
+            return len(self.blocks) - 1, index - (self.length - len(self.blocks[-1]))
+        for block_index, block in enumerate(self.blocks):
+            if index < len(block):
+                return block_index, index
+            index -= len(block)
+        raise IndexError("várólista index tartományon kívül")
+
+    def _iter_from(self, index: int) -> Iterator[Track]:
+        if index >= self.length:
+            return iter(())
+        block, offset = self._locate(index)
+        return chain(islice(self.blocks[block], offset, None), chain.from_iterable(self.blocks[block + 1:]))
+
+    def _split(self, block_index: int):
+        """Túl nagyra nőtt blokk kettéosztása"""
+        block = self.blocks[block_index]
+        tail = block[self.BLOCK_SIZE:]
+        del block[self.BLOCK_SIZE:]
+        self.blocks.insert(block_index + 1, tail)
+        for track in tail:
+            self.where[track.uid] = tail
+
+    def _count_user(self, user_id: int, delta: int):
+        remaining = self.user_counts.get(user_id, 0) + delta
+        if remaining > 0:
+            self.user_counts[user_id] = remaining
+        else:
+            self.user_counts.pop(user_id, None)
+
+    def _added(self, track: Track, block: List[Track]):
+        self.where[track.uid] = block
+        identity = track.queued_identity = track.identity
+        if identity:
+            self.identities.setdefault(identity, []).append(track)
+        self._count_user(track.requester_id, 1)
+        repeats = track.repeat_requesters or ()
+        for user_id in repeats:
+            self._count_user(user_id, 1)
+        self.repeats += len(repeats)
+        size = track.footprint()
+        self.memory += size
+        self.usage.memory += size
+        self.usage.count += 1 + len(repeats)
+        self.length += 1
+        self.version += 1
+
+    def _forget(self, track: Track):
+        del self.where[track.uid]
+        self._count_user(track.requester_id, -1)
+        repeats = track.repeat_requesters or ()
+        for user_id in repeats:
+            self._count_user(user_id, -1)
+        self.repeats -= len(repeats)
+        size = track.footprint()
+        self.memory -= size
+        self.usage.memory -= size
+        self.usage.count -= 1 + len(repeats)
+        copies = self.identities.get(track.queued_identity)
+        if copies and track in copies:
+            copies.remove(track)
+            if not copies:
+                del self.identities[track.queued_identity]
+
+    def _take(self, block_index: int, offset: int) -> Track:
+        block = self.blocks[block_index]
+        track = block.pop(offset)
+        if not block:
+            del self.blocks[block_index]
+        self._forget(track)
+        self.length -= 1
+        self.version += 1
+        return track
+
+    def append(self, track: Track):
+        if not self.blocks or len(self.blocks[-1]) >= self.BLOCK_SIZE:
+            self.blocks.append([])
+        block = self.blocks[-1]
+        block.append(track)
+        self._added(track, block)
+
+    def extend(self, tracks: Iterable[Track]):
+        for track in tracks:
+            self.append(track)
+
+    def appendleft(self, track: Track):
+        if not self.blocks or len(self.blocks[0]) >= self.BLOCK_SIZE:
+            self.blocks.insert(0, [])
+        block = self.blocks[0]
+        block.insert(0, track)
+        self._added(track, block)
+
+    def insert(self, index: int, track: Track):
+        """Beszúrás az adott pozícióra (a végén túli index a végére tesz)"""
+        if index < 0:
+            index = max(0, index + self.length)
+        if index >= self.length:
+            self.append(track)
+            return
+        block_index, offset = self._locate(index)
+        block = self.blocks[block_index]
+        block.insert(offset, track)
+        self._added(track, block)
+        if len(block) > 2 * self.BLOCK_SIZE:
+            self._split(block_index)
+
+    def popleft(self) -> Track:
+        if not self.length:
+            raise IndexError("üres várólista")
+        return self._take(0, 0)
+
+    def add_play(self, track: Track, requester_id: int):
+        """Összevont duplikátum: a várólistán lévő elem még egyszer szól (a kérő korlátjaiba beszámít)"""
+        track.plays += 1
+        if track.repeat_requesters is None:
+            track.repeat_requesters = []
+        track.repeat_requesters.append(requester_id)
+        self._count_user(requester_id, 1)
+        self.repeats += 1
+        self.usage.count += 1
+        self.version += 1
+
+    def pop_play(self) -> Track:
+        """A következő lejátszás kivétele - összevont duplikátumnál csak egy ismétlés fogy, az elem elöl marad"""
+        track = self.popleft()
+        if track.plays > 1:
+            track.plays -= 1
+            if track.repeat_requesters:
+                track.repeat_requesters.pop(0)
+            self.appendleft(track)
+        return track
+
+    @property
+    def total_plays(self) -> int:
+        """Hátralévő lejátszások száma (az összevont ismétlésekkel együtt)"""
+        return self.length + self.repeats
+
+    def pop(self, index: int = -1) -> Track:
+        """Elem kivétele pozíció szerint"""
+        return self._take(*self._locate(index))
+
+    def index(self, track: Track) -> int:
+        """Elem pozíciója (azonosság alapján)"""
+        block = self.where.get(track.uid)
+        if block is None:
+            raise ValueError("az elem nincs a várólistában")
+        position = 0
+        for candidate in self.blocks:
+            if candidate is block:
+                return position + block.index(track)
+            position += len(candidate)
+        raise ValueError("az elem nincs a várólistában")
+
+    def find(self, uid: int) -> int:
+        """Pozíció elem azonosító alapján (-1, ha nincs)"""
+        block = self.where.get(uid)
+        if block is None:
+            return -1
+        for track in block:
+            if track.uid == uid:
+                return self.index(track)
+        return -1
+
+    def duplicate_of(self, track: Track) -> Optional[Track]:
+        """A várólistán már szereplő, azonos számot jelölő elem (ha van)"""
+        copies = self.identities.get(track.identity) if track.identity else None
+        return copies[0] if copies else None
+
+    def remove(self, track: Track):
+        """Elem eltávolítása (azonosság alapján)"""
+        self.pop(self.index(track))
+
+    def move(self, source: int, destination: int) -> Track:
+        """Elem áthelyezése egyik pozícióról a másikra"""
+        track = self.pop(source)
+        self.insert(destination, track)
+        return track
+
+    def skip_to(self, index: int) -> int:
+        """Az adott pozíció előtti elemek eldobása, a visszatérési érték az eldobottak száma"""
+        index = max(0, min(index, self.length))
+        dropped = 0
+        # Egész blokkok eldobása egyben
+        while self.blocks and dropped + len(self.blocks[0]) <= index:
+            block = self.blocks.pop(0)
+            for track in block:
+                self._forget(track)
+            dropped += len(block)
+        if dropped < index:
+            head = self.blocks[0]
+            cut = index - dropped
+            for track in head[:cut]:
+                self._forget(track)
+            del head[:cut]
+            dropped = index
+        self.length -= dropped
+        if dropped:
+            self.version += 1
+        return dropped
+
+    def page(self, number: int, size: int) -> List[Track]:
+        """Egy megjelenítési oldal elemei (0-tól számozva)"""
+        return self[number * size:(number + 1) * size]
+
+    def user_count(self, user_id: int) -> int:
+        """Egy felhasználó által kért, várakozó lejátszások száma (összevont ismétlésekkel)"""
+        return self.user_counts.get(user_id, 0)
+
+    def clear(self):
+        self.usage.count -= self.length + self.repeats
+        self.usage.memory -= self.memory
+        self.memory = 0
+        self.repeats = 0
+        self.user_counts.clear()
+        self.blocks.clear()
+        self.where.clear()
+        self.identities.clear()
+        self.length = 0
+        self.version += 1